@@ -0,0 +1,48 @@
+from alembic import context
+from sqlalchemy import MetaData
+
+from alembic_utils_extended.replaceable_entity import ReplaceableEntity
+
+# The benchmark harness passes everything through config.attributes
+config = context.config
+
+engine = config.attributes["engine"]
+target_metadata = config.attributes.get("target_metadata", MetaData())
+schema = config.attributes["schema"]
+context_opts = config.attributes.get("context_opts", {})
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    # Only the synthetic workload's entities. Tables are created by the harness and
+    # indexes are owned by compare_indexes
+    if isinstance(object, ReplaceableEntity):
+        return object.schema == schema
+    return False
+
+
+def include_name(name, type_, parent_names) -> bool:
+    if type_ == "schema":
+        return name == schema
+    return True
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_schemas=True,
+            # Kept in the bench schema, dropped with it, never the database's own migration history
+            version_table_schema=schema,
+            include_object=include_object,
+            include_name=include_name,
+            compare_indexes=True,
+            compare_check_constraints=True,
+            **context_opts,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+run_migrations_online()
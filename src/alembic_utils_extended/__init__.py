@@ -1,5 +1,14 @@
+from alembic.autogenerate import comparators
+from alembic.util import langhelpers
+
 from . import (  # noqa: F401  # registers @comparators.dispatch_for hook
     autogen_ordering,
     pg_check_constraint,
     pg_expression_index,
+    profiling,
+    replaceable_entity,
 )
+
+if not hasattr(langhelpers, "DispatchPriority"):  # pragma: no cover - Alembic < 1.18
+    # Comparators are dispatched in registration order: report the profile after every other one of the package
+    comparators.dispatch_for("schema")(profiling.report_profile)
@@ -41,6 +41,9 @@ from alembic.autogenerate import comparators
 from alembic.autogenerate.api import AutogenContext
 from alembic.operations import MigrateOperation, ops
 
+from alembic_utils_extended.pg_check_constraint import (
+    ValidateCheckConstraintOp,
+)
 from alembic_utils_extended.reversible_op import CreateOp, DropOp, ReplaceOp
 
 try:
@@ -53,7 +56,8 @@ except ImportError:  # pragma: no cover - Alembic < 1.18 orders creates correctl
 # and columns managed by stock Alembic, so on upgrade they must come after stock
 # ops and on downgrade before them. Stock Alembic nests its own index/constraint
 # ops inside ``ModifyTableOps``; only the fork appends these at the top level.
-_LIBRARY_CREATE_OPS = (CreateOp, ReplaceOp, ops.CreateIndexOp, ops.CreateCheckConstraintOp)
+# ``ValidateCheckConstraintOp`` follows the ``NOT VALID`` constraint it validates.
+_LIBRARY_CREATE_OPS = (CreateOp, ReplaceOp, ops.CreateIndexOp, ops.CreateCheckConstraintOp, ValidateCheckConstraintOp)
 _LIBRARY_DROP_OPS = (DropOp, ops.DropIndexOp, ops.DropConstraintOp)
 
 
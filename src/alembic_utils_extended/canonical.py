@@ -0,0 +1,115 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+"""Model definitions as PostgreSQL renders them, shared by the content diffs of the comparators
+
+`compare_indexes` and `compare_check_constraints` compare model objects with the database
+by the text PostgreSQL renders for them. The model side is canonicalized by PostgreSQL
+itself: inside a savepoint, the statements creating the objects of a table are run against
+an empty ``LIKE`` copy of the table and read back. Neither the real table nor its rows are
+touched. Statements PostgreSQL rejects have no canonical definition and are reported with
+a warning.
+
+Canonical definitions are cached by the columns of their table and their statement, across
+autogenerate runs in the same process, e.g. ``alembic check`` in a test suite.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+# Lives in ``pg_temp``, so the model's own object names can't collide
+CANONICAL_TEMP_TABLE = "_alembic_utils_canon"
+
+_CANONICAL_CACHE: dict[tuple[str, str], str | None] = {}
+_CANONICAL_CACHE_MAX_SIZE = 10_000
+
+
+def get_canonical_definitions(
+    connection: Connection,
+    schema: str,
+    statements_by_table: dict[str, dict[str, str]],
+    read_definitions: Callable[[Connection], dict[str, str]],
+) -> dict[str, dict[str, str | None]]:
+    """The canonical definition of every object of *statements_by_table*, by table and object name
+
+    **Parameters:**
+
+    * **connection** - *Connection*: The connection of the autogenerate run
+    * **schema** - *str*: The schema of the tables
+    * **statements_by_table** - *dict[str, dict[str, str]]*: Per table, the statement creating each object on `CANONICAL_TEMP_TABLE`, by object name
+    * **read_definitions** - *Callable[[Connection], dict[str, str]]*: Reads the canonical definitions of the objects of `CANONICAL_TEMP_TABLE`, by object name
+    """
+    if not statements_by_table:
+        return {}
+
+    column_signatures = dict(
+        connection.execute(_TABLE_COLUMN_SIGNATURES_QUERY, {"schema": schema, "table_names": list(statements_by_table)}).fetchall()
+    )
+
+    definitions: dict[str, dict[str, str | None]] = {}
+    for table_name, statements in statements_by_table.items():
+        signature = column_signatures.get(table_name, "")
+
+        missing = {name: statement for name, statement in statements.items() if (signature, statement) not in _CANONICAL_CACHE}
+        if missing:
+            canonical = _canonicalize_on_temp_table(connection, schema, table_name, missing, read_definitions)
+            if len(_CANONICAL_CACHE) + len(missing) > _CANONICAL_CACHE_MAX_SIZE:
+                _CANONICAL_CACHE.clear()
+            for name, statement in missing.items():
+                _CANONICAL_CACHE[(signature, statement)] = canonical.get(name)
+
+        definitions[table_name] = {name: _CANONICAL_CACHE[(signature, statement)] for name, statement in statements.items()}
+
+    return definitions
+
+
+def _canonicalize_on_temp_table(
+    connection: Connection,
+    schema: str,
+    table_name: str,
+    statements: dict[str, str],
+    read_definitions: Callable[[Connection], dict[str, str]],
+) -> dict[str, str]:
+    """Canonical definition of each object of *statements*, created on an empty copy of *table_name*"""
+    preparer = connection.dialect.identifier_preparer
+
+    savepoint = connection.begin_nested()
+    try:
+        connection.execute(
+            text(
+                f"CREATE TEMP TABLE {preparer.quote(CANONICAL_TEMP_TABLE)} (LIKE {preparer.quote_schema(schema)}.{preparer.quote(table_name)})"
+            )
+        )
+        for name, statement in statements.items():
+            statement_savepoint = connection.begin_nested()
+            try:
+                connection.execute(text(statement))
+            except DBAPIError as exc:
+                statement_savepoint.rollback()
+                logger.warning("Could not canonicalize %s on %s.%s, assuming unchanged: %s", name, schema, table_name, exc.orig)
+            else:
+                statement_savepoint.commit()
+
+        return read_definitions(connection)
+    finally:
+        savepoint.rollback()
+
+
+_TABLE_COLUMN_SIGNATURES_QUERY = text(
+    """
+    SELECT
+        t.relname AS table_name,
+        string_agg(format('%s %s', a.attname, format_type(a.atttypid, a.atttypmod)), ', ' ORDER BY a.attnum) AS signature
+    FROM pg_class t
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum > 0 AND NOT a.attisdropped
+    WHERE n.nspname = :schema
+      AND t.relname = ANY(:table_names)
+    GROUP BY t.relname
+    """
+)
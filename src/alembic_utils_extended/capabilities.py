@@ -0,0 +1,71 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+"""Server capabilities, probed once per database connection
+
+Catalog queries differ across PostgreSQL versions (`pg_proc.prokind` replaced `proisagg`
+and `proiswindow` in 11, `NULLS NOT DISTINCT` arrived in 15). Rather than asking the
+server for its version before each reflection, the capabilities are probed on first use
+and stored in the connection's `info` dictionary, which lives as long as the underlying
+DBAPI connection and is shared by every entity class reflecting through it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+_INFO_KEY = "alembic_utils_extended.capabilities"
+
+
+@dataclass(frozen=True)
+class ServerCapabilities:
+    """What the connected server supports
+
+    **Parameters:**
+
+    * **server_version_num** - *int*: e.g. 90603 for 9.6.3 or 120003 for 12.3
+    * **pg_proc_columns** - *frozenset[str]*: The columns of `pg_catalog.pg_proc`
+    """
+
+    server_version_num: int
+    pg_proc_columns: frozenset[str]
+
+    @property
+    def has_prokind(self) -> bool:
+        """Does `pg_proc` tell functions, procedures and aggregates apart with `prokind` (PG 11+)"""
+        return "prokind" in self.pg_proc_columns
+
+    @property
+    def supports_nulls_not_distinct(self) -> bool:
+        """Does `CREATE UNIQUE INDEX` accept `NULLS NOT DISTINCT` (PG 15+)"""
+        return self.server_version_num >= 150000
+
+
+CAPABILITIES_QUERY = sql_text(
+    """
+    select
+        current_setting('server_version_num')::int as server_version_num,
+        array(
+            select
+                attname::text
+            from
+                pg_attribute
+            where
+                attrelid = 'pg_catalog.pg_proc'::regclass
+                and attnum > 0
+                and not attisdropped
+        ) as pg_proc_columns
+    """
+)
+
+
+def get_server_capabilities(sess: Session | Connection) -> ServerCapabilities:
+    """The capabilities of the server behind *sess*, probed on the first call per connection"""
+    connection = sess.connection() if isinstance(sess, Session) else sess
+    capabilities = connection.info.get(_INFO_KEY)
+    if capabilities is None:
+        row = connection.execute(CAPABILITIES_QUERY).one()
+        capabilities = ServerCapabilities(server_version_num=row.server_version_num, pg_proc_columns=frozenset(row.pg_proc_columns))
+        connection.info[_INFO_KEY] = capabilities
+    return capabilities
@@ -0,0 +1,83 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Iterable
+
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from alembic_utils_extended.replaceable_entity import ReplaceableEntity
+
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshot:
+    """An in-memory index of the entities live in the database
+
+    Reflects each entity type once for every observed schema so that op and drop
+    detection during `alembic revision --autogenerate` can be answered by identity
+    lookups rather than one catalog round trip per entity and per schema.
+
+    **Parameters:**
+
+    * **entities** - *Iterable[ReplaceableEntity]*: Entities reflected from the database
+    * **entity_types** - *Iterable[type[ReplaceableEntity]]*: Entity classes the snapshot was collected for
+    * **schemas** - *Iterable[str]*: Schemas the snapshot was collected for
+    """
+
+    def __init__(
+        self,
+        entities: Iterable["ReplaceableEntity"],
+        entity_types: Iterable[type["ReplaceableEntity"]],
+        schemas: Iterable[str],
+    ):
+        self.entity_types: set[type["ReplaceableEntity"]] = set(entity_types)
+        self.schemas: set[str] = set(schemas)
+        self._by_identity: dict[str, "ReplaceableEntity"] = {}
+        self._by_class: dict[type["ReplaceableEntity"], list["ReplaceableEntity"]] = defaultdict(list)
+
+        for entity in entities:
+            self._by_identity[entity.identity] = entity
+            self._by_class[entity.__class__].append(entity)
+
+    @classmethod
+    def from_database(
+        cls,
+        sess: Session,
+        entity_types: Iterable[type["ReplaceableEntity"]],
+        schemas: Iterable[str],
+    ) -> "CatalogSnapshot":
+        """Reflect every entity of *entity_types* living in *schemas* with one catalog read per type"""
+        entity_types = list(entity_types)
+        schemas = set(schemas)
+
+        entities: list["ReplaceableEntity"] = []
+        for entity_class in entity_types:
+            logger.debug("Collecting catalog snapshot for %s", entity_class.__name__)
+            # Schema patterns may match more than the exact names
+            schema = sorted(schemas) if entity_class.reflects_schema_lists else "%"
+            reflected: list["ReplaceableEntity"] = entity_class.from_database(sess, schema=schema)
+            entities.extend(x for x in reflected if x.schema in schemas)
+
+        return cls(entities, entity_types=entity_types, schemas=schemas)
+
+    def covers(self, entity_class: type["ReplaceableEntity"], schema: str) -> bool:
+        """Was *entity_class* in *schema* collected by this snapshot"""
+        return entity_class in self.entity_types and schema in self.schemas
+
+    def get(self, identity: str) -> "ReplaceableEntity | None":
+        """The live entity matching *identity*, if one exists"""
+        return self._by_identity.get(identity)
+
+    def entities(self, entity_class: type["ReplaceableEntity"] | None = None) -> list["ReplaceableEntity"]:
+        """All live entities, optionally restricted to *entity_class*"""
+        if entity_class is not None:
+            return list(self._by_class.get(entity_class, []))
+        return list(self._by_identity.values())
+
+    def __contains__(self, identity: str) -> bool:
+        return identity in self._by_identity
+
+    def __len__(self) -> int:
+        return len(self._by_identity)
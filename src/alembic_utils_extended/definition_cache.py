@@ -0,0 +1,340 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+"""A persistent cache of postgres rendered entity definitions
+
+Rendering an entity requires simulating it in the database. Most registered entities
+do not change between autogenerate runs, so their rendered definitions can be reused.
+
+Entries are keyed by a hash of everything the rendering depends on:
+
+* the entity's class and identity
+* the SQL used to create it
+* the SQL used to create the local entities its definition references
+* the server version, search_path and installed extensions
+* the columns of every table, view and composite type, the types and domains, and the
+  signatures of every function, in all but the system schemas, leaving out the registered
+  entities themselves and the objects of extensions
+
+Any change to those produces a different key. Changes to anything else that affects how
+postgres renders a definition, such as operators, casts or settings other than search_path,
+are not detected: clear the cache after making them. Entries are only removed explicitly
+with `DefinitionCache.prune` or from the command line:
+
+    python -m alembic_utils_extended.definition_cache prune migrations/.alembic_utils_cache.json --max-age-days 30
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from alembic.autogenerate.api import AutogenContext
+
+    from alembic_utils_extended.replaceable_entity import ReplaceableEntity
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE_NAME = ".alembic_utils_cache.json"
+
+
+class DefinitionCache:
+    """A JSON file mapping local entities to their postgres rendered definitions
+
+    **Parameters:**
+
+    * **path** - *str | Path*: Location of the cache file. Created on first save
+    """
+
+    # Bump when the layout of entries changes. Files with another version are ignored
+    format_version = 1
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._used: set[str] = set()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+
+        try:
+            contents = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable entity definition cache at %s", self.path)
+            return
+
+        if not isinstance(contents, dict) or contents.get("version") != self.format_version:
+            logger.warning("Ignoring entity definition cache at %s written by another version", self.path)
+            return
+
+        self._entries = contents.get("entries", {})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, entity: "ReplaceableEntity") -> "ReplaceableEntity | None":
+        """The rendered definition of *entity* stored under *key*, if one exists"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touch(key)
+
+        # Rendered definitions share the local entity's class. Restore the reflected state
+        # directly, it has already been through __init__'s normalization
+        rendered = entity.__class__.__new__(entity.__class__)
+        rendered.__dict__.update(entry["state"])
+        return rendered
+
+    def put(self, key: str, rendered: "ReplaceableEntity") -> None:
+        """Store the *rendered* definition under *key*"""
+        state = dict(vars(rendered))
+        try:
+            json.dumps(state)
+        except (TypeError, ValueError):
+            logger.debug("Not caching %s, its state is not serializable", rendered.identity)
+            return
+
+        self._entries[key] = {"state": state}
+        self._touch(key)
+
+    def _touch(self, key: str) -> None:
+        self._entries[key]["last_used"] = datetime.now(timezone.utc).isoformat()
+        self._used.add(key)
+        self._dirty = True
+
+    def prune(self, max_age: timedelta | None = None) -> int:
+        """Remove stale entries, returning the number removed
+
+        With *max_age*, removes entries that have not been used for longer than *max_age*.
+        Otherwise removes every entry that was not used since the cache was opened.
+        """
+        if max_age is None:
+            stale = [key for key in self._entries if key not in self._used]
+        else:
+            cutoff = datetime.now(timezone.utc) - max_age
+            stale = [key for key, entry in self._entries.items() if datetime.fromisoformat(entry["last_used"]) < cutoff]
+
+        for key in stale:
+            del self._entries[key]
+
+        self._dirty = self._dirty or bool(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        self._entries.clear()
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed
+
+        Writes to a temporary file and moves it into place so that a concurrent or
+        interrupted run never leaves a partially written cache behind
+        """
+        if not self._dirty:
+            return
+
+        _write_json_atomically(self.path, {"version": self.format_version, "entries": self._entries})
+        self._dirty = False
+
+
+def open_definition_cache(autogen_context: "AutogenContext") -> DefinitionCache | None:
+    """The cache configured by the `entity_definition_cache` option, if any
+
+    `True` stores the cache in the alembic script directory, a path stores it there
+    """
+    option = autogen_context.opts.get("entity_definition_cache")
+    if not option:
+        return None
+
+    if option is True:
+        script = autogen_context.migration_context.script
+        if script is None:
+            logger.warning("entity_definition_cache is enabled but the alembic script directory is unknown")
+            return None
+        return DefinitionCache(Path(script.dir) / DEFAULT_CACHE_FILE_NAME)
+
+    return DefinitionCache(option)
+
+
+def database_fingerprint(sess: Session, entities: Iterable["ReplaceableEntity"] = ()) -> str:
+    """A hash of the database state that influences how postgres renders *entities*, other than *entities* themselves"""
+    entity_names = sorted({f"{entity.schema}.{entity.signature.split('(')[0]}" for entity in entities})
+    row = sess.execute(FINGERPRINT_QUERY, {"entity_names": entity_names}).fetchone()
+    return _sha256(list(row))
+
+
+def cache_keys(entities: list["ReplaceableEntity"], fingerprint: str) -> dict[str, str]:
+    """Compute the cache key of each local entity, mapped by identity"""
+    from alembic_utils_extended.depends import _identifier_references
+
+    local_hashes = [_sha256([str(x) for x in entity.to_sql_statement_create()]) for entity in entities]
+    references = _identifier_references(entities)
+
+    keys: dict[str, str] = {}
+    for index, entity in enumerate(entities):
+        # Every local entity reachable through references
+        reachable: set[int] = set()
+        pending = list(references[index])
+        while pending:
+            reference = pending.pop()
+            if reference not in reachable and reference != index:
+                reachable.add(reference)
+                pending.extend(references[reference])
+
+        keys[entity.identity] = _sha256(
+            [
+                f"{entity.__class__.__module__}.{entity.__class__.__name__}",
+                entity.identity,
+                local_hashes[index],
+                sorted(local_hashes[x] for x in reachable),
+                fingerprint,
+            ]
+        )
+    return keys
+
+
+def _write_json_atomically(path: Path, contents: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(contents, tmp_file, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def _sha256(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, default=str).encode()).hexdigest()
+
+
+# Objects outside of the system schemas, whichever schema they are in: entities may reference any of them.
+# The registered entities themselves are left out, their SQL is part of the keys already, and so are the
+# objects of extensions, covered by the extension versions.
+FINGERPRINT_QUERY = sql_text(
+    """
+    select
+        current_setting('server_version_num') as server_version_num,
+        current_setting('search_path') as search_path,
+        (
+            select
+                coalesce(string_agg(ext.extname || ' ' || ext.extversion, ',' order by ext.extname), '')
+            from
+                pg_extension ext
+        ) as extensions,
+        (
+            select
+                md5(coalesce(string_agg(
+                    format('%s.%s.%s %s', n.nspname, c.relname, a.attname, format_type(a.atttypid, a.atttypmod)),
+                    ',' order by n.nspname, c.relname, a.attnum
+                ), ''))
+            from
+                pg_attribute a
+                join pg_class c
+                    on a.attrelid = c.oid
+                join pg_namespace n
+                    on c.relnamespace = n.oid
+            where
+                c.relkind in ('r', 'p', 'f', 'v', 'm', 'c')
+                and a.attnum > 0
+                and not a.attisdropped
+                and n.nspname <> 'information_schema'
+                and n.nspname !~ '^pg_'
+                and format('%s.%s', n.nspname, c.relname) <> all(cast(:entity_names as text[]))
+                and not exists (select 1 from pg_depend d where d.classid = 'pg_class'::regclass and d.objid = c.oid and d.deptype = 'e')
+        ) as relation_columns,
+        (
+            select
+                md5(coalesce(string_agg(type_definition, ',' order by type_definition), ''))
+            from
+                (
+                    select
+                        format(
+                            '%s.%s %s %s (%s) (%s)',
+                            n.nspname,
+                            t.typname,
+                            t.typtype,
+                            format_type(t.typbasetype, t.typtypmod),
+                            (select string_agg(e.enumlabel, ',' order by e.enumsortorder) from pg_enum e where e.enumtypid = t.oid),
+                            (select string_agg(pg_get_constraintdef(con.oid), ',' order by con.conname) from pg_constraint con where con.contypid = t.oid)
+                        ) as type_definition
+                    from
+                        pg_type t
+                        join pg_namespace n
+                            on t.typnamespace = n.oid
+                    where
+                        t.typtype in ('b', 'd', 'e', 'r')
+                        and t.typcategory <> 'A'
+                        and n.nspname <> 'information_schema'
+                        and n.nspname !~ '^pg_'
+                        and not exists (select 1 from pg_depend d where d.classid = 'pg_type'::regclass and d.objid = t.oid and d.deptype = 'e')
+                ) types
+        ) as types,
+        (
+            select
+                md5(coalesce(string_agg(function_signature, ',' order by function_signature), ''))
+            from
+                (
+                    select
+                        format('%s.%s(%s) %s', n.nspname, p.proname, pg_get_function_identity_arguments(p.oid), pg_get_function_result(p.oid)) as function_signature
+                    from
+                        pg_proc p
+                        join pg_namespace n
+                            on p.pronamespace = n.oid
+                    where
+                        n.nspname <> 'information_schema'
+                        and n.nspname !~ '^pg_'
+                        and format('%s.%s', n.nspname, p.proname) <> all(cast(:entity_names as text[]))
+                        and not exists (select 1 from pg_depend d where d.classid = 'pg_proc'::regclass and d.objid = p.oid and d.deptype = 'e')
+                ) functions
+        ) as function_signatures
+    """
+)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m alembic_utils_extended.definition_cache",
+        description="Manage the alembic_utils_extended entity definition cache",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prune_parser = subparsers.add_parser("prune", help="Remove entries that have not been used recently")
+    prune_parser.add_argument("path", type=Path)
+    prune_parser.add_argument("--max-age-days", type=float, default=30.0)
+
+    clear_parser = subparsers.add_parser("clear", help="Remove every entry")
+    clear_parser.add_argument("path", type=Path)
+
+    args = parser.parse_args(argv)
+
+    cache = DefinitionCache(args.path)
+    if args.command == "prune":
+        removed = cache.prune(max_age=timedelta(days=args.max_age_days))
+        print(f"Removed {removed} entries, {len(cache)} remaining")
+    else:
+        removed = len(cache)
+        cache.clear()
+        print(f"Removed {removed} entries")
+    cache.save()
+
+
+if __name__ == "__main__":
+    main()
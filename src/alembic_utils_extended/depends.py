@@ -1,11 +1,22 @@
+import heapq
 import logging
+import re
+from collections import defaultdict
 from contextlib import contextmanager
-from typing import Generator
+from typing import TYPE_CHECKING, Generator
 
 from sqlalchemy import exc as sqla_exc
+from sqlalchemy import text as sql_text
 from sqlalchemy.orm import Session
 
-from alembic_utils_extended.simulate import simulate_entity
+from alembic_utils_extended.simulate import (
+    _execute_in_savepoint,
+    _without_data,
+    simulate_entity,
+)
+
+if TYPE_CHECKING:
+    from alembic_utils_extended.replaceable_entity import ReplaceableEntity
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +26,61 @@ def solve_resolution_order(sess: Session, entities):
     a migration will suceed if, for example, two new views are created and one
     refers to the other
 
+    Entities are created once in a scratch transaction and ordered by a topological
+    sort of the dependencies postgres records between them. Entities the dependency
+    graph can not place are resolved by trial and error simulation.
+
     This strategy will only solve for simple cases
     """
+    resolved, unplaced = _solve_resolution_order_by_graph(sess, entities)
 
-    resolved = []
+    if not unplaced:
+        return resolved
+
+    return _solve_resolution_order_by_simulation(sess, unplaced, resolved)
+
+
+def _solve_resolution_order_by_graph(sess: Session, entities) -> tuple[list["ReplaceableEntity"], list["ReplaceableEntity"]]:
+    """Order *entities* using the dependencies between them recorded in pg_depend
+
+    Returns the entities that could be ordered and those that could not, either
+    because they failed to create or because they are part of a cycle
+    """
+    # Attempt creation in an order that respects references between definitions
+    # so a single pass creates as many entities as possible
+    attempt_order, cyclic = _topological_sort(entities, _identifier_references(entities))
+    attempt_order.extend(cyclic)
+
+    logger.info("Resolving entities from the dependency graph")
+    outer_transaction = sess.begin_nested()
+    try:
+        # Drop dependents first so that cascades can not remove an entity that was already recreated
+        for entity in reversed(entities):
+            _execute_in_savepoint(sess, entity.to_sql_statement_drop(cascade=True))
+
+        created = [entity for entity in attempt_order if _execute_in_savepoint(sess, _without_data(entity).to_sql_statement_create())]
+
+        edges = _catalog_references(sess, created)
+    finally:
+        outer_transaction.rollback()
+
+    # Function bodies are not tracked by pg_depend, fall back to the names they reference
+    function_references = _identifier_references(created)
+    for index, entity in enumerate(created):
+        if _catalog_key(entity)[0] == "function":
+            edges[index] |= function_references[index]
+
+    resolved, _ = _topological_sort(created, edges)
+
+    placed = {id(x) for x in resolved}
+    unplaced = [entity for entity in entities if id(entity) not in placed]
+    return resolved, unplaced
+
+
+def _solve_resolution_order_by_simulation(sess: Session, entities, resolved):
+    """Append *entities* to *resolved* in an order found by repeatedly simulating them"""
+
+    resolved = list(resolved)
 
     # Resolve the entities with 0 dependencies first (faster)
     logger.info("Resolving entities with no dependencies")
@@ -55,6 +117,170 @@ def solve_resolution_order(sess: Session, entities):
     return resolved
 
 
+def _topological_sort(entities, edges: dict[int, set[int]]) -> tuple[list["ReplaceableEntity"], list["ReplaceableEntity"]]:
+    """Sort *entities* so that each comes after the entities it references
+
+    *edges* maps the index of an entity to the indexes of the entities it references.
+    Ties are broken by input order. Returns the sorted entities and the entities that
+    could not be sorted due to a cycle.
+    """
+    dependents: dict[int, set[int]] = defaultdict(set)
+    n_references = [0] * len(entities)
+    for index, references in edges.items():
+        for reference in references - {index}:
+            dependents[reference].add(index)
+            n_references[index] += 1
+
+    ready = [index for index, count in enumerate(n_references) if count == 0]
+    heapq.heapify(ready)
+
+    ordered = []
+    while ready:
+        index = heapq.heappop(ready)
+        ordered.append(index)
+        for dependent in dependents[index]:
+            n_references[dependent] -= 1
+            if n_references[dependent] == 0:
+                heapq.heappush(ready, dependent)
+
+    placed = set(ordered)
+    return [entities[x] for x in ordered], [x for index, x in enumerate(entities) if index not in placed]
+
+
+def _catalog_key(entity) -> tuple[str, ...]:
+    """A key matching *entity* to the objects described by pg_depend"""
+    from alembic_utils_extended.pg_function import PGFunction
+    from alembic_utils_extended.pg_materialized_view import PGMaterializedView
+    from alembic_utils_extended.pg_policy import PGPolicy
+    from alembic_utils_extended.pg_trigger import PGTrigger
+    from alembic_utils_extended.pg_view import PGView
+
+    if isinstance(entity, (PGView, PGMaterializedView)):
+        return ("relation", entity.schema, entity.signature)
+    if isinstance(entity, PGFunction):
+        return ("function", entity.schema, entity.signature.split("(")[0].strip())
+    if isinstance(entity, (PGTrigger, PGPolicy)):
+        table_schema, _, table = entity.on_entity.partition(".")
+        return (entity.type_, table_schema, entity.signature, table)
+    return (entity.type_, entity.identity)
+
+
+def _catalog_references(sess: Session, entities) -> dict[int, set[int]]:
+    """Read the references between *entities*, which must exist in the database, from pg_depend"""
+    from alembic_utils_extended.pg_extension import PGExtension
+    from alembic_utils_extended.pg_grant_table import PGGrantTable
+
+    edges: dict[int, set[int]] = defaultdict(set)
+    if not entities:
+        return edges
+
+    indexes_by_key: dict[tuple[str, ...], list[int]] = defaultdict(list)
+    for index, entity in enumerate(entities):
+        indexes_by_key[_catalog_key(entity)].append(index)
+
+    schemas = sorted({key[1] for key in indexes_by_key if len(key) > 2})
+    rows = sess.execute(DEPENDENCY_QUERY, {"schemas": schemas}).fetchall() if schemas else []
+
+    for dependent_kind, dependent_schema, dependent_name, dependent_table, referenced_kind, referenced_schema, referenced_name in rows:
+        dependent_key = (dependent_kind, dependent_schema, dependent_name) + ((dependent_table,) if dependent_table else ())
+        for index in indexes_by_key.get(dependent_key, []):
+            edges[index].update(indexes_by_key.get((referenced_kind, referenced_schema, referenced_name), []))
+
+    extensions = {index for index, entity in enumerate(entities) if isinstance(entity, PGExtension)}
+    for index, entity in enumerate(entities):
+        # Grants are tracked in the relation's acl rather than in pg_depend
+        if isinstance(entity, PGGrantTable):
+            edges[index].update(indexes_by_key.get(("relation", entity.schema, entity.table), []))
+        # Extension objects may be referenced anywhere, create them first
+        if index not in extensions:
+            edges[index] |= extensions
+
+    return edges
+
+
+def _identifier_references(entities) -> dict[int, set[int]]:
+    """Find references between *entities* by searching each definition for the names of the others"""
+    edges: dict[int, set[int]] = defaultdict(set)
+
+    indexes_by_name: dict[str, list[int]] = defaultdict(list)
+    for index, entity in enumerate(entities):
+        key = _catalog_key(entity)
+        if key[0] in ("relation", "function"):
+            indexes_by_name[key[2].lower()].append(index)
+
+    if not indexes_by_name:
+        return edges
+
+    names = sorted(indexes_by_name, key=len, reverse=True)
+    pattern = re.compile(r"(?<![\w$])(" + "|".join(re.escape(x) for x in names) + r")(?![\w$])", re.IGNORECASE)
+
+    for index, entity in enumerate(entities):
+        for match in pattern.finditer(str(entity.definition)):
+            edges[index].update(x for x in indexes_by_name[match.group(1).lower()] if x != index)
+
+    return edges
+
+
+DEPENDENCY_QUERY = sql_text(
+    """
+    select
+        case d.classid
+            when 'pg_rewrite'::regclass then 'relation'
+            when 'pg_proc'::regclass then 'function'
+            when 'pg_trigger'::regclass then 'trigger'
+            else 'policy'
+        end as dependent_kind,
+        coalesce(rw_ns.nspname, p_ns.nspname, tg_ns.nspname, pol_ns.nspname) as dependent_schema,
+        coalesce(rw_cls.relname, p.proname, tg.tgname, pol.polname) as dependent_name,
+        coalesce(tg_cls.relname, pol_cls.relname) as dependent_table,
+        case d.refclassid
+            when 'pg_class'::regclass then 'relation'
+            else 'function'
+        end as referenced_kind,
+        coalesce(ref_cls_ns.nspname, ref_p_ns.nspname) as referenced_schema,
+        coalesce(ref_cls.relname, ref_p.proname) as referenced_name
+    from
+        pg_depend d
+        -- A view or materialized view's dependencies belong to its _RETURN rule
+        left join pg_rewrite rw
+            on d.classid = 'pg_rewrite'::regclass and rw.oid = d.objid
+        left join pg_class rw_cls
+            on rw_cls.oid = rw.ev_class
+        left join pg_namespace rw_ns
+            on rw_ns.oid = rw_cls.relnamespace
+        left join pg_proc p
+            on d.classid = 'pg_proc'::regclass and p.oid = d.objid
+        left join pg_namespace p_ns
+            on p_ns.oid = p.pronamespace
+        left join pg_trigger tg
+            on d.classid = 'pg_trigger'::regclass and tg.oid = d.objid
+        left join pg_class tg_cls
+            on tg_cls.oid = tg.tgrelid
+        left join pg_namespace tg_ns
+            on tg_ns.oid = tg_cls.relnamespace
+        left join pg_policy pol
+            on d.classid = 'pg_policy'::regclass and pol.oid = d.objid
+        left join pg_class pol_cls
+            on pol_cls.oid = pol.polrelid
+        left join pg_namespace pol_ns
+            on pol_ns.oid = pol_cls.relnamespace
+        left join pg_class ref_cls
+            on d.refclassid = 'pg_class'::regclass and ref_cls.oid = d.refobjid
+        left join pg_namespace ref_cls_ns
+            on ref_cls_ns.oid = ref_cls.relnamespace
+        left join pg_proc ref_p
+            on d.refclassid = 'pg_proc'::regclass and ref_p.oid = d.refobjid
+        left join pg_namespace ref_p_ns
+            on ref_p_ns.oid = ref_p.pronamespace
+    where
+        d.classid in ('pg_rewrite'::regclass, 'pg_proc'::regclass, 'pg_trigger'::regclass, 'pg_policy'::regclass)
+        and d.refclassid in ('pg_class'::regclass, 'pg_proc'::regclass)
+        and d.deptype in ('n', 'a')
+        and coalesce(rw_ns.nspname, p_ns.nspname, tg_ns.nspname, pol_ns.nspname) = any(:schemas)
+    """
+)
+
+
 @contextmanager
 def recreate_dropped(connection) -> Generator[Session, None, None]:
     """Recreate any dropped all ReplaceableEntities that were dropped within block
@@ -0,0 +1,117 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+"""A manifest of the entities found up to date by the previous autogenerate
+
+Kept next to the alembic versions directory, it maps each entity's identity to
+
+* its cache key, covering the entity's SQL, the SQL of the local entities it references and the database fingerprint
+* the identity postgres renders it with, and a hash of its live definition
+
+On the next autogenerate, an entity whose key and live definition both match its entry is
+known to be up to date without being simulated. Anything else, including drift made
+directly in the database, is simulated as usual. Changes the database fingerprint does not
+cover, such as to operators or casts, are not detected: delete the manifest after making them.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from alembic_utils_extended.definition_cache import (
+    _sha256,
+    _write_json_atomically,
+)
+from alembic_utils_extended.statement import normalize_whitespace
+
+if TYPE_CHECKING:
+    from alembic.autogenerate.api import AutogenContext
+
+    from alembic_utils_extended.catalog import CatalogSnapshot
+    from alembic_utils_extended.replaceable_entity import ReplaceableEntity
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_FILE_NAME = ".alembic_utils_manifest.json"
+
+
+class EntityManifest:
+    """A JSON file recording the entities that needed no migration op
+
+    **Parameters:**
+
+    * **path** - *str | Path*: Location of the manifest file. Created on first save
+    """
+
+    # Bump when the layout of entries changes. Files with another version are ignored
+    format_version = 1
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict[str, str]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+
+        try:
+            contents = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable entity manifest at %s", self.path)
+            return
+
+        if not isinstance(contents, dict) or contents.get("version") != self.format_version:
+            logger.warning("Ignoring entity manifest at %s written by another version", self.path)
+            return
+
+        self._entries = contents.get("entries", {})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find_up_to_date(self, identity: str, key: str, catalog: "CatalogSnapshot") -> "ReplaceableEntity | None":
+        """The live entity in *catalog* that the local entity *identity*, with cache *key*, was found
+        up to date with by the previous autogenerate, if neither has changed since
+        """
+        entry = self._entries.get(identity)
+        if entry is None or entry["key"] != key:
+            return None
+
+        live = catalog.get(entry["live_identity"])
+        if live is None or live_hash(live) != entry["live"]:
+            return None
+        return live
+
+    def replace(self, entries: dict[str, tuple[str, "ReplaceableEntity"]]) -> None:
+        """Replace every entry with *entries*, mapping local identity to cache key and live entity"""
+        self._entries = {
+            identity: {"key": key, "live_identity": live.identity, "live": live_hash(live)} for identity, (key, live) in entries.items()
+        }
+
+    def save(self) -> None:
+        """Write the manifest to disk"""
+        _write_json_atomically(self.path, {"version": self.format_version, "entries": self._entries})
+
+
+def live_hash(entity: "ReplaceableEntity") -> str:
+    """A hash of *entity* as reflected from the database"""
+    return _sha256([entity.__class__.__name__, entity.identity, normalize_whitespace(entity.definition)])
+
+
+def open_entity_manifest(autogen_context: "AutogenContext") -> EntityManifest | None:
+    """The manifest configured by the `entity_incremental_manifest` option, if any
+
+    `True` stores the manifest in the alembic versions directory, a path stores it there
+    """
+    option: Any = autogen_context.opts.get("entity_incremental_manifest")
+    if not option:
+        return None
+
+    if option is True:
+        script = autogen_context.migration_context.script
+        if script is None:
+            logger.warning("entity_incremental_manifest is enabled but the alembic script directory is unknown")
+            return None
+        return EntityManifest(Path(script.versions) / DEFAULT_MANIFEST_FILE_NAME)
+
+    return EntityManifest(option)
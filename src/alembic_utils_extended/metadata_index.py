@@ -0,0 +1,93 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+"""A one-time index of the target metadata, shared by the comparators of one autogenerate run
+
+`compare_indexes` and `compare_check_constraints` both need the tables of each schema, the
+columns of each table and the check constraints declared on them. Scanning `metadata.tables`
+for each schema, table or constraint is quadratic on large schemas, so the scan is done once.
+"""
+from __future__ import annotations
+
+import weakref
+from typing import TYPE_CHECKING
+
+from sqlalchemy import CheckConstraint, Enum, text
+
+if TYPE_CHECKING:
+    from alembic.autogenerate.api import AutogenContext
+    from sqlalchemy import MetaData, Table
+
+
+class MetadataIndex:
+    """The tables, columns and check constraint names of *metadata*, by table
+
+    Tables without a schema are resolved to *default_schema*, the connection's
+    ``current_schema()`` during autogenerate.
+    """
+
+    def __init__(self, metadata: "MetaData", default_schema: str = "public"):
+        self.default_schema = default_schema
+        self.tables_by_schema: dict[str | None, list[Table]] = {}
+        # A resolved (schema, table) may have been declared both without a schema and
+        # under the default schema
+        self.tables_by_resolved_name: dict[tuple[str, str], list[Table]] = {}
+        self.column_names: dict[str, frozenset[str]] = {}
+        self.enum_constraint_names: dict[str, frozenset[str]] = {}
+        self.manual_constraint_names: dict[str, frozenset[str]] = {}
+
+        all_column_names: set[str] = set()
+        for table in metadata.tables.values():
+            self.tables_by_schema.setdefault(table.schema, []).append(table)
+            self.tables_by_resolved_name.setdefault((table.schema or default_schema, table.name), []).append(table)
+
+            column_names = frozenset(column.name for column in table.columns)
+            self.column_names[table.key] = column_names
+            all_column_names |= column_names
+
+            self.enum_constraint_names[table.key] = frozenset(_get_enum_constraint_names(table))
+            self.manual_constraint_names[table.key] = frozenset(_get_manual_check_constraint_names(table))
+
+        self.all_column_names = frozenset(all_column_names)
+
+    @property
+    def schemas(self) -> list[str | None]:
+        """Every schema with a table, in a stable order"""
+        return sorted(self.tables_by_schema, key=lambda x: x or "")
+
+
+def _get_enum_constraint_names(table) -> set[str]:
+    constraint_names = set()
+    for column in table.columns:
+        if isinstance(column.type, Enum) and not getattr(column.type, "native_enum", True):
+            constraint_names.add(f"{table.name}_{column.name}_check")
+    return constraint_names
+
+
+def _get_manual_check_constraint_names(table) -> set[str]:
+    constraint_names = set()
+    for constraint in table.constraints:
+        if isinstance(constraint, CheckConstraint) and constraint.name is not None:
+            constraint_names.add(constraint.name)
+    return constraint_names
+
+
+# One index per autogenerate run, shared by every comparator
+_indexes: weakref.WeakKeyDictionary[AutogenContext, MetadataIndex] = weakref.WeakKeyDictionary()
+
+
+def get_metadata_index(metadata: "MetaData", autogen_context: "AutogenContext | None" = None) -> MetadataIndex:
+    """The index of *metadata*, built once per autogenerate run when *autogen_context* is given"""
+    if autogen_context is None:
+        return MetadataIndex(metadata)
+
+    index = _indexes.get(autogen_context)
+    if index is None:
+        index = MetadataIndex(metadata, default_schema=_current_schema(autogen_context))
+        _indexes[autogen_context] = index
+    return index
+
+
+def _current_schema(autogen_context: "AutogenContext") -> str:
+    """The schema unqualified tables resolve to on the connection of *autogen_context*"""
+    if autogen_context.connection is None:
+        return "public"
+    return autogen_context.connection.execute(text("select current_schema()")).scalar() or "public"
@@ -1,13 +1,29 @@
 from __future__ import annotations
 
 import logging
+import re
+from typing import Any
 
 from alembic.autogenerate import comparators, renderers
 from alembic.autogenerate.api import AutogenContext
-from alembic.operations import ops
-from sqlalchemy import CheckConstraint, Enum
+from alembic.operations import MigrateOperation, Operations, ops
+from sqlalchemy import CheckConstraint, text
 from sqlalchemy.engine.reflection import Inspector
-from sqlalchemy.exc import NoSuchTableError
+
+from alembic_utils_extended.canonical import (
+    CANONICAL_TEMP_TABLE,
+    get_canonical_definitions,
+)
+from alembic_utils_extended.metadata_index import get_metadata_index
+from alembic_utils_extended.profiling import get_profiler
+
+try:
+    from sqlalchemy.util import strip_outer_parens as _strip_outer_parens
+except ImportError:  # pragma: no cover - SQLAlchemy < 2.0 reflects the parentheses as is
+
+    def _strip_outer_parens(sqltext: str) -> str:
+        return sqltext
+
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +48,88 @@ def _render_create_check_constraint(
 renderers._registry[(ops.CreateCheckConstraintOp, "default")] = _render_create_check_constraint
 
 
+@Operations.register_operation("validate_check_constraint")
+class ValidateCheckConstraintOp(MigrateOperation):
+    """``ALTER TABLE ... VALIDATE CONSTRAINT``, the second phase of a check
+    constraint added ``NOT VALID`` by :func:`compare_check_constraints` when
+    ``compare_check_constraints_not_valid`` is set.
+
+    Validation scans the table under a SHARE UPDATE EXCLUSIVE lock, which
+    doesn't block reads or writes. It runs in an autocommit block so that it
+    doesn't inherit the ACCESS EXCLUSIVE lock taken by ``ADD CONSTRAINT`` in
+    the same migration: the migration's preceding work is committed first.
+    """
+
+    def __init__(self, constraint_name: str, table_name: str, schema: str | None = None):
+        self.constraint_name = constraint_name
+        self.table_name = table_name
+        self.schema = schema
+
+    @classmethod
+    def validate_check_constraint(cls, operations, constraint_name: str, table_name: str, schema: str | None = None):
+        """Issue ``ALTER TABLE ... VALIDATE CONSTRAINT`` from a migration script"""
+        return operations.invoke(cls(constraint_name, table_name, schema=schema))
+
+    def reverse(self):
+        # PostgreSQL can't mark a constraint NOT VALID again, and a validated
+        # constraint is what the downgraded schema declares anyway
+        return _ValidatedCheckConstraintOp(self.constraint_name, self.table_name, schema=self.schema)
+
+    def to_diff_tuple(self) -> tuple[Any, ...]:
+        return ("validate_check_constraint", self.schema, self.table_name, self.constraint_name)
+
+
+class _ValidatedCheckConstraintOp(ValidateCheckConstraintOp):
+    """Downgrade of :class:`ValidateCheckConstraintOp`: nothing to do, and nothing is rendered"""
+
+    def reverse(self):
+        return ValidateCheckConstraintOp(self.constraint_name, self.table_name, schema=self.schema)
+
+
+@Operations.implementation_for(ValidateCheckConstraintOp)
+def validate_check_constraint(operations, operation: ValidateCheckConstraintOp) -> None:
+    preparer = operations.get_context().dialect.identifier_preparer
+    table = preparer.quote(operation.table_name)
+    if operation.schema is not None:
+        table = f"{preparer.quote_schema(operation.schema)}.{table}"
+
+    with operations.get_context().autocommit_block():
+        operations.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {preparer.quote(operation.constraint_name)}")
+
+
+@renderers.dispatch_for(ValidateCheckConstraintOp)
+def _render_validate_check_constraint(autogen_context: AutogenContext, op: ValidateCheckConstraintOp) -> str:
+    args = [repr(op.constraint_name), repr(op.table_name)]
+    if op.schema:
+        args.append(f"schema={op.schema!r}")
+    return f"op.validate_check_constraint({', '.join(args)})"
+
+
+@renderers.dispatch_for(_ValidatedCheckConstraintOp)
+def _render_validated_check_constraint(autogen_context: AutogenContext, op: _ValidatedCheckConstraintOp) -> list[str]:
+    # No lines: a downgrade made of comments only wouldn't compile, Alembic writes ``pass`` instead
+    return []
+
+
 @comparators.dispatch_for("schema")
 def compare_check_constraints(
     autogen_context: AutogenContext,
     upgrade_ops: ops.UpgradeOps,
     _schemas: list[str | None],
 ) -> None:
+    """Autogen check constraint diff on identity ``(table_name, name)``
+
+    With ``compare_check_constraint_content=True``, constraints present on both
+    sides are also compared by their canonical ``pg_get_constraintdef`` (see
+    :func:`_get_changed_check_constraint_keys`) and a drop + create pair is
+    emitted when they differ.
+
+    With ``compare_check_constraints_not_valid``, created constraints are added
+    ``NOT VALID`` and validated by a separate :class:`ValidateCheckConstraintOp`:
+    in the same migration with ``True``, or with ``"deferred"`` by the next
+    autogenerate, which validates every model constraint found ``NOT VALID``
+    in the database.
+    """
     if not autogen_context.opts.get("compare_check_constraints"):
         return
 
@@ -47,64 +139,171 @@ def compare_check_constraints(
     if target_metadata is None:
         return
 
-    observed_schemas: set[str | None] = {table.schema for table in target_metadata.tables.values()}
+    # Constraints are read from ``pg_constraint`` rather than ``Inspector.get_check_constraints``,
+    # which used to raise NotImplementedError on dialects lacking support
+    if autogen_context.dialect is not None and autogen_context.dialect.name != "postgresql":
+        logger.warning("Check constraint autogenerate is only available on PostgreSQL, not %s.", autogen_context.dialect.name)
+        return
 
-    for schema_to_use in observed_schemas:
+    not_valid = autogen_context.opts.get("compare_check_constraints_not_valid")
+    if not_valid not in (None, False, True, "deferred"):
+        raise ValueError(f"compare_check_constraints_not_valid must be True or 'deferred', got {not_valid!r}")
+    create_kw = {"postgresql_not_valid": True} if not_valid else {}
 
-        model_constraints = _get_model_check_constraints(target_metadata, schema_to_use)
-        db_constraints = _get_database_check_constraints(inspector, target_metadata, schema_to_use)
+    with get_profiler(autogen_context).phase("compare_check_constraints"):
+        db_constraints_by_schema = _get_database_check_constraints_by_schema(inspector, target_metadata, autogen_context)
 
-        model_constraint_names = {(c["table_name"], c["name"]) for c in model_constraints}
-        db_constraint_names = {(c["table_name"], c["name"]) for c in db_constraints}
+        for schema_to_use in get_metadata_index(target_metadata, autogen_context).schemas:
 
-        constraints_to_create = model_constraint_names - db_constraint_names
-        constraints_to_drop = db_constraint_names - model_constraint_names
+            model_constraints = {
+                (c["table_name"], c["name"]): c for c in _get_model_check_constraints(target_metadata, schema_to_use, autogen_context)
+            }
+            db_constraints = {(c["table_name"], c["name"]): c for c in db_constraints_by_schema.get(schema_to_use, [])}
 
-        for table_name, constraint_name in constraints_to_create:
-            constraint_info = next(c for c in model_constraints if c["table_name"] == table_name and c["name"] == constraint_name)
-            logger.info(
-                "Detected CreateCheckConstraintOp for %s.%s",
-                table_name,
-                constraint_name,
-            )
-            create_op = ops.CreateCheckConstraintOp(
-                constraint_name=constraint_name,
-                table_name=table_name,
-                condition=constraint_info["sqltext"],
-                schema=schema_to_use,
-            )
-            upgrade_ops.ops.append(create_op)
+            constraints_to_create = model_constraints.keys() - db_constraints.keys()
+            constraints_to_drop = db_constraints.keys() - model_constraints.keys()
+
+            if autogen_context.opts.get("compare_check_constraint_content"):
+                changed_keys = _get_changed_check_constraint_keys(
+                    autogen_context,
+                    schema_to_use,
+                    [
+                        (key, model_constraints[key], db_constraints[key])
+                        for key in sorted(model_constraints.keys() & db_constraints.keys())
+                    ],
+                )
+                constraints_to_create |= changed_keys
+                constraints_to_drop |= changed_keys
+
+            # Drops come first: a changed constraint is dropped before it is added again under its
+            # name, whether or not the ops are reordered afterwards (see ``autogen_ordering``)
+            for table_name, constraint_name in sorted(constraints_to_drop):
+                constraint_info = db_constraints[(table_name, constraint_name)]
+                logger.info(
+                    "Detected DropConstraintOp for %s.%s",
+                    table_name,
+                    constraint_name,
+                )
+                create_op_for_reverse = ops.CreateCheckConstraintOp(
+                    constraint_name=constraint_name,
+                    table_name=table_name,
+                    condition=constraint_info["sqltext"],
+                    schema=schema_to_use,
+                )
+                drop_op = ops.DropConstraintOp(
+                    constraint_name=constraint_name,
+                    table_name=table_name,
+                    type_="check",
+                    schema=schema_to_use,
+                    _reverse=create_op_for_reverse,
+                )
+                upgrade_ops.ops.append(drop_op)
+
+            for table_name, constraint_name in sorted(constraints_to_create):
+                constraint_info = model_constraints[(table_name, constraint_name)]
+                logger.info(
+                    "Detected CreateCheckConstraintOp for %s.%s",
+                    table_name,
+                    constraint_name,
+                )
+                create_op = ops.CreateCheckConstraintOp(
+                    constraint_name=constraint_name,
+                    table_name=table_name,
+                    condition=constraint_info["sqltext"],
+                    schema=schema_to_use,
+                    **create_kw,
+                )
+                upgrade_ops.ops.append(create_op)
+
+            if not_valid is True:
+                to_validate = set(constraints_to_create)
+            elif not_valid == "deferred":
+                # Added NOT VALID by a previous migration
+                to_validate = {
+                    key for key, db_info in db_constraints.items() if key in model_constraints and not db_info["validated"]
+                } - constraints_to_create
+            else:
+                to_validate = set()
+
+            for table_name, constraint_name in sorted(to_validate):
+                logger.info("Detected ValidateCheckConstraintOp for %s.%s", table_name, constraint_name)
+                upgrade_ops.ops.append(ValidateCheckConstraintOp(constraint_name, table_name, schema=schema_to_use))
+
+
+def _canonical_constraintdef(constraint_definition: str) -> str:
+    """``pg_get_constraintdef`` output without ``NOT VALID``, which doesn't affect the condition"""
+    return constraint_definition.removesuffix(" NOT VALID")
 
-        for table_name, constraint_name in constraints_to_drop:
-            constraint_info = next(c for c in db_constraints if c["table_name"] == table_name and c["name"] == constraint_name)
+
+def _get_changed_check_constraint_keys(
+    autogen_context: AutogenContext,
+    schema: str | None,
+    pairs: list[tuple[tuple[str, str], dict[str, str], dict[str, Any]]],
+) -> set[tuple[str, str]]:
+    """Keys of the ``(key, model_constraint, db_constraint)`` pairs whose condition differs.
+
+    The model side is added ``NOT VALID`` and canonicalized by PostgreSQL with
+    ``pg_get_constraintdef`` (see :mod:`alembic_utils_extended.canonical`).
+    Model constraints PostgreSQL rejects are reported as unchanged with a
+    warning, the identity-only behavior.
+    """
+    preparer = autogen_context.connection.dialect.identifier_preparer
+    temp_table = preparer.quote(CANONICAL_TEMP_TABLE)
+
+    statements_by_table: dict[str, dict[str, str]] = {}
+    for (table_name, constraint_name), model_info, _ in pairs:
+        statements_by_table.setdefault(table_name, {})[
+            constraint_name
+        ] = f"ALTER TABLE {temp_table} ADD CONSTRAINT {preparer.quote(constraint_name)} CHECK ({model_info['sqltext']}) NOT VALID"
+    canonical = get_canonical_definitions(
+        autogen_context.connection,
+        schema or get_metadata_index(autogen_context.metadata, autogen_context).default_schema,
+        statements_by_table,
+        _read_temp_constraintdefs,
+    )
+
+    changed: set[tuple[str, str]] = set()
+    for (table_name, constraint_name), model_info, db_info in pairs:
+        model_definition = canonical[table_name][constraint_name]
+        if model_definition is None:
+            continue
+        db_definition = _canonical_constraintdef(db_info["definition"])
+        if model_definition != db_definition:
             logger.info(
-                "Detected DropConstraintOp for %s.%s",
+                "Detected content change for check constraint %s.%s: %s -> %s",
                 table_name,
                 constraint_name,
+                db_definition,
+                model_definition,
             )
-            create_op_for_reverse = ops.CreateCheckConstraintOp(
-                constraint_name=constraint_name,
-                table_name=table_name,
-                condition=constraint_info["sqltext"],
-                schema=schema_to_use,
-            )
-            drop_op = ops.DropConstraintOp(
-                constraint_name=constraint_name,
-                table_name=table_name,
-                type_="check",
-                schema=schema_to_use,
-                _reverse=create_op_for_reverse,
-            )
-            upgrade_ops.ops.append(drop_op)
+            changed.add((table_name, constraint_name))
 
+    return changed
 
-def _get_model_check_constraints(metadata, schema: str | None) -> list[dict[str, str]]:
-    constraints = []
 
-    for table in metadata.tables.values():
-        if table.schema != schema:
-            continue
+def _read_temp_constraintdefs(connection) -> dict[str, str]:
+    """Canonical ``pg_get_constraintdef`` of the check constraints of the canonicalization temp table, by name"""
+    rows = connection.execute(_TEMP_CONSTRAINTDEF_QUERY, {"table_name": CANONICAL_TEMP_TABLE}).fetchall()
+    return {row.constraint_name: _canonical_constraintdef(row.constraint_definition) for row in rows}
+
+
+_TEMP_CONSTRAINTDEF_QUERY = text(
+    """
+    SELECT
+        con.conname AS constraint_name,
+        pg_get_constraintdef(con.oid, true) AS constraint_definition
+    FROM pg_constraint con
+    WHERE con.conrelid = CAST(CAST('pg_temp.' || :table_name AS text) AS regclass)
+      AND con.contype = 'c'
+    """
+)
 
+
+def _get_model_check_constraints(metadata, schema: str | None, autogen_context: AutogenContext | None = None) -> list[dict[str, str]]:
+    metadata_index = get_metadata_index(metadata, autogen_context)
+    constraints = []
+
+    for table in metadata_index.tables_by_schema.get(schema, []):
         for constraint in table.constraints:
             if isinstance(constraint, CheckConstraint):
                 if constraint.name is None:
@@ -114,8 +313,8 @@ def _get_model_check_constraints(metadata, schema: str | None) -> list[dict[str,
                         f"Constraint: {constraint.sqltext}"
                     )
 
-                if not _constraint_columns_exist_on_table(constraint, table):
-                    if not _constraint_columns_exist_in_metadata(constraint, metadata):
+                if not _constraint_columns_exist(constraint, metadata_index.column_names[table.key]):
+                    if not _constraint_columns_exist(constraint, metadata_index.all_column_names):
                         raise ValueError(
                             f"Check constraint '{constraint.name}' on table '{table.name}' "
                             f"references columns that do not exist in any table. "
@@ -135,82 +334,78 @@ def _get_model_check_constraints(metadata, schema: str | None) -> list[dict[str,
     return constraints
 
 
-def _get_database_check_constraints(
+def _get_database_check_constraints_by_schema(
     inspector: Inspector,
     metadata,
-    schema: str | None,
-) -> list[dict[str, str]]:
-    constraints = []
-
-    for table in metadata.tables.values():
-        if table.schema != schema:
-            continue
-
-        enum_constraint_names = _get_enum_constraint_names(table)
-        manual_constraint_names = _get_manual_check_constraint_names(table)
-
-        try:
-            db_constraints = inspector.get_check_constraints(table.name, schema=schema)
-        except NotImplementedError:
-            logger.warning("Database dialect does not support get_check_constraints. " "Check constraint autogenerate is not available.")
-            return []
-        # This may occur when the table is being generated in the current migration.
-        except NoSuchTableError:
-            continue
-
-        for c in db_constraints:
-            if c.get("name") is None:
-                continue
-
-            if c["name"] in enum_constraint_names and c["name"] not in manual_constraint_names:
+    autogen_context: AutogenContext | None = None,
+) -> dict[str | None, list[dict[str, Any]]]:
+    """Read the named CHECK constraints of every table of ``metadata`` from
+    ``pg_constraint``, grouped by table schema, in a single query.
+
+    Tables missing from the database (e.g. created in the current migration)
+    have no constraints. Constraints generated for non-native ``Enum`` columns
+    are skipped unless also declared explicitly on the table.
+    """
+    # Map each resolved (schema, table) back to the metadata table(s) it was declared as
+    metadata_index = get_metadata_index(metadata, autogen_context)
+    declared_tables = metadata_index.tables_by_resolved_name
+
+    if not declared_tables:
+        return {}
+
+    schema_names = [schema for schema, _ in declared_tables]
+    table_names = [table_name for _, table_name in declared_tables]
+
+    rows = inspector.bind.execute(_DATABASE_CHECK_CONSTRAINTS_QUERY, {"schema_names": schema_names, "table_names": table_names}).fetchall()
+
+    constraints_by_schema: dict[str | None, list[dict[str, Any]]] = {}
+    for row in rows:
+        for table in declared_tables[(row.schema_name, row.table_name)]:
+            if row.constraint_name in metadata_index.enum_constraint_names[table.key] - metadata_index.manual_constraint_names[table.key]:
                 continue
 
-            constraints.append(
+            constraints_by_schema.setdefault(table.schema, []).append(
                 {
                     "table_name": table.name,
-                    "name": c["name"],
-                    "sqltext": c.get("sqltext", ""),
+                    "name": row.constraint_name,
+                    "sqltext": _check_constraint_sqltext(row.constraint_definition),
+                    "definition": row.constraint_definition,
+                    "validated": row.is_validated,
                 }
             )
-
-    return constraints
-
-
-def _get_enum_constraint_names(table) -> set[str]:
-    constraint_names = set()
-    for column in table.columns:
-        if isinstance(column.type, Enum) and not getattr(column.type, "native_enum", True):
-            constraint_names.add(f"{table.name}_{column.name}_check")
-    return constraint_names
-
-
-def _get_manual_check_constraint_names(table) -> set[str]:
-    constraint_names = set()
-    for constraint in table.constraints:
-        if isinstance(constraint, CheckConstraint) and constraint.name is not None:
-            constraint_names.add(constraint.name)
-    return constraint_names
-
-
-def _constraint_columns_exist_on_table(constraint: CheckConstraint, table) -> bool:
-    table_column_names = {col.name for col in table.columns}
-    constraint_columns = getattr(constraint, "columns", None)
-    if constraint_columns is not None and len(constraint_columns) > 0:
-        for col in constraint_columns:
-            if col.name not in table_column_names:
-                return False
-    return True
-
-
-def _constraint_columns_exist_in_metadata(constraint: CheckConstraint, metadata) -> bool:
-    all_column_names: set[str] = set()
-    for table in metadata.tables.values():
-        for col in table.columns:
-            all_column_names.add(col.name)
-
+    return constraints_by_schema
+
+
+def _check_constraint_sqltext(constraint_definition: str) -> str:
+    """The condition of a ``pg_get_constraintdef`` CHECK, as SQLAlchemy's inspector reflects it"""
+    match = re.match(r"^CHECK *\((.+)\)( NO INHERIT)?( NOT VALID)?$", constraint_definition, flags=re.DOTALL)
+    if match is None:
+        return constraint_definition
+    return _strip_outer_parens(match.group(1))
+
+
+_DATABASE_CHECK_CONSTRAINTS_QUERY = text(
+    """
+    SELECT
+        n.nspname AS schema_name,
+        t.relname AS table_name,
+        con.conname AS constraint_name,
+        pg_get_constraintdef(con.oid, true) AS constraint_definition,
+        con.convalidated AS is_validated
+    FROM unnest(CAST(:schema_names AS text[]), CAST(:table_names AS text[])) AS wanted(schema_name, table_name)
+    JOIN pg_namespace n ON n.nspname = wanted.schema_name
+    JOIN pg_class t ON t.relnamespace = n.oid AND t.relname = wanted.table_name
+    JOIN pg_constraint con ON con.conrelid = t.oid
+    WHERE con.contype = 'c'
+    ORDER BY t.relname, con.conname
+    """
+)
+
+
+def _constraint_columns_exist(constraint: CheckConstraint, column_names: frozenset[str] | set[str]) -> bool:
     constraint_columns = getattr(constraint, "columns", None)
     if constraint_columns is not None and len(constraint_columns) > 0:
         for col in constraint_columns:
-            if col.name not in all_column_names:
+            if col.name not in column_names:
                 return False
     return True
@@ -1,20 +1,32 @@
 from __future__ import annotations
 
+import functools
 import hashlib
 import logging
 import re
-from typing import TypedDict
+from typing import Any, TypedDict
 
 import sqlalchemy
-from alembic.autogenerate import comparators
+from alembic.autogenerate import comparators, renderers
 from alembic.autogenerate.api import AutogenContext
-from alembic.operations import ops
+from alembic.operations import Operations, ops
 from sqlalchemy import Column, text
 from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy.exc import DBAPIError, OperationalError
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.schema import CreateIndex, Index
 from sqlalchemy.sql import visitors
 from sqlalchemy.sql.elements import BindParameter, TextClause
+from sqlalchemy.sql.sqltypes import NULLTYPE
+from typing_extensions import NotRequired
+
+from alembic_utils_extended.canonical import (
+    CANONICAL_TEMP_TABLE,
+    get_canonical_definitions,
+)
+from alembic_utils_extended.capabilities import get_server_capabilities
+from alembic_utils_extended.metadata_index import get_metadata_index
+from alembic_utils_extended.profiling import get_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +76,7 @@ if _SA_MAJOR < 2:
 _PG_MAX_IDENTIFIER_LENGTH = 63
 
 
+@functools.lru_cache(maxsize=10_000)
 def _truncate_identifier(name: str) -> str:
     if len(name) <= _PG_MAX_IDENTIFIER_LENGTH:
         return name
@@ -76,6 +89,8 @@ class _IndexKw(TypedDict, total=False):
     postgresql_where: str
     postgresql_include: list[str]
     postgresql_nulls_not_distinct: bool
+    postgresql_with: dict[str, str]
+    postgresql_tablespace: str
 
 
 class _IndexInfo(TypedDict):
@@ -85,6 +100,14 @@ class _IndexInfo(TypedDict):
     expressions: list[str]
     unique: bool
     kw: _IndexKw
+    # ``pg_get_indexdef`` and ``pg_index.indisvalid`` of database indexes
+    definition: NotRequired[str]
+    is_valid: NotRequired[bool]
+
+
+def _index_key(idx: _IndexInfo) -> tuple[str, str]:
+    """Identity of an index on either side of the diff, see :func:`_truncate_identifier`"""
+    return (idx["table_name"], _truncate_identifier(idx["name"]))
 
 
 @comparators.dispatch_for("schema")
@@ -112,9 +135,18 @@ def compare_indexes(
     indexes from the fork's scope (e.g., sqlalchemy-continuum's ``_version``
     tables whose indexes are managed by continuum, not the app schema).
 
-    Content changes are not detected. To evolve an index's columns,
-    WHERE clause, INCLUDE list, opclass, or method, rename it — that
-    produces a drop + create pair the comparator will emit.
+    Content changes are not detected by default. To evolve an index's
+    columns, WHERE clause, INCLUDE list, opclass, or method, rename it —
+    that produces a drop + create pair the comparator will emit. With
+    ``compare_index_content=True``, indexes present on both sides are
+    also compared by their canonical ``pg_get_indexdef`` (see
+    :func:`_get_changed_index_keys`) and a drop + create pair is emitted
+    when they differ.
+
+    With ``compare_indexes_concurrently=True``, the ops are emitted as
+    ``op.create_index_concurrently`` / ``op.drop_index_concurrently`` (see
+    :class:`CreateIndexConcurrentlyOp`). An index left invalid by an
+    interrupted concurrent build is always rebuilt with a drop + create pair.
     """
     if not autogen_context.opts.get("compare_indexes"):
         return
@@ -127,104 +159,349 @@ def compare_indexes(
 
     include_index = autogen_context.opts.get("compare_indexes_include") or (lambda *args, **kw: True)
 
-    observed_schemas: set[str | None] = {table.schema for table in target_metadata.tables.values()}
-
-    for schema_to_use in observed_schemas:
-
-        model_indexes = [
-            idx
-            for idx in _get_model_indexes(target_metadata, schema_to_use, autogen_context)
-            if include_index(idx["table_name"], idx["name"], False)
-        ]
-        db_indexes = [
-            idx
-            for idx in _get_database_indexes(inspector, target_metadata, schema_to_use)
-            if include_index(idx["table_name"], idx["name"], True)
-        ]
-
-        # Match on the PG-truncated name (identifiers over ``NAMEDATALEN - 1 =
-        # 63`` are silently truncated at CREATE time). Model-side names come
-        # from Python and may exceed the limit; DB-side names are already
-        # truncated by PG. Normalize both to the same key so identity match
-        # actually matches.
-        def _key(idx):
-            return (idx["table_name"], _truncate_identifier(idx["name"]))
-
-        model_keys = {_key(idx) for idx in model_indexes}
-        db_keys = {_key(idx) for idx in db_indexes}
-
-        create_keys = model_keys - db_keys
-        drop_keys = db_keys - model_keys
-
-        # Indexes present in both are assumed unchanged (identity-only diff).
-
-        for key in create_keys:
-            index_info = next(idx for idx in model_indexes if _key(idx) == key)
-            table_name = index_info["table_name"]
-            index_name = index_info["name"]
-            logger.info(
-                "Detected CreateIndexOp for %s.%s",
-                table_name,
-                index_name,
-            )
-            create_op = ops.CreateIndexOp(
-                index_name=index_name,
-                table_name=table_name,
-                columns=index_info["columns"],
-                schema=schema_to_use,
-                unique=index_info.get("unique", False),
-                **index_info.get("kw", {}),
-            )
-            upgrade_ops.ops.append(create_op)
+    if autogen_context.opts.get("compare_indexes_concurrently"):
+        create_op_class, drop_op_class = CreateIndexConcurrentlyOp, DropIndexConcurrentlyOp
+    else:
+        create_op_class, drop_op_class = ops.CreateIndexOp, ops.DropIndexOp
+
+    with get_profiler(autogen_context).phase("compare_indexes"):
+        # Both sides are collected for every observed schema up front: one pass over the
+        # metadata and one catalog query, however many schemas and tables there are
+        model_indexes_by_schema = _get_model_indexes_by_schema(target_metadata, autogen_context)
+        db_indexes_by_schema = _get_database_indexes_by_schema(inspector, target_metadata, autogen_context)
+
+        for schema_to_use in get_metadata_index(target_metadata, autogen_context).schemas:
+
+            # Match on the PG-truncated name (identifiers over ``NAMEDATALEN - 1 =
+            # 63`` are silently truncated at CREATE time). Model-side names come
+            # from Python and may exceed the limit; DB-side names are already
+            # truncated by PG. Normalize both to the same key so identity match
+            # actually matches.
+            model_indexes = {
+                _index_key(idx): idx
+                for idx in model_indexes_by_schema.get(schema_to_use, [])
+                if include_index(idx["table_name"], idx["name"], False)
+            }
+            db_indexes = {
+                _index_key(idx): idx
+                for idx in db_indexes_by_schema.get(schema_to_use, [])
+                if include_index(idx["table_name"], idx["name"], True)
+            }
+
+            create_keys = model_indexes.keys() - db_indexes.keys()
+            drop_keys = db_indexes.keys() - model_indexes.keys()
+
+            # The planner ignores an invalid index, and CREATE INDEX would fail on its name: drop it, then rebuild it
+            invalid_keys = {key for key, idx in db_indexes.items() if not idx.get("is_valid", True)} & model_indexes.keys()
+            create_keys |= invalid_keys
+            drop_keys |= invalid_keys
+
+            # Indexes present in both are assumed unchanged (identity-only diff)
+            # unless their content is compared too.
+            if autogen_context.opts.get("compare_index_content"):
+                changed_keys = _get_changed_index_keys(
+                    autogen_context,
+                    schema_to_use,
+                    [(key, model_indexes[key], db_indexes[key]) for key in sorted(model_indexes.keys() & db_indexes.keys())],
+                )
+                create_keys |= changed_keys
+                drop_keys |= changed_keys
+
+            # Drops come first: a replaced index is dropped before it is created again under its
+            # name, whether or not the ops are reordered afterwards (see ``autogen_ordering``)
+            for key in sorted(drop_keys):
+                index_info = db_indexes[key]
+                table_name = index_info["table_name"]
+                index_name = index_info["name"]
+                logger.info(
+                    "Detected DropIndexOp for %s.%s",
+                    table_name,
+                    index_name,
+                )
+                create_op_for_reverse = ops.CreateIndexOp(
+                    index_name=index_name,
+                    table_name=table_name,
+                    columns=index_info["columns"],
+                    schema=schema_to_use,
+                    unique=index_info.get("unique", False),
+                    **index_info.get("kw", {}),
+                )
+                # ``DropIndexOp.to_index()`` (used to render the downgrade's reverse
+                # CreateIndex) takes columns from ``_reverse`` but reads ``unique``
+                # and the dialect kwargs from the DropIndexOp's OWN ``kw`` — so they
+                # must be passed here, not only on ``create_op_for_reverse``, or the
+                # downgrade recreates the index without unique / using / where /
+                # include / nulls_not_distinct.
+                drop_op = drop_op_class(
+                    index_name=index_name,
+                    table_name=table_name,
+                    schema=schema_to_use,
+                    _reverse=create_op_for_reverse,
+                    unique=index_info.get("unique", False),
+                    **index_info.get("kw", {}),
+                )
+                upgrade_ops.ops.append(drop_op)
+
+            for key in sorted(create_keys):
+                index_info = model_indexes[key]
+                table_name = index_info["table_name"]
+                index_name = index_info["name"]
+                logger.info(
+                    "Detected CreateIndexOp for %s.%s",
+                    table_name,
+                    index_name,
+                )
+                create_op = create_op_class(
+                    index_name=index_name,
+                    table_name=table_name,
+                    columns=index_info["columns"],
+                    schema=schema_to_use,
+                    unique=index_info.get("unique", False),
+                    **index_info.get("kw", {}),
+                )
+                upgrade_ops.ops.append(create_op)
+
+
+# ``CREATE INDEX CONCURRENTLY`` cannot run inside a transaction block, and a
+# failed or cancelled concurrent build leaves an INVALID index behind under the
+# target name: the planner never uses it, yet it blocks the next attempt with
+# "relation already exists". The concurrent ops below run in an autocommit block
+# and drop such leftovers before (re)building. Only builds failing on a lock
+# or a conflicting transaction are retried: a duplicate key, a missing column
+# or an unknown opclass fails the same way on every attempt, after a full scan.
+_CONCURRENT_INDEX_RETRIES = 2
+
+# lock_not_available (``lock_timeout``), deadlock_detected, serialization_failure
+_TRANSIENT_SQLSTATES = frozenset({"55P03", "40P01", "40001"})
+
+
+@Operations.register_operation("create_index_concurrently")
+class CreateIndexConcurrentlyOp(ops.CreateIndexOp):
+    """``CREATE INDEX CONCURRENTLY``, emitted by :func:`compare_indexes` when
+    ``compare_indexes_concurrently=True``.
+
+    Runs outside the migration's transaction (the preceding work of the
+    migration is committed first, see ``MigrationContext.autocommit_block``).
+    An invalid index left under the same name by an earlier failed build is
+    dropped first, and a build failing on a transient error (see
+    :func:`_is_transient_error`) is cleaned up and retried up to ``retries``
+    times before the error is raised. Any other error is raised right away.
+    """
+
+    def __init__(self, index_name, table_name, columns, *, retries: int = _CONCURRENT_INDEX_RETRIES, **kw):
+        super().__init__(index_name, table_name, columns, **kw)
+        self.retries = retries
+
+    def reverse(self):
+        return DropIndexConcurrentlyOp.from_index(self.to_index())
+
+    @classmethod
+    def create_index_concurrently(cls, operations, index_name, table_name, columns, **kw):
+        """Issue ``CREATE INDEX CONCURRENTLY`` from a migration script"""
+        return operations.invoke(cls(index_name, table_name, columns, **kw))
+
+
+@Operations.register_operation("drop_index_concurrently")
+class DropIndexConcurrentlyOp(ops.DropIndexOp):
+    """``DROP INDEX CONCURRENTLY``, the counterpart of :class:`CreateIndexConcurrentlyOp`"""
+
+    def reverse(self):
+        return CreateIndexConcurrentlyOp.from_index(self.to_index())
+
+    @classmethod
+    def drop_index_concurrently(cls, operations, index_name, table_name=None, **kw):
+        """Issue ``DROP INDEX CONCURRENTLY`` from a migration script"""
+        return operations.invoke(cls(index_name, table_name=table_name, **kw))
+
+
+@Operations.implementation_for(CreateIndexConcurrentlyOp)
+def create_index_concurrently(operations, operation: CreateIndexConcurrentlyOp) -> None:
+    migration_context = operations.get_context()
+    index = operation.to_index(migration_context)
+    index.dialect_kwargs["postgresql_concurrently"] = True
+
+    with migration_context.autocommit_block():
+        if migration_context.as_sql:
+            operations.impl.create_index(index)
+            return
+
+        for attempt in range(operation.retries + 1):
+            _drop_invalid_index(operations, operation.schema, index.name)
+            try:
+                operations.impl.create_index(index)
+            except DBAPIError as exc:
+                if attempt == operation.retries or not _is_transient_error(exc):
+                    _drop_invalid_index(operations, operation.schema, index.name)
+                    raise
+                logger.warning("CREATE INDEX CONCURRENTLY %s failed, retrying: %s", index.name, exc.orig)
+                continue
+            return
+
+
+def _is_transient_error(exc: DBAPIError) -> bool:
+    """Could the failed statement succeed if simply run again: a lock timeout, a
+    deadlock, a serialization failure or another operational error"""
+    if isinstance(exc, OperationalError):
+        return True
+    # Drivers don't all map these SQLSTATEs to ``OperationalError``
+    return (getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)) in _TRANSIENT_SQLSTATES
+
+
+@Operations.implementation_for(DropIndexConcurrentlyOp)
+def drop_index_concurrently(operations, operation: DropIndexConcurrentlyOp) -> None:
+    migration_context = operations.get_context()
+    index = operation.to_index(migration_context)
+    index.dialect_kwargs["postgresql_concurrently"] = True
+
+    with migration_context.autocommit_block():
+        operations.impl.drop_index(index, if_exists=operation.if_exists)
+
+
+def _drop_invalid_index(operations, schema: str | None, index_name: str) -> None:
+    """Drop ``index_name`` if it exists and is marked invalid in ``pg_index``"""
+    name = _truncate_identifier(index_name)
+    if not operations.get_bind().execute(_INVALID_INDEX_QUERY, {"schema_name": schema, "index_name": name}).scalar():
+        return
+
+    logger.warning("Dropping invalid index %s left by an earlier failed build", name)
+    preparer = operations.get_bind().dialect.identifier_preparer
+    qualified_name = preparer.quote(name) if schema is None else f"{preparer.quote_schema(schema)}.{preparer.quote(name)}"
+    operations.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {qualified_name}")
+
+
+_INVALID_INDEX_QUERY = text(
+    """
+    SELECT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = coalesce(:schema_name, current_schema())
+          AND c.relname = :index_name
+          AND NOT i.indisvalid
+    )
+    """
+)
+
+
+@renderers.dispatch_for(CreateIndexConcurrentlyOp)
+def _render_create_index_concurrently(autogen_context: AutogenContext, op: CreateIndexConcurrentlyOp) -> str:
+    # The stock ``op.create_index(...)`` rendering, under the concurrent op's name
+    return renderers.dispatch(ops.CreateIndexOp)(autogen_context, op).replace("create_index(", "create_index_concurrently(", 1)
+
+
+@renderers.dispatch_for(DropIndexConcurrentlyOp)
+def _render_drop_index_concurrently(autogen_context: AutogenContext, op: DropIndexConcurrentlyOp) -> str:
+    return renderers.dispatch(ops.DropIndexOp)(autogen_context, op).replace("drop_index(", "drop_index_concurrently(", 1)
+
+
+def _canonical_indexdef(indexdef: str, unique: bool) -> str:
+    """``pg_get_indexdef`` output without the index name and table, which
+    don't affect the index's content: ``[UNIQUE ]USING method (...) ...``."""
+    at = indexdef.find(" USING ")
+    body = indexdef[at + 1 :] if at != -1 else indexdef
+    return ("UNIQUE " if unique else "") + body
+
+
+def _get_changed_index_keys(
+    autogen_context: AutogenContext,
+    schema: str | None,
+    pairs: list[tuple[tuple[str, str], _IndexInfo, _IndexInfo]],
+) -> set[tuple[str, str]]:
+    """Keys of the ``(key, model_index, db_index)`` pairs whose content differs.
+
+    The model side is compiled to ``CREATE INDEX`` and canonicalized by
+    PostgreSQL with ``pg_get_indexdef`` (see :mod:`alembic_utils_extended.canonical`).
+    Building on an empty temp table takes no lock on the real table and
+    costs nothing regardless of its size. Model indexes PostgreSQL rejects
+    are reported as unchanged with a warning, the identity-only behavior.
+    """
+    statements_by_table: dict[str, dict[str, str]] = {}
+    for key, model_info, _ in pairs:
+        statements_by_table.setdefault(model_info["table_name"], {})[key[1]] = _compile_create_index(
+            autogen_context, model_info, CANONICAL_TEMP_TABLE, key[1]
+        )
+    canonical = get_canonical_definitions(
+        autogen_context.connection,
+        schema or get_metadata_index(autogen_context.metadata, autogen_context).default_schema,
+        statements_by_table,
+        _read_temp_indexdefs,
+    )
 
-        for key in drop_keys:
-            index_info = next(idx for idx in db_indexes if _key(idx) == key)
-            table_name = index_info["table_name"]
-            index_name = index_info["name"]
+    changed: set[tuple[str, str]] = set()
+    for key, model_info, db_info in pairs:
+        model_definition = canonical[model_info["table_name"]][key[1]]
+        if model_definition is None:
+            continue
+        db_definition = _canonical_indexdef(db_info["definition"], db_info["unique"])
+        if model_definition != db_definition:
             logger.info(
-                "Detected DropIndexOp for %s.%s",
-                table_name,
-                index_name,
-            )
-            create_op_for_reverse = ops.CreateIndexOp(
-                index_name=index_name,
-                table_name=table_name,
-                columns=index_info["columns"],
-                schema=schema_to_use,
-                unique=index_info.get("unique", False),
-                **index_info.get("kw", {}),
+                "Detected content change for index %s.%s: %s -> %s",
+                model_info["table_name"],
+                model_info["name"],
+                db_definition,
+                model_definition,
             )
-            # ``DropIndexOp.to_index()`` (used to render the downgrade's reverse
-            # CreateIndex) takes columns from ``_reverse`` but reads ``unique``
-            # and the dialect kwargs from the DropIndexOp's OWN ``kw`` — so they
-            # must be passed here, not only on ``create_op_for_reverse``, or the
-            # downgrade recreates the index without unique / using / where /
-            # include / nulls_not_distinct.
-            drop_op = ops.DropIndexOp(
-                index_name=index_name,
-                table_name=table_name,
-                schema=schema_to_use,
-                _reverse=create_op_for_reverse,
-                unique=index_info.get("unique", False),
-                **index_info.get("kw", {}),
-            )
-            upgrade_ops.ops.append(drop_op)
+            changed.add(key)
+
+    return changed
+
+
+def _compile_create_index(autogen_context: AutogenContext, index_info: _IndexInfo, table_name: str, index_name: str) -> str:
+    """``CREATE INDEX`` for *index_info*, renamed to *index_name* on *table_name*"""
+    index = ops.CreateIndexOp(
+        index_name=index_name,
+        table_name=table_name,
+        columns=index_info["columns"],
+        unique=index_info.get("unique", False),
+        **index_info.get("kw", {}),
+    ).to_index(autogen_context.migration_context)
+    # As in Alembic's ``PostgresqlImpl.create_index``: INCLUDE columns must exist on the stub table
+    for column_name in index_info.get("kw", {}).get("postgresql_include", []):
+        if column_name not in index.table.c:
+            index.table.append_column(Column(column_name, NULLTYPE))
+    return str(CreateIndex(index).compile(dialect=autogen_context.dialect))
+
+
+def _read_temp_indexdefs(connection) -> dict[str, str]:
+    """Canonical ``pg_get_indexdef`` of the indexes of the canonicalization temp table, by name"""
+    rows = connection.execute(_TEMP_INDEXDEF_QUERY, {"table_name": CANONICAL_TEMP_TABLE}).fetchall()
+    return {row.index_name: _canonical_indexdef(row.index_definition, row.is_unique) for row in rows}
+
+
+_TEMP_INDEXDEF_QUERY = text(
+    """
+    SELECT
+        c.relname AS index_name,
+        pg_get_indexdef(i.indexrelid) AS index_definition,
+        i.indisunique AS is_unique
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = CAST(CAST('pg_temp.' || :table_name AS text) AS regclass)
+    """
+)
 
 
 def _get_model_indexes(metadata, schema: str | None, autogen_context: AutogenContext | None = None) -> list[_IndexInfo]:
     """Extract every user-declared :class:`Index` from ``metadata`` for the
-    given schema.
+    given schema. See :func:`_get_model_indexes_by_schema`."""
+    return _get_model_indexes_by_schema(metadata, autogen_context).get(schema, [])
+
+
+def _get_model_indexes_by_schema(metadata, autogen_context: AutogenContext | None = None) -> dict[str | None, list[_IndexInfo]]:
+    """Extract every user-declared :class:`Index` from ``metadata``, grouped
+    by table schema, in a single pass over the tables.
 
     ``table.indexes`` on a SQLAlchemy :class:`Table` only contains indexes
     declared via ``Index(...)``; the implicit indexes backing PRIMARY KEY
     and UNIQUE constraints are managed separately by stock Alembic's
     constraint diff, so this iteration naturally excludes them.
     """
-    indexes: list[_IndexInfo] = []
+    metadata_index = get_metadata_index(metadata, autogen_context)
+    indexes_by_schema: dict[str | None, list[_IndexInfo]] = {}
 
     for table in metadata.tables.values():
-        if table.schema != schema:
-            continue
+        indexes = indexes_by_schema.setdefault(table.schema, [])
 
         for index in table.indexes:
             if index.name is None:
@@ -237,7 +514,7 @@ def _get_model_indexes(metadata, schema: str | None, autogen_context: AutogenCon
                     columns.append(expr.name)
                     expressions_list.append(expr.name)
                 else:
-                    _raise_if_string_arg_matches_column_name(expr, table, index.name)
+                    _raise_if_string_arg_matches_column_name(expr, table, index.name, metadata_index.column_names[table.key])
                     expr_str = _render_index_expression(expr, autogen_context)
                     columns.append(text(expr_str))
                     expressions_list.append(expr_str)
@@ -253,6 +530,11 @@ def _get_model_indexes(metadata, schema: str | None, autogen_context: AutogenCon
                     kw["postgresql_where"] = _render_index_expression(pg_opts["where"], autogen_context)
                 if pg_opts.get("include"):
                     kw["postgresql_include"] = list(pg_opts["include"])
+                # Storage parameters are part of ``pg_get_indexdef``, as ``WITH (fillfactor='70')``
+                if pg_opts.get("with"):
+                    kw["postgresql_with"] = {name: str(value) for name, value in pg_opts["with"].items()}
+                if pg_opts.get("tablespace"):
+                    kw["postgresql_tablespace"] = pg_opts["tablespace"]
                 if pg_opts.get("nulls_not_distinct"):
                     # PostgreSQL accepts NULLS NOT DISTINCT on any index, but it only
                     # affects uniqueness — on a non-unique index it is a silent no-op,
@@ -264,6 +546,12 @@ def _get_model_indexes(metadata, schema: str | None, autogen_context: AutogenCon
                             "but is not unique. NULLS NOT DISTINCT only affects uniqueness, so it has "
                             "no effect on a non-unique index — did you mean to set unique=True?"
                         )
+                    connection = autogen_context.connection if autogen_context is not None else None
+                    if connection is not None and not get_server_capabilities(connection).supports_nulls_not_distinct:
+                        raise ValueError(
+                            f"Index {index.name!r} on table {table.name!r} sets nulls_not_distinct, "
+                            "which requires PostgreSQL 15 or later."
+                        )
                     kw["postgresql_nulls_not_distinct"] = True
 
             indexes.append(
@@ -277,10 +565,10 @@ def _get_model_indexes(metadata, schema: str | None, autogen_context: AutogenCon
                 }
             )
 
-    return indexes
+    return indexes_by_schema
 
 
-def _raise_if_string_arg_matches_column_name(expr, table, index_name: str) -> None:
+def _raise_if_string_arg_matches_column_name(expr, table, index_name: str, column_names: frozenset[str] | None = None) -> None:
     """Catch the ``func.X("column_name_str")`` anti-pattern.
 
     SQLAlchemy treats bare strings inside ``func.X(...)`` as bound-parameter LITERAL
@@ -291,7 +579,15 @@ def _raise_if_string_arg_matches_column_name(expr, table, index_name: str) -> No
     match a column name on the index's table — that combination is almost always
     the bug rather than an intentional literal.
     """
-    column_names = {col.name for col in table.columns}
+    if column_names is None:
+        column_names = frozenset(col.name for col in table.columns)
+
+    # Expressions found clean against the same column names aren't walked again
+    expression_key = _expression_cache_key(expr)
+    checked_key = (expression_key, column_names) if expression_key is not None else None
+    if checked_key is not None and checked_key in _CHECKED_INDEX_EXPRESSIONS:
+        return
+
     for elem in visitors.iterate(expr):
         if isinstance(elem, BindParameter) and isinstance(elem.value, str) and elem.value in column_names:
             raise ValueError(
@@ -302,6 +598,11 @@ def _raise_if_string_arg_matches_column_name(expr, table, index_name: str) -> No
                 f"`func.X(table.c.{elem.value})` or `func.X(literal_column({elem.value!r}))` instead.",
             )
 
+    if checked_key is not None:
+        if len(_CHECKED_INDEX_EXPRESSIONS) >= _EXPRESSION_CACHE_MAX_SIZE:
+            _CHECKED_INDEX_EXPRESSIONS.clear()
+        _CHECKED_INDEX_EXPRESSIONS.add(checked_key)
+
 
 def _render_index_expression(expr, autogen_context: AutogenContext | None) -> str:
     """Render a SQLAlchemy expression as a SQL string suitable for CREATE INDEX.
@@ -312,7 +613,60 @@ def _render_index_expression(expr, autogen_context: AutogenContext | None) -> st
     when no autogen_context is supplied (test paths exercising the predicate alone)."""
     if autogen_context is None or not hasattr(expr, "compile"):
         return str(expr)
-    return autogen_context.migration_context.impl.render_ddl_sql_expr(expr, is_index=True)
+
+    impl = autogen_context.migration_context.impl
+    expression_key = _expression_cache_key(expr)
+    if expression_key is None:
+        return impl.render_ddl_sql_expr(expr, is_index=True)
+
+    dialect = autogen_context.dialect
+    key = (expression_key, impl.__class__, dialect.name if dialect else None, dialect.server_version_info if dialect else None)
+    rendered = _RENDERED_INDEX_EXPRESSIONS.get(key)
+    if rendered is None:
+        rendered = impl.render_ddl_sql_expr(expr, is_index=True)
+        if len(_RENDERED_INDEX_EXPRESSIONS) >= _EXPRESSION_CACHE_MAX_SIZE:
+            _RENDERED_INDEX_EXPRESSIONS.clear()
+        _RENDERED_INDEX_EXPRESSIONS[key] = rendered
+    return rendered
+
+
+# Rendered index expressions and ``WHERE`` predicates, and the expressions that
+# passed :func:`_raise_if_string_arg_matches_column_name`, keyed by
+# :func:`_expression_cache_key`. Shared across autogenerate runs in the same
+# process: the model's expressions rarely change between them.
+_RENDERED_INDEX_EXPRESSIONS: dict[tuple[Any, ...], str] = {}
+_CHECKED_INDEX_EXPRESSIONS: set[tuple[Any, ...]] = set()
+_EXPRESSION_CACHE_MAX_SIZE = 10_000
+
+
+def _expression_cache_key(expr) -> tuple[Any, ...] | None:
+    """SQLAlchemy's cache key of ``expr`` with its bound values, which the key
+    leaves out but ``literal_binds`` rendering inlines. ``None`` when the
+    expression can't be cached."""
+    generate_cache_key = getattr(expr, "_generate_cache_key", None)
+    cache_key = generate_cache_key() if generate_cache_key is not None else None
+    if cache_key is None:
+        return None
+
+    key = (cache_key.key, tuple(bind.effective_value for bind in cache_key.bindparams))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+# The structural tokens of a ``pg_get_indexdef`` output: everything else is
+# skipped over by the regex engine rather than the parser loop. String literals
+# and quoted identifiers are single tokens, so parentheses and commas inside
+# them are never structural. With ``standard_conforming_strings = off`` literals
+# are printed as ``E'...'`` with backslashes doubled, which the same pattern reads.
+# ``pg_get_indexdef`` prints keywords in upper case. Tokens are told apart by
+# their first character: named groups would double the cost of the scan.
+_INDEXDEF_TOKEN = re.compile(
+    r"""'[^']*(?:''[^']*)*'|"[^"]*(?:""[^"]*)*"|[(),]|\b(?:USING|INCLUDE|WITH|TABLESPACE|WHERE|NULLS NOT DISTINCT)\b"""
+)
+_INDEXDEF_NAME = re.compile(r'\s*("(?:[^"]|"")*"|\w+)')
 
 
 def _parse_indexdef(indexdef: str) -> tuple[list[TextClause], _IndexKw]:
@@ -320,74 +674,119 @@ def _parse_indexdef(indexdef: str) -> tuple[list[TextClause], _IndexKw]:
     for reconstructing a :class:`CreateIndexOp` on downgrade.
 
     ``pg_get_indexdef`` shape:
-        ``CREATE [UNIQUE] INDEX name ON [schema.]table USING method (cols) [INCLUDE (...)] [WHERE ...]``
+        ``CREATE [UNIQUE] INDEX name ON [ONLY] [schema.]table USING method (cols)
+        [INCLUDE (...)] [NULLS NOT DISTINCT] [WITH (...)] [TABLESPACE name] [WHERE ...]``
 
-    Column-list splitting is depth-aware so expressions with commas (e.g.
-    ``coalesce(a, b)``) survive intact.
+    Each column is kept verbatim, with its ``COLLATE``, opclass and
+    ``ASC/DESC NULLS FIRST/LAST`` modifiers. See :func:`_split_indexdef`.
     """
-    kwargs: _IndexKw = {}
-
-    method_match = re.search(r"USING\s+(\w+)\s+\(", indexdef, re.IGNORECASE)
-    if method_match is None:
-        return ([text(indexdef)], kwargs)
-    kwargs["postgresql_using"] = method_match.group(1)
-
-    # Walk from just past the opening paren to find its matching close.
-    start = method_match.end()
-    depth = 1
-    i = start
-    while i < len(indexdef) and depth > 0:
-        char = indexdef[i]
-        if char == "(":
-            depth += 1
-        elif char == ")":
-            depth -= 1
-        i += 1
-    col_list_str = indexdef[start : i - 1]
-    tail = indexdef[i:]
-
-    # Split the column list on top-level commas only.
-    columns: list[TextClause] = []
-    buf = ""
+    parts = _split_indexdef(indexdef)
+    if parts is None:
+        return ([text(indexdef)], {})
+
+    columns, kw_items = parts
+    kwargs: _IndexKw = dict(kw_items)  # type: ignore[assignment]
+    if "postgresql_include" in kwargs:
+        kwargs["postgresql_include"] = list(kwargs["postgresql_include"])
+    if "postgresql_with" in kwargs:
+        kwargs["postgresql_with"] = dict(kwargs["postgresql_with"])
+    return ([text(column) for column in columns], kwargs)
+
+
+@functools.lru_cache(maxsize=10_000)
+def _split_indexdef(indexdef: str) -> tuple[tuple[str, ...], tuple[tuple[str, Any], ...]] | None:
+    """The column texts and dialect kwargs of ``indexdef``, in one pass over its tokens
+
+    Memoized by definition: the same indexes are reflected on every autogenerate.
+    Values are immutable, :func:`_parse_indexdef` copies them out.
+    """
+    method: str | None = None
+    groups: dict[str, list[str]] = {}
+    tablespace: str | None = None
+    nulls_not_distinct = False
+    where: str | None = None
+
+    expecting: str | None = None  # the clause whose parenthesized list is next
     depth = 0
-    for char in col_list_str:
-        if char == "(":
-            depth += 1
-            buf += char
-        elif char == ")":
-            depth -= 1
-            buf += char
-        elif char == "," and depth == 0:
-            columns.append(text(buf.strip()))
-            buf = ""
-        else:
-            buf += char
-    if buf.strip():
-        columns.append(text(buf.strip()))
-
-    include_match = re.search(r"INCLUDE\s+\(([^)]+)\)", tail, re.IGNORECASE)
-    if include_match:
-        kwargs["postgresql_include"] = [c.strip() for c in include_match.group(1).split(",")]
+    group: str | None = None
+    group_items: list[str] = []
+    item_start = 0
+
+    for match in _INDEXDEF_TOKEN.finditer(indexdef):
+        token = match.group()
+        if depth > 0:
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+                if depth == 0 and group is not None:
+                    group_items.append(indexdef[item_start : match.start()].strip())
+                    groups[group] = group_items
+                    group = None
+            elif token == "," and depth == 1 and group is not None:
+                group_items.append(indexdef[item_start : match.start()].strip())
+                item_start = match.end()
+            continue
 
+        if token == "(":
+            depth = 1
+            if method is not None and "columns" not in groups:
+                group = "columns"
+            elif expecting is not None:
+                group = expecting
+            group_items = []
+            item_start = match.end()
+            expecting = None
+        elif token[0].isalpha():
+            # Before the method, only the table name may be a (non-reserved) keyword
+            if method is None:
+                if token == "USING":
+                    name = _INDEXDEF_NAME.match(indexdef, match.end())
+                    method = name.group(1) if name else None
+            elif token == "WHERE":
+                where = indexdef[match.end() :].strip()
+                break
+            elif token in ("INCLUDE", "WITH"):
+                expecting = token
+            elif token == "TABLESPACE":
+                name = _INDEXDEF_NAME.match(indexdef, match.end())
+                tablespace = _unquote_identifier(name.group(1)) if name else None
+            else:
+                nulls_not_distinct = True
+
+    if method is None or "columns" not in groups:
+        return None
+
+    kw_items: list[tuple[str, Any]] = [("postgresql_using", method)]
+    if "INCLUDE" in groups:
+        kw_items.append(("postgresql_include", tuple(groups["INCLUDE"])))
     # ``pg_get_indexdef`` emits ``NULLS NOT DISTINCT`` between INCLUDE and WHERE on
     # PG 15+; PG < 15 never emits it, so this is safe without a server-version check.
-    if re.search(r"\bNULLS\s+NOT\s+DISTINCT\b", tail, re.IGNORECASE):
-        kwargs["postgresql_nulls_not_distinct"] = True
+    if nulls_not_distinct:
+        kw_items.append(("postgresql_nulls_not_distinct", True))
+    if "WITH" in groups:
+        params = (param.partition("=") for param in groups["WITH"])
+        kw_items.append(("postgresql_with", tuple((name.strip(), value.strip()) for name, _, value in params)))
+    if tablespace is not None:
+        kw_items.append(("postgresql_tablespace", tablespace))
+    if where:
+        kw_items.append(("postgresql_where", where))
+    return (tuple(groups["columns"]), tuple(kw_items))
 
-    where_match = re.search(r"WHERE\s+(.+)$", tail.strip(), re.IGNORECASE | re.DOTALL)
-    if where_match:
-        kwargs["postgresql_where"] = where_match.group(1).strip()
 
-    return (columns, kwargs)
+def _unquote_identifier(token: str) -> str:
+    if token.startswith('"'):
+        return token[1:-1].replace('""', '"')
+    return token
 
 
-def _get_database_indexes(
+def _get_database_indexes_by_schema(
     inspector: Inspector,
     metadata,
-    schema: str | None,
-) -> list[_IndexInfo]:
-    """Read every user-declared index in the target schema directly from
-    ``pg_index``.
+    autogen_context: AutogenContext | None = None,
+) -> dict[str | None, list[_IndexInfo]]:
+    """Read every user-declared index on the tables of ``metadata`` directly
+    from ``pg_index``, grouped by table schema, in a single query.
 
     Bypasses :meth:`Inspector.get_indexes` because SQLAlchemy 1.4's
     reflector silently skips function-expression indexes on PostgreSQL
@@ -398,43 +797,55 @@ def _get_database_indexes(
     (identified via ``pg_constraint.conindid``) — those are managed by
     stock Alembic's constraint diff, not the index diff.
     """
-    table_names = [t.name for t in metadata.tables.values() if t.schema == schema]
-    if not table_names:
-        return []
-
-    query = text(
-        """
-        SELECT
-            c.relname AS index_name,
-            t.relname AS table_name,
-            pg_get_indexdef(i.indexrelid) AS index_definition,
-            i.indisunique AS is_unique
-        FROM pg_index i
-        JOIN pg_class c ON c.oid = i.indexrelid
-        JOIN pg_class t ON t.oid = i.indrelid
-        JOIN pg_namespace n ON n.oid = c.relnamespace
-        LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid
-        WHERE n.nspname = :schema
-          AND t.relname = ANY(:table_names)
-          AND con.oid IS NULL
-          AND NOT i.indisprimary
-        """
-    )
+    # Map each resolved (schema, table) back to the metadata schema(s) it was declared under.
+    declared_schemas = {
+        name: [table.schema for table in tables]
+        for name, tables in get_metadata_index(metadata, autogen_context).tables_by_resolved_name.items()
+    }
+
+    if not declared_schemas:
+        return {}
 
-    resolved_schema = schema or "public"
-    rows = inspector.bind.execute(query, {"schema": resolved_schema, "table_names": table_names}).fetchall()
+    schema_names = [schema for schema, _ in declared_schemas]
+    table_names = [table_name for _, table_name in declared_schemas]
 
-    indexes: list[_IndexInfo] = []
+    rows = inspector.bind.execute(_DATABASE_INDEXES_QUERY, {"schema_names": schema_names, "table_names": table_names}).fetchall()
+
+    indexes_by_schema: dict[str | None, list[_IndexInfo]] = {}
     for row in rows:
         columns, kw = _parse_indexdef(row.index_definition)
-        indexes.append(
-            {
-                "table_name": row.table_name,
-                "name": row.index_name,
-                "columns": columns,
-                "expressions": [str(col) for col in columns],
-                "unique": row.is_unique,
-                "kw": kw,
-            }
-        )
-    return indexes
+        for schema in declared_schemas[(row.schema_name, row.table_name)]:
+            indexes_by_schema.setdefault(schema, []).append(
+                {
+                    "table_name": row.table_name,
+                    "name": row.index_name,
+                    "columns": columns,
+                    "expressions": [str(col) for col in columns],
+                    "unique": row.is_unique,
+                    "kw": kw,
+                    "definition": row.index_definition,
+                    "is_valid": row.is_valid,
+                }
+            )
+    return indexes_by_schema
+
+
+_DATABASE_INDEXES_QUERY = text(
+    """
+    SELECT
+        n.nspname AS schema_name,
+        c.relname AS index_name,
+        t.relname AS table_name,
+        pg_get_indexdef(i.indexrelid) AS index_definition,
+        i.indisunique AS is_unique,
+        i.indisvalid AS is_valid
+    FROM unnest(CAST(:schema_names AS text[]), CAST(:table_names AS text[])) AS wanted(schema_name, table_name)
+    JOIN pg_namespace n ON n.nspname = wanted.schema_name
+    JOIN pg_class t ON t.relnamespace = n.oid AND t.relname = wanted.table_name
+    JOIN pg_index i ON i.indrelid = t.oid
+    JOIN pg_class c ON c.oid = i.indexrelid
+    LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid
+    WHERE con.oid IS NULL
+      AND NOT i.indisprimary
+    """
+)
@@ -23,6 +23,7 @@ class PGExtension(ReplaceableEntity):
     """
 
     type_ = "extension"
+    reflects_schema_lists = True
 
     def __init__(self, schema: str, signature: str):
         self.schema: str = coerce_to_unquoted(normalize_whitespace(schema))
@@ -64,20 +65,22 @@ class PGExtension(ReplaceableEntity):
     @classmethod
     def from_database(cls, sess, schema):
         """Get a list of all extensions defined in the db"""
-        sql = sql_text(
-            f"""
-        select
-            np.nspname schema_name,
-            ext.extname extension_name
-        from
-            pg_extension ext
-            join pg_namespace np
-                on ext.extnamespace = np.oid
-        where
-            np.nspname not in ('pg_catalog')
-            and np.nspname like :schema;
-        """
-        )
-        rows = sess.execute(sql, {"schema": schema}).fetchall()
+        rows = sess.execute(_EXTENSIONS_QUERY, cls._schema_params(schema)).fetchall()
         db_exts = [cls(x[0], x[1]) for x in rows]
         return db_exts
+
+
+_EXTENSIONS_QUERY = sql_text(
+    """
+    select
+        np.nspname schema_name,
+        ext.extname extension_name
+    from
+        pg_extension ext
+        join pg_namespace np
+            on ext.extnamespace = np.oid
+    where
+        np.nspname not in ('pg_catalog')
+        and np.nspname like any(cast(:schemas as text[]))
+    """
+)
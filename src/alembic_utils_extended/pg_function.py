@@ -5,6 +5,7 @@ from parse import parse
 from sqlalchemy import text as sql_text
 from sqlalchemy.sql.elements import TextClause
 
+from alembic_utils_extended.capabilities import get_server_capabilities
 from alembic_utils_extended.exceptions import SQLParseFailure
 from alembic_utils_extended.replaceable_entity import ReplaceableEntity
 from alembic_utils_extended.statement import (
@@ -26,6 +27,7 @@ class PGFunction(ReplaceableEntity):
     """
 
     type_ = "function"
+    reflects_schema_lists = True
 
     def __init__(self, schema: str, signature: str, definition: str):
         super().__init__(schema, signature, definition)
@@ -94,65 +96,90 @@ class PGFunction(ReplaceableEntity):
     @classmethod
     def from_database(cls, sess, schema):
         """Get a list of all functions defined in the db"""
+        query = _FUNCTIONS_QUERY if get_server_capabilities(sess).has_prokind else _FUNCTIONS_QUERY_PG_LT_11
+        rows = sess.execute(query, cls._schema_params(schema)).fetchall()
+        db_functions = [cls._from_catalog_row(x) for x in rows]
 
-        # Prior to postgres 11, pg_proc had different columns
-        # https://github.com/candidhealth/alembic-utils-extended/issues/12
-        PG_GTE_11 = """
-            and p.prokind = 'f'
-        """
+        for func in db_functions:
+            assert func is not None
 
-        PG_LT_11 = """
-            and not p.proisagg
-            and not p.proiswindow
-        """
+        return db_functions
 
-        # Retrieve the postgres server version e.g. 90603 for 9.6.3 or 120003 for 12.3
-        pg_version_str = sess.execute(sql_text("show server_version_num")).fetchone()[0]
-        pg_version = int(pg_version_str)
-
-        sql = sql_text(
-            f"""
-        with extension_functions as (
-            select
-                objid as extension_function_oid
-            from
-                pg_depend
-            where
-                -- depends on an extension
-                deptype='e'
-                -- is a proc/function
-                and classid = 'pg_proc'::regclass
-        )
+    @classmethod
+    def identities_from_database(cls, sess, schema="%"):
+        """Get the identities of all functions defined in the db, without their definitions"""
+        query = _FUNCTION_IDENTITIES_QUERY if get_server_capabilities(sess).has_prokind else _FUNCTION_IDENTITIES_QUERY_PG_LT_11
+        rows = sess.execute(query, cls._schema_params(schema)).fetchall()
+        return [cls(schema=x.function_schema, signature=f"{x.function_name}({x.function_arguments})", definition="").identity for x in rows]
 
-        select
-            n.nspname as function_schema,
-            p.proname as function_name,
-            pg_get_function_arguments(p.oid) as function_arguments,
-            case
-                when l.lanname = 'internal' then p.prosrc
-                else pg_get_functiondef(p.oid)
-            end as create_statement,
-            t.typname as return_type,
-            l.lanname as function_language
-        from
-            pg_proc p
-            left join pg_namespace n on p.pronamespace = n.oid
-            left join pg_language l on p.prolang = l.oid
-            left join pg_type t on t.oid = p.prorettype
-            left join extension_functions ef on p.oid = ef.extension_function_oid
-        where
-            n.nspname not in ('pg_catalog', 'information_schema')
-            -- Filter out functions from extensions
-            and ef.extension_function_oid is null
-            and n.nspname = :schema
+    @classmethod
+    def _from_catalog_row(cls, row) -> "PGFunction":
+        """Build a function from its catalog columns, as :meth:`from_sql` would from
+        its ``pg_get_functiondef``, without template matching the whole body
+
+        The schema and signature are read from the columns. The definition is the
+        remainder of ``pg_get_functiondef`` after its ``CREATE OR REPLACE FUNCTION
+        <schema>.<name>(<arguments>) RETURNS`` header.
         """
-            + (PG_GTE_11 if pg_version >= 110000 else PG_LT_11)
+        header_end = f"({row.function_arguments})\n RETURNS "
+        position = row.create_statement.find(header_end) if row.function_language != "internal" else -1
+        if position == -1:
+            return cls.from_sql(row.create_statement)
+
+        return cls(
+            schema=row.function_schema,
+            signature=f"{row.function_name}({row.function_arguments})",
+            definition="returns " + row.create_statement[position + len(header_end) :].rstrip(),
         )
 
-        rows = sess.execute(sql, {"schema": schema}).fetchall()
-        db_functions = [cls.from_sql(x[3]) for x in rows]
-
-        for func in db_functions:
-            assert func is not None
 
-        return db_functions
+_FUNCTIONS_QUERY_TEMPLATE = """
+    with extension_functions as (
+        select
+            objid as extension_function_oid
+        from
+            pg_depend
+        where
+            -- depends on an extension
+            deptype='e'
+            -- is a proc/function
+            and classid = 'pg_proc'::regclass
+    )
+
+    select
+        n.nspname as function_schema,
+        p.proname as function_name,
+        pg_get_function_arguments(p.oid) as function_arguments,
+        {create_statement} as create_statement,
+        t.typname as return_type,
+        l.lanname as function_language
+    from
+        pg_proc p
+        left join pg_namespace n on p.pronamespace = n.oid
+        left join pg_language l on p.prolang = l.oid
+        left join pg_type t on t.oid = p.prorettype
+        left join extension_functions ef on p.oid = ef.extension_function_oid
+    where
+        n.nspname not in ('pg_catalog', 'information_schema')
+        -- Filter out functions from extensions
+        and ef.extension_function_oid is null
+        and n.nspname like any(cast(:schemas as text[]))
+        {kind_filter}
+"""
+
+_CREATE_STATEMENT = """case
+            when l.lanname = 'internal' then p.prosrc
+            else pg_get_functiondef(p.oid)
+        end"""
+
+# Prior to postgres 11, pg_proc had different columns
+# https://github.com/candidhealth/alembic-utils-extended/issues/12
+_KIND_FILTER = "and p.prokind = 'f'"
+_KIND_FILTER_PG_LT_11 = "and not p.proisagg and not p.proiswindow"
+
+_FUNCTIONS_QUERY = sql_text(_FUNCTIONS_QUERY_TEMPLATE.format(create_statement=_CREATE_STATEMENT, kind_filter=_KIND_FILTER))
+_FUNCTIONS_QUERY_PG_LT_11 = sql_text(
+    _FUNCTIONS_QUERY_TEMPLATE.format(create_statement=_CREATE_STATEMENT, kind_filter=_KIND_FILTER_PG_LT_11)
+)
+_FUNCTION_IDENTITIES_QUERY = sql_text(_FUNCTIONS_QUERY_TEMPLATE.format(create_statement="null", kind_filter=_KIND_FILTER))
+_FUNCTION_IDENTITIES_QUERY_PG_LT_11 = sql_text(_FUNCTIONS_QUERY_TEMPLATE.format(create_statement="null", kind_filter=_KIND_FILTER_PG_LT_11))
@@ -73,6 +73,7 @@ class PGGrantTable(ReplaceableEntity):
     with_grant_option: bool
 
     type_ = "grant_table"
+    reflects_schema_lists = True
 
     def __init__(
         self,
@@ -131,29 +132,7 @@ class PGGrantTable(ReplaceableEntity):
     @classmethod
     def from_database(cls, sess: Session, schema: str = "%"):
         # COLUMN LEVEL
-        sql = sql_text(
-            """
-        SELECT
-            table_schema as schema,
-            table_name,
-            grantee as role_name,
-            privilege_type as grant_option,
-            is_grantable,
-            column_name
-        FROM
-            information_schema.role_column_grants rcg
-            -- Cant revoke from superusers so filter out those recs
-            join pg_roles pr
-                on rcg.grantee = pr.rolname
-        WHERE
-            not pr.rolsuper
-            and grantor = CURRENT_USER
-            and table_schema like :schema
-            and privilege_type in ('SELECT', 'INSERT', 'UPDATE', 'REFERENCES')
-        """
-        )
-
-        rows = sess.execute(sql, params={"schema": schema}).fetchall()
+        rows = sess.execute(_COLUMN_GRANTS_QUERY, cls._schema_params(schema)).fetchall()
         grants = []
 
         grouped = flu(rows).group_by(lambda x: SchemaTableRole(*x[:5])).map(lambda x: (x[0], x[1].map_item(5).collect())).collect()
@@ -169,28 +148,7 @@ class PGGrantTable(ReplaceableEntity):
             grants.append(grant)
 
         # TABLE LEVEL
-        sql = sql_text(
-            """
-        SELECT
-            table_schema as schema_name,
-            table_name,
-            grantee as role_name,
-            privilege_type as grant_option,
-            is_grantable
-        FROM
-            information_schema.role_table_grants rcg
-            -- Cant revoke from superusers so filter out those recs
-            join pg_roles pr
-                on rcg.grantee = pr.rolname
-        WHERE
-            not pr.rolsuper
-            and grantor = CURRENT_USER
-            and table_schema like :schema
-            and privilege_type in ('DELETE', 'TRUNCATE', 'TRIGGER')
-        """
-        )
-
-        rows = sess.execute(sql, params={"schema": schema}).fetchall()
+        rows = sess.execute(_TABLE_GRANTS_QUERY, cls._schema_params(schema)).fetchall()
 
         for schema_name, table_name, role_name, grant_option, is_grantable in rows:
             grant = cls(
@@ -219,3 +177,47 @@ class PGGrantTable(ReplaceableEntity):
     def to_sql_statement_create_or_replace(self) -> Generator[TextClause, None, None]:
         yield from self.to_sql_statement_drop()
         yield from self.to_sql_statement_create()
+
+
+_COLUMN_GRANTS_QUERY = sql_text(
+    """
+    SELECT
+        table_schema as schema,
+        table_name,
+        grantee as role_name,
+        privilege_type as grant_option,
+        is_grantable,
+        column_name
+    FROM
+        information_schema.role_column_grants rcg
+        -- Cant revoke from superusers so filter out those recs
+        join pg_roles pr
+            on rcg.grantee = pr.rolname
+    WHERE
+        not pr.rolsuper
+        and grantor = CURRENT_USER
+        and table_schema like any(cast(:schemas as text[]))
+        and privilege_type in ('SELECT', 'INSERT', 'UPDATE', 'REFERENCES')
+    """
+)
+
+_TABLE_GRANTS_QUERY = sql_text(
+    """
+    SELECT
+        table_schema as schema_name,
+        table_name,
+        grantee as role_name,
+        privilege_type as grant_option,
+        is_grantable
+    FROM
+        information_schema.role_table_grants rcg
+        -- Cant revoke from superusers so filter out those recs
+        join pg_roles pr
+            on rcg.grantee = pr.rolname
+    WHERE
+        not pr.rolsuper
+        and grantor = CURRENT_USER
+        and table_schema like any(cast(:schemas as text[]))
+        and privilege_type in ('DELETE', 'TRUNCATE', 'TRIGGER')
+    """
+)
@@ -36,6 +36,7 @@ class PGMaterializedView(ReplaceableEntity):
     """
 
     type_ = "materialized_view"
+    reflects_schema_lists = True
 
     def __init__(self, schema: str, signature: str, definition: str, with_data: bool = True, indexes: list[Index] = None):
         self.schema: str = coerce_to_unquoted(normalize_whitespace(schema))
@@ -127,24 +128,26 @@ class PGMaterializedView(ReplaceableEntity):
     @classmethod
     def from_database(cls, sess, schema):
         """Get a list of all functions defined in the db"""
-        sql = sql_text(
-            f"""
-        select
-            schemaname schema_name,
-            matviewname view_name,
-            definition,
-            ispopulated is_populated
-        from
-            pg_matviews
-        where
-            schemaname not in ('pg_catalog', 'information_schema')
-            and schemaname::text like '{schema}';
-        """
-        )
-        rows = sess.execute(sql).fetchall()
+        rows = sess.execute(_MATERIALIZED_VIEWS_QUERY, cls._schema_params(schema)).fetchall()
         db_views = [cls(x[0], x[1], x[2], with_data=x[3]) for x in rows]
 
         for view in db_views:
             assert view is not None
 
         return db_views
+
+
+_MATERIALIZED_VIEWS_QUERY = sql_text(
+    """
+    select
+        schemaname schema_name,
+        matviewname view_name,
+        definition,
+        ispopulated is_populated
+    from
+        pg_matviews
+    where
+        schemaname not in ('pg_catalog', 'information_schema')
+        and schemaname::text like any(cast(:schemas as text[]))
+    """
+)
@@ -22,6 +22,7 @@ class PGPolicy(OnEntityMixin, ReplaceableEntity):
     """
 
     type_ = "policy"
+    reflects_schema_lists = True
 
     @classmethod
     def from_sql(cls, sql: str) -> "PGPolicy":
@@ -64,24 +65,7 @@ class PGPolicy(OnEntityMixin, ReplaceableEntity):
     @classmethod
     def from_database(cls, connection, schema):
         """Get a list of all policies defined in the db"""
-        sql = sql_text(
-            f"""
-        select
-            schemaname,
-            tablename,
-            policyname,
-            permissive,
-            roles,
-            cmd,
-            qual,
-            with_check
-        from
-            pg_policies
-        where
-            schemaname = '{schema}'
-        """
-        )
-        rows = connection.execute(sql).fetchall()
+        rows = connection.execute(_POLICIES_QUERY, cls._schema_params(schema)).fetchall()
 
         def get_definition(permissive, roles, cmd, qual, with_check):
             definition = ""
@@ -115,3 +99,22 @@ class PGPolicy(OnEntityMixin, ReplaceableEntity):
             assert policy is not None
 
         return db_policies
+
+
+_POLICIES_QUERY = sql_text(
+    """
+    select
+        schemaname,
+        tablename,
+        policyname,
+        permissive,
+        roles,
+        cmd,
+        qual,
+        with_check
+    from
+        pg_policies
+    where
+        schemaname::text like any(cast(:schemas as text[]))
+    """
+)
@@ -1,4 +1,5 @@
 # pylint: disable=unused-argument,invalid-name,line-too-long
+import functools
 from typing import Generator
 
 from parse import parse
@@ -33,6 +34,7 @@ class PGTrigger(OnEntityMixin, ReplaceableEntity):
     """
 
     type_ = "trigger"
+    reflects_schema_lists = True
 
     _templates = [
         "create{:s}constraint{:s}trigger{:s}{signature}{:s}{event}{:s}ON{:s}{on_entity}{:s}{action}",
@@ -104,23 +106,18 @@ class PGTrigger(OnEntityMixin, ReplaceableEntity):
 
         # We need to parse and replace the schema qualifier on the table for simulate_entity to
         # operate
-        _def = self.definition
-        _template = "{event}{:s}ON{:s}{on_entity}{:s}{action}"
-        match = parse(_template, _def)
-        if not match:
-            raise SQLParseFailure(f'Failed to parse SQL into PGTrigger.definition """{_def}"""')
-
-        event = match["event"]
-        action = match["action"]
+        parts = _split_definition(self.definition)
+        if parts is None:
+            raise SQLParseFailure(f'Failed to parse SQL into PGTrigger.definition """{self.definition}"""')
+        event, on_entity, action = parts
 
         # Ensure entity is qualified with schema
-        on_entity = match["on_entity"]
         if "." in on_entity:
             _, _, on_entity = on_entity.partition(".")
         on_entity = f"{self.schema}.{on_entity}"
 
         # Re-render the definition ensuring the table is qualified with
-        def_rendered = _template.replace("{:s}", " ").format(event=event, on_entity=on_entity, action=action)
+        def_rendered = f"{event} ON {on_entity} {action}"
 
         yield sql_text(f"CREATE{' CONSTRAINT ' if self.is_constraint else ' '}TRIGGER \"{self.signature}\" {def_rendered}")
 
@@ -137,27 +134,112 @@ class PGTrigger(OnEntityMixin, ReplaceableEntity):
     @classmethod
     def from_database(cls, sess, schema):
         """Get a list of all triggers defined in the db"""
+        rows = sess.execute(_TRIGGERS_QUERY, cls._schema_params(schema)).fetchall()
 
-        sql = sql_text(
-            """
-        select
-            pc.relnamespace::regnamespace::text as table_schema,
-            tgname trigger_name,
-            pg_get_triggerdef(pgt.oid) definition
-        from
-            pg_trigger pgt
-                inner join pg_class pc
-                    on pgt.tgrelid = pc.oid
-        where
-            not tgisinternal
-            and pc.relnamespace::regnamespace::text like :schema
-        """
-        )
-        rows = sess.execute(sql, {"schema": schema}).fetchall()
-
-        db_triggers = [cls.from_sql(x[2]) for x in rows]
+        db_triggers = [cls._from_catalog_row(x) for x in rows]
 
         for trig in db_triggers:
             assert trig is not None
 
         return db_triggers
+
+    @classmethod
+    def _from_catalog_row(cls, row) -> "PGTrigger":
+        """Build a trigger from its catalog columns, as :meth:`from_sql` would from its
+        ``pg_get_triggerdef``, without template matching
+
+        The name, table, constraint flag and events come from the columns. The rest of the
+        definition (``FROM``, deferrability, ``REFERENCING``, ``FOR EACH``, ``WHEN`` and the
+        function call) is the remainder of ``pg_get_triggerdef``, the only place ``tgqual``
+        can be decompiled with its ``OLD`` and ``NEW`` references.
+        """
+        event = _trigger_event(row.trigger_type, row.update_columns)
+        header = (
+            f"CREATE {'CONSTRAINT ' if row.is_constraint else ''}TRIGGER {row.quoted_trigger_name} {event} ON {row.qualified_table_name} "
+        )
+        if not row.definition.startswith(header):
+            return cls.from_sql(row.definition)
+
+        return cls(
+            schema=row.table_schema,
+            signature=row.trigger_name,
+            on_entity=f"{row.table_schema}.{row.table_name}",
+            definition=f"{event} ON {row.qualified_table_name} {row.definition[len(header):]}",
+            is_constraint=row.is_constraint,
+        )
+
+
+# Bits of pg_trigger.tgtype, from src/include/catalog/pg_trigger.h
+TRIGGER_TYPE_ROW = 1 << 0
+TRIGGER_TYPE_BEFORE = 1 << 1
+TRIGGER_TYPE_INSERT = 1 << 2
+TRIGGER_TYPE_DELETE = 1 << 3
+TRIGGER_TYPE_UPDATE = 1 << 4
+TRIGGER_TYPE_TRUNCATE = 1 << 5
+TRIGGER_TYPE_INSTEAD = 1 << 6
+
+
+def _trigger_event(trigger_type: int, update_columns: list[str]) -> str:
+    """The timing and events of a trigger, as ``pg_get_triggerdef`` renders them"""
+    if trigger_type & TRIGGER_TYPE_BEFORE:
+        timing = "BEFORE"
+    elif trigger_type & TRIGGER_TYPE_INSTEAD:
+        timing = "INSTEAD OF"
+    else:
+        timing = "AFTER"
+
+    events = []
+    if trigger_type & TRIGGER_TYPE_INSERT:
+        events.append("INSERT")
+    if trigger_type & TRIGGER_TYPE_DELETE:
+        events.append("DELETE")
+    if trigger_type & TRIGGER_TYPE_UPDATE:
+        events.append("UPDATE OF " + ", ".join(update_columns) if update_columns else "UPDATE")
+    if trigger_type & TRIGGER_TYPE_TRUNCATE:
+        events.append("TRUNCATE")
+
+    return f"{timing} {' OR '.join(events)}"
+
+
+@functools.lru_cache(maxsize=10_000)
+def _split_definition(definition: str) -> tuple[str, str, str] | None:
+    """The event, table and action of a trigger definition, parsed once per definition"""
+    match = parse("{event}{:s}ON{:s}{on_entity}{:s}{action}", definition)
+    if not match:
+        return None
+    return (match["event"], match["on_entity"], match["action"])
+
+
+_TRIGGERS_QUERY = sql_text(
+    """
+    select
+        n.nspname as table_schema,
+        pc.relname as table_name,
+        quote_ident(n.nspname) || '.' || quote_ident(pc.relname) as qualified_table_name,
+        pgt.tgname as trigger_name,
+        quote_ident(pgt.tgname) as quoted_trigger_name,
+        pgt.tgtype as trigger_type,
+        pgt.tgconstraint <> 0 as is_constraint,
+        array(
+            select
+                quote_ident(a.attname)
+            from
+                unnest(pgt.tgattr::int2[]) with ordinality as col(attnum, position)
+                inner join pg_attribute a
+                    on a.attrelid = pgt.tgrelid
+                    and a.attnum = col.attnum
+            order by
+                col.position
+        ) as update_columns,
+        pg_get_triggerdef(pgt.oid) as definition
+    from
+        pg_trigger pgt
+            inner join pg_class pc
+                on pgt.tgrelid = pc.oid
+            inner join pg_namespace n
+                on pc.relnamespace = n.oid
+    where
+        not tgisinternal
+        and n.nspname like any(cast(:schemas as text[]))
+    """
+)
@@ -27,6 +27,7 @@ class PGView(ReplaceableEntity):
     """
 
     type_ = "view"
+    reflects_schema_lists = True
 
     def __init__(self, schema: str, signature: str, definition: str):
         self.schema: str = coerce_to_unquoted(normalize_whitespace(schema))
@@ -83,23 +84,45 @@ class PGView(ReplaceableEntity):
     @classmethod
     def from_database(cls, sess, schema):
         """Get a list of all functions defined in the db"""
-        sql = sql_text(
-            f"""
-        select
-            schemaname schema_name,
-            viewname view_name,
-            definition
-        from
-            pg_views
-        where
-            schemaname not in ('pg_catalog', 'information_schema')
-            and schemaname::text like '{schema}';
-        """
-        )
-        rows = sess.execute(sql).fetchall()
+        rows = sess.execute(_VIEWS_QUERY, cls._schema_params(schema)).fetchall()
         db_views = [cls(x[0], x[1], x[2]) for x in rows]
 
         for view in db_views:
             assert view is not None
 
         return db_views
+
+    @classmethod
+    def identities_from_database(cls, sess, schema="%"):
+        """Get the identities of all views defined in the db, without their definitions"""
+        rows = sess.execute(_VIEW_IDENTITIES_QUERY, cls._schema_params(schema)).fetchall()
+        return [cls(x.schema_name, x.view_name, "").identity for x in rows]
+
+
+_VIEWS_QUERY = sql_text(
+    """
+    select
+        schemaname schema_name,
+        viewname view_name,
+        definition
+    from
+        pg_views
+    where
+        schemaname not in ('pg_catalog', 'information_schema')
+        and schemaname::text like any(cast(:schemas as text[]))
+    """
+)
+
+# ``pg_get_viewdef`` is only evaluated for the ``definition`` column of ``pg_views``
+_VIEW_IDENTITIES_QUERY = sql_text(
+    """
+    select
+        schemaname schema_name,
+        viewname view_name
+    from
+        pg_views
+    where
+        schemaname not in ('pg_catalog', 'information_schema')
+        and schemaname::text like any(cast(:schemas as text[]))
+    """
+)
@@ -0,0 +1,202 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+"""Instrumentation of the autogenerate pipeline
+
+Opt in from `env.py` to record, for each phase of `alembic revision --autogenerate` and
+for each registered entity, the wall time, SQL statements executed, savepoints opened and
+rows returned on the migration connection:
+
+    context.configure(
+        # ... other configurations ...
+        entity_profiling=True,  # or a path to also write the records as JSON
+    )
+
+A report of the slowest entities is logged once all comparators have run. Every record
+is also passed to the callbacks added with `register_profiling_callback`, and exported
+as a span when OpenTelemetry is installed.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+from alembic.autogenerate import comparators
+from alembic.autogenerate.api import AutogenContext
+from alembic.operations import ops
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover - optional dependency
+    trace = None  # type: ignore
+
+try:
+    from alembic.util.langhelpers import DispatchPriority
+except ImportError:  # pragma: no cover - Alembic < 1.18
+    DispatchPriority = None
+
+logger = logging.getLogger(__name__)
+
+# Phase wrapping everything autogenerate does for a single registered entity
+ENTITY_PHASE = "compare_entity"
+
+
+@dataclass
+class ProfileRecord:
+    """Resources used by one phase, optionally for a single *entity* identity"""
+
+    phase: str
+    entity: str | None
+    wall_time: float
+    statements: int
+    savepoints: int
+    rows: int
+
+
+_callbacks: list[Callable[[ProfileRecord], None]] = []
+
+
+def register_profiling_callback(callback: Callable[[ProfileRecord], None]) -> None:
+    """Call *callback* with every `ProfileRecord` completed while profiling is enabled"""
+    _callbacks.append(callback)
+
+
+def unregister_profiling_callback(callback: Callable[[ProfileRecord], None]) -> None:
+    _callbacks.remove(callback)
+
+
+class Profiler:
+    """Collects `ProfileRecord`s for one autogenerate run
+
+    A disabled profiler records nothing and adds no overhead beyond a function call
+    """
+
+    def __init__(self, connection: Connection | None, enabled: bool = True):
+        self.enabled = enabled and connection is not None
+        self.records: list[ProfileRecord] = []
+        self._connection = connection
+        self._statements = 0
+        self._savepoints = 0
+        self._rows = 0
+        self._tracer = trace.get_tracer(__name__) if trace is not None and self.enabled else None
+
+        if self.enabled:
+            event.listen(connection, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(connection, "savepoint", self._savepoint)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self._statements += 1
+        self._rows += max(cursor.rowcount, 0) if cursor.description is not None else 0
+
+    def _savepoint(self, conn, name) -> None:
+        self._savepoints += 1
+
+    @contextmanager
+    def phase(self, name: str, entity: str | None = None) -> Generator[None, None, None]:
+        """Record the resources used within the block as phase *name*, for *entity* if given"""
+        if not self.enabled:
+            yield
+            return
+
+        span = self._tracer.start_as_current_span(name, attributes={"entity": entity} if entity else None) if self._tracer else None
+        if span is not None:
+            span.__enter__()
+
+        start = (time.perf_counter(), self._statements, self._savepoints, self._rows)
+        try:
+            yield
+        finally:
+            record = ProfileRecord(
+                phase=name,
+                entity=entity,
+                wall_time=time.perf_counter() - start[0],
+                statements=self._statements - start[1],
+                savepoints=self._savepoints - start[2],
+                rows=self._rows - start[3],
+            )
+            self.records.append(record)
+            for callback in _callbacks:
+                callback(record)
+            if span is not None:
+                span.__exit__(None, None, None)
+
+    def slowest_entities(self, limit: int = 10) -> list[ProfileRecord]:
+        """The *limit* entities that took the longest to compare"""
+        entity_records = [x for x in self.records if x.phase == ENTITY_PHASE]
+        return sorted(entity_records, key=lambda x: x.wall_time, reverse=True)[:limit]
+
+    def report(self, limit: int = 10) -> str:
+        """A plain text report of the time spent per phase and the *limit* slowest entities
+
+        Phases nest, e.g. `get_database_definition` within `compare_entity`, so phase totals overlap
+        """
+        totals: dict[str, ProfileRecord] = {}
+        for record in self.records:
+            total = totals.setdefault(record.phase, ProfileRecord(record.phase, None, 0.0, 0, 0, 0))
+            total.wall_time += record.wall_time
+            total.statements += record.statements
+            total.savepoints += record.savepoints
+            total.rows += record.rows
+
+        lines = ["Phases:"]
+        lines.extend(_format_record(x, x.phase) for x in sorted(totals.values(), key=lambda x: x.wall_time, reverse=True))
+        lines.append(f"Slowest {limit} entities:")
+        lines.extend(_format_record(x, x.entity or "") for x in self.slowest_entities(limit))
+        return "\n".join(lines)
+
+    def dump(self, path: str | Path) -> None:
+        """Write every record to *path* as JSON"""
+        Path(path).write_text(json.dumps([asdict(x) for x in self.records], indent=2))
+
+    def close(self) -> None:
+        if self.enabled:
+            event.remove(self._connection, "after_cursor_execute", self._after_cursor_execute)
+            event.remove(self._connection, "savepoint", self._savepoint)
+            self.enabled = False
+
+
+def _format_record(record: ProfileRecord, label: str) -> str:
+    return f"  {record.wall_time:9.3f}s {record.statements:6d} statements {record.savepoints:5d} savepoints {record.rows:7d} rows  {label}"
+
+
+# One profiler per autogenerate run, shared by every comparator
+_profilers: weakref.WeakKeyDictionary[AutogenContext, Profiler] = weakref.WeakKeyDictionary()
+
+
+def get_profiler(autogen_context: AutogenContext) -> Profiler:
+    """The profiler for *autogen_context*'s run, enabled by the `entity_profiling` option"""
+    profiler = _profilers.get(autogen_context)
+    if profiler is None:
+        profiler = Profiler(autogen_context.connection, enabled=bool(autogen_context.opts.get("entity_profiling")))
+        _profilers[autogen_context] = profiler
+    return profiler
+
+
+def report_profile(
+    autogen_context: AutogenContext,
+    upgrade_ops: ops.UpgradeOps,
+    schemas: list[str | None],
+) -> None:
+    """Log the profile of the run once every other comparator has finished"""
+    profiler = _profilers.pop(autogen_context, None)
+    if profiler is None or not profiler.enabled:
+        return
+
+    profiler.close()
+    logger.info("Autogenerate profile\n%s", profiler.report())
+
+    option: Any = autogen_context.opts.get("entity_profiling")
+    if option is not True:
+        profiler.dump(option)
+
+
+# Alembic < 1.18 dispatches in registration order, and this module is imported before the
+# other comparators register: the package registers the reporter last instead
+if DispatchPriority is not None:
+    comparators.dispatch_for("schema", priority=DispatchPriority.LAST)(report_profile)
@@ -11,16 +11,32 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql.elements import TextClause
 
 import alembic_utils_extended
-from alembic_utils_extended.depends import solve_resolution_order
+from alembic_utils_extended.catalog import CatalogSnapshot
+from alembic_utils_extended.definition_cache import (
+    cache_keys,
+    database_fingerprint,
+    open_definition_cache,
+)
+from alembic_utils_extended.depends import (
+    _identifier_references,
+    solve_resolution_order,
+)
 from alembic_utils_extended.exceptions import UnreachableException
 from alembic_utils_extended.experimental import collect_subclasses
+from alembic_utils_extended.manifest import open_entity_manifest
+from alembic_utils_extended.profiling import ENTITY_PHASE, get_profiler
 from alembic_utils_extended.reversible_op import (
     CreateOp,
     DropOp,
     ReplaceOp,
     ReversibleOp,
 )
-from alembic_utils_extended.simulate import simulate_entity
+from alembic_utils_extended.simulate import (
+    has_uncommitted_changes,
+    simulate_entities,
+    simulate_entities_in_parallel,
+    simulate_entity,
+)
 from alembic_utils_extended.statement import (
     coerce_to_quoted,
     coerce_to_unquoted,
@@ -28,6 +44,17 @@ from alembic_utils_extended.statement import (
     normalize_whitespace,
     strip_terminating_semicolon,
 )
+from alembic_utils_extended.summary import (
+    CACHE,
+    CREATE,
+    DROP,
+    FAST_PATH,
+    MANIFEST,
+    NOOP,
+    REPLACE,
+    SIMULATION,
+    ComparisonSummary,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +64,9 @@ T = TypeVar("T", bound="ReplaceableEntity")
 class ReplaceableEntity:
     """A SQL Entity that can be replaced"""
 
+    # Does `from_database` also accept a list of schemas, read with a single catalog query
+    reflects_schema_lists = False
+
     def __init__(self, schema: str, signature: str, definition: str):
         self.schema: str = coerce_to_unquoted(normalize_whitespace(schema))
         self.signature: str = coerce_to_unquoted(normalize_whitespace(signature))
@@ -72,9 +102,26 @@ class ReplaceableEntity:
 
     @classmethod
     def from_database(cls, sess: Session, schema="%") -> list[T]:
-        """Collect existing entities from the database for given schema"""
+        """Collect existing entities from the database for given schema, a LIKE pattern.
+        Entity types with `reflects_schema_lists` also accept a list of them"""
         raise NotImplementedError()
 
+    @classmethod
+    def identities_from_database(cls, sess: Session, schema="%") -> list[str]:
+        """Identities of the existing entities for given schema, like `from_database`.
+        Entity types able to skip reading the definitions override it"""
+        entities: list[ReplaceableEntity] = cls.from_database(sess, schema=schema)
+        return [x.identity for x in entities]
+
+    @staticmethod
+    def _schema_params(schema: str | Iterable[str]) -> dict[str, list[str]]:
+        """Bind parameters of catalog queries filtering on ``like any(cast(:schemas as text[]))``
+
+        Every schema, or list of schemas, is read with the same statement text so that the
+        server can reuse its plan.
+        """
+        return {"schemas": [schema] if isinstance(schema, str) else sorted(schema)}
+
     def to_sql_statement_create(self) -> Generator[TextClause, None, None]:
         """Generates a SQL "create function" statement for PGFunction"""
         raise NotImplementedError()
@@ -94,16 +141,16 @@ class ReplaceableEntity:
             for stmt in self.to_sql_statement_drop():
                 sess.execute(stmt)
 
-            # collect all remaining entities
-            db_entities: list[T] = sorted(self.from_database(sess, schema=self.schema), key=lambda x: x.identity)
+            # collect all remaining entities, only their identities are compared
+            identities_without_self: list[str] = sorted(self.identities_from_database(sess, schema=self.schema))
 
         with simulate_entity(sess, self, dependencies) as sess:
             # collect all remaining entities
             all_w_self: list[T] = sorted(self.from_database(sess, schema=self.schema), key=lambda x: x.identity)
 
         # Find "self" by diffing the before and after
-        for without_self, with_self in zip_longest(db_entities, all_w_self):
-            if without_self is None or without_self.identity != with_self.identity:
+        for without_self, with_self in zip_longest(identities_without_self, all_w_self):
+            if without_self is None or without_self != with_self.identity:
                 return with_self
 
         raise UnreachableException()
@@ -144,27 +191,72 @@ class ReplaceableEntity:
 
     _version_to_replace: T | None = None  # type: ignore
 
-    def get_required_migration_op(self: T, sess: Session, dependencies: list["ReplaceableEntity"] | None = None) -> ReversibleOp | None:
-        """Get the migration operation required for autogenerate"""
-        # All entities in the database for self's schema
-        entities_in_database: list[T] = self.from_database(sess, schema=self.schema)
+    def matches_live_definition(self, live: "ReplaceableEntity") -> bool:
+        """Cheap check that self is already live as *live*, without simulating self
 
-        db_def = self.get_database_definition(sess, dependencies=dependencies)
+        True when self is declared exactly as postgres renders *live*, e.g. for entities
+        originally generated from the database. False is inconclusive: postgres may still
+        render self identically to *live*
+        """
+        return (
+            self.__class__ is live.__class__
+            and self.identity == live.identity
+            and normalize_whitespace(self.definition) == normalize_whitespace(live.definition)
+        )
 
-        for x in entities_in_database:
+    def find_live_match(
+        self, catalog: CatalogSnapshot, dependencies: list["ReplaceableEntity"] | None = None
+    ) -> "ReplaceableEntity | None":
+        """The live entity of *catalog* that self `matches_live_definition`, if any
 
-            if (db_def.identity, normalize_whitespace(db_def.definition)) == (
-                x.identity,
-                normalize_whitespace(x.definition),
-            ):
-                return None
+        None when self references any of *dependencies*, entities about to be created or
+        replaced: postgres may render self differently once they are
+        """
+        if not catalog.covers(self.__class__, self.schema):
+            return None
+        live = catalog.get(self.identity)
+        if live is None or not self.matches_live_definition(live):
+            return None
+        if dependencies and _identifier_references([self, *dependencies]).get(0):
+            return None
+        return live
+
+    def get_required_migration_op(
+        self: T,
+        sess: Session,
+        dependencies: list["ReplaceableEntity"] | None = None,
+        catalog: CatalogSnapshot | None = None,
+        database_definition: T | None = None,
+    ) -> ReversibleOp | None:
+        """Get the migration operation required for autogenerate
+
+        When a *catalog* snapshot covering self's type and schema is provided, the live
+        entity is looked up by identity instead of being re-read from the database, and
+        self is not simulated at all if it `matches_live_definition`.
+        When self's *database_definition* has already been rendered, e.g. by a batched
+        simulation, it is used as-is instead of simulating self again.
+        """
+        if database_definition is None and catalog is not None and self.find_live_match(catalog, dependencies) is not None:
+            return None
+
+        db_def = database_definition or self.get_database_definition(sess, dependencies=dependencies)
+
+        if catalog is not None and catalog.covers(self.__class__, self.schema):
+            live = catalog.get(db_def.identity)
+        else:
+            # All entities in the database for self's schema
+            entities_in_database: list[T] = self.from_database(sess, schema=self.schema)
+            live = next((x for x in entities_in_database if x.identity == db_def.identity), None)
+
+        if live is None:
+            return CreateOp(self)
 
-            if db_def.identity == x.identity:
-                # Cache the currently live copy to render a RevertOp without hitting DB again
-                self._version_to_replace = x
-                return ReplaceOp(self)
+        if normalize_whitespace(db_def.definition) == normalize_whitespace(live.definition):
+            return None
 
-        return CreateOp(self)
+        # Cache the currently live copy to render a RevertOp without hitting DB again
+        self._version_to_replace = live
+        return ReplaceOp(self)
 
 
 class ReplaceableEntityRegistry:
@@ -173,12 +265,15 @@ class ReplaceableEntityRegistry:
         self.schemas: set[str] = set()
         self.exclude_schemas: set[str] = set()
         self.entity_types: set[type[ReplaceableEntity]] = set()
+        # Populated by each `alembic revision --autogenerate`
+        self.last_summary: ComparisonSummary | None = None
 
     def clear(self):
         self._entities.clear()
         self.schemas.clear()
         self.exclude_schemas.clear()
         self.entity_types.clear()
+        self.last_summary = None
 
     def register(
         self,
@@ -271,29 +366,38 @@ def compare_registered_entities(
         )
     }
 
+    profiler = get_profiler(autogen_context)
+
+    # Parallel simulation workers can not see work left uncommitted by the migration connection.
+    # Checked before any simulation below writes in a savepoint
+    workers = autogen_context.opts.get("entity_simulation_workers") or 0
+    if workers > 1 and has_uncommitted_changes(connection):
+        logger.warning("Not simulating entities in parallel, the migration connection has uncommitted changes")
+        workers = 0
+
     # Solve resolution order
     transaction = connection.begin_nested()
     sess = Session(bind=connection)
     try:
-        ordered_entities: list[ReplaceableEntity] = solve_resolution_order(sess, entities)
+        with profiler.phase("solve_resolution_order"):
+            ordered_entities: list[ReplaceableEntity] = solve_resolution_order(sess, entities)
     finally:
         sess.rollback()
 
-    # entities that are receiving a create or update op
-    has_create_or_update_op: list[ReplaceableEntity] = []
-
-    # database rendered definitions for the entities we have a local instance for
-    # Note: used for drops
-    local_entities = []
+    # Reflect every live entity once up front. Op detection and drop detection answer
+    # from this snapshot rather than re-reading the catalog per entity and per schema
+    entity_types = [x for x in collect_subclasses(alembic_utils_extended, ReplaceableEntity) if x in registry.allowed_entity_types]
+    transaction = connection.begin_nested()
+    sess = Session(bind=connection)
+    try:
+        with profiler.phase("catalog_snapshot"):
+            catalog = CatalogSnapshot.from_database(sess, entity_types=entity_types, schemas=observed_schemas)
+    finally:
+        sess.rollback()
 
-    # Required migration OPs, Create/Update/NoOp
+    # Local entities to detect ops for, in resolution order
+    included_entities: list[ReplaceableEntity] = []
     for entity in ordered_entities:
-        logger.info(
-            "Detecting required migration op %s %s",
-            entity.__class__.__name__,
-            entity.identity,
-        )
-
         if entity.__class__ not in registry.allowed_entity_types:
             continue
 
@@ -305,91 +409,222 @@ def compare_registered_entities(
             )
             continue
 
+        included_entities.append(entity)
+
+    # Entities known to be up to date need no simulation, mapped by identity to their live
+    # entity and how they were found up to date
+    up_to_date: dict[str, tuple[ReplaceableEntity, str]] = {}
+
+    # Entities declared exactly as they are live
+    if autogen_context.opts.get("entity_fast_path_comparison"):
+        for entity in included_entities:
+            live = entity.find_live_match(catalog)
+            if live is not None:
+                up_to_date[entity.identity] = (live, FAST_PATH)
+        logger.info("%s of %s entities match their live definition", len(up_to_date), len(included_entities))
+
+    # Optionally reuse what previous runs learned about the entities
+    definition_cache = open_definition_cache(autogen_context)
+    manifest = open_entity_manifest(autogen_context)
+    keys: dict[str, str] = {}
+    if definition_cache is not None or manifest is not None:
         transaction = connection.begin_nested()
         sess = Session(bind=connection)
         try:
-            maybe_op = entity.get_required_migration_op(sess, dependencies=has_create_or_update_op)
+            with profiler.phase("cache_keys"):
+                keys = cache_keys(included_entities, database_fingerprint(sess, included_entities))
+        finally:
+            sess.rollback()
 
-            local_db_def = entity.get_database_definition(sess, dependencies=has_create_or_update_op)
-            local_entities.append(local_db_def)
+    # Entities found up to date by the previous run, when neither they, the local entities they
+    # reference, the database fingerprint nor their live definition changed since
+    if manifest is not None:
+        for entity in included_entities:
+            if entity.identity in up_to_date:
+                continue
+            live = manifest.find_up_to_date(entity.identity, keys[entity.identity], catalog)
+            if live is not None:
+                up_to_date[entity.identity] = (live, MANIFEST)
+        logger.info("%s of %s entities are unchanged since the last autogenerate", len(up_to_date), len(included_entities))
+
+    # Local entities that need a rendered definition
+    to_render = [x for x in included_entities if x.identity not in up_to_date]
+
+    # Optionally reuse rendered definitions from previous runs
+    cached: dict[str, ReplaceableEntity] = {}
+    if definition_cache is not None:
+        for entity in to_render:
+            hit = definition_cache.get(keys[entity.identity], entity)
+            if hit is not None:
+                cached[entity.identity] = hit
+
+        logger.info("Reusing %s of %s rendered definitions from %s", len(cached), len(to_render), definition_cache.path)
+
+    # Optionally render every included entity in a single savepoint up front
+    # Entities missing from the result are simulated individually below
+    rendered: dict[str, ReplaceableEntity | Exception] = dict(cached)
+    if autogen_context.opts.get("entity_batch_simulation") and len(cached) < len(to_render):
+        logger.info("Simulating %s entities in a single batch", len(to_render))
+        transaction = connection.begin_nested()
+        sess = Session(bind=connection)
+        try:
+            with profiler.phase("batch_simulation"):
+                rendered = {**simulate_entities(sess, to_render), **cached}
+        finally:
+            sess.rollback()
 
-            if maybe_op:
-                upgrade_ops.ops.append(maybe_op)
-                has_create_or_update_op.append(entity)
+    # Optionally simulate the remaining entities across a pool of connections
+    # Failures are raised below, in resolution order, as if simulated sequentially
+    # Entities found up to date are live as declared, only the others are created beforehand
+    remaining = [x for x in to_render if x.identity not in rendered]
+    if workers > 1 and remaining:
+        logger.info("Simulating %s entities across %s connections", len(remaining), workers)
+        with profiler.phase("parallel_simulation"):
+            rendered.update(simulate_entities_in_parallel(connection, remaining, workers, dependencies=to_render))
 
-                logger.info(
-                    "Detected %s op for %s %s",
-                    maybe_op.__class__.__name__,
-                    entity.__class__.__name__,
-                    entity.identity,
-                )
-            else:
-                logger.debug(
-                    "Detected NoOp op for %s %s",
-                    entity.__class__.__name__,
-                    entity.identity,
-                )
+    # entities that are receiving a create or update op
+    has_create_or_update_op: list[ReplaceableEntity] = []
 
-        except ProgrammingError as e:
-            if "UndefinedTable" in str(type(e.orig).__name__) or "does not exist" in str(e.orig):
-                logger.info(
-                    "Table for %s %s does not exist yet - assuming new table, creating entity",
-                    entity.__class__.__name__,
-                    entity.identity,
-                )
-                upgrade_ops.ops.append(CreateOp(entity))
-                has_create_or_update_op.append(entity)
-            else:
-                raise
-        finally:
-            sess.rollback()
+    # identities of the database rendered definitions for the entities we have a local instance for
+    # Note: used for drops
+    local_identities: set[str] = set()
+
+    # live entities that need no op, mapped by local identity
+    # Note: recorded in the manifest
+    noop_live_entities: dict[str, ReplaceableEntity] = {}
+
+    summary = ComparisonSummary()
+
+    # Indexes of the local entities each entity references. An entity found up to date is
+    # simulated after all when one of them receives a create or update op
+    references = _identifier_references(included_entities) if up_to_date else {}
+    changed_indexes: set[int] = set()
+
+    # Required migration OPs, Create/Update/NoOp
+    for index, entity in enumerate(included_entities):
+        if entity.identity in up_to_date and references.get(index, set()) & changed_indexes:
+            logger.info(
+                "Simulating %s %s, an entity it references is created or replaced",
+                entity.__class__.__name__,
+                entity.identity,
+            )
+        elif entity.identity in up_to_date:
+            live, rendering = up_to_date[entity.identity]
+            local_identities.add(live.identity)
+            noop_live_entities[entity.identity] = live
+            summary.record(entity.__class__.__name__, NOOP)
+            summary.record_rendering(rendering)
+            logger.debug(
+                "Detected NoOp op for %s %s without simulation",
+                entity.__class__.__name__,
+                entity.identity,
+            )
+            continue
+
+        logger.info(
+            "Detecting required migration op %s %s",
+            entity.__class__.__name__,
+            entity.identity,
+        )
+
+        with profiler.phase(ENTITY_PHASE, entity.identity):
+            transaction = connection.begin_nested()
+            sess = Session(bind=connection)
+            try:
+                local_db_def = rendered.get(entity.identity)
+                if local_db_def is None:
+                    with profiler.phase("get_database_definition", entity.identity):
+                        local_db_def = entity.get_database_definition(sess, dependencies=has_create_or_update_op)
+                summary.record_rendering(CACHE if entity.identity in cached else SIMULATION)
+                if isinstance(local_db_def, Exception):
+                    raise local_db_def
+                local_identities.add(local_db_def.identity)
+
+                if definition_cache is not None and entity.identity not in cached:
+                    definition_cache.put(keys[entity.identity], local_db_def)
+
+                with profiler.phase("get_required_migration_op", entity.identity):
+                    maybe_op = entity.get_required_migration_op(
+                        sess,
+                        dependencies=has_create_or_update_op,
+                        catalog=catalog,
+                        database_definition=local_db_def,
+                    )
+
+                if maybe_op:
+                    upgrade_ops.ops.append(maybe_op)
+                    has_create_or_update_op.append(entity)
+                    changed_indexes.add(index)
+                    summary.record(entity.__class__.__name__, CREATE if isinstance(maybe_op, CreateOp) else REPLACE)
+
+                    logger.info(
+                        "Detected %s op for %s %s",
+                        maybe_op.__class__.__name__,
+                        entity.__class__.__name__,
+                        entity.identity,
+                    )
+                else:
+                    noop_live_entities[entity.identity] = catalog.get(local_db_def.identity) or local_db_def
+                    summary.record(entity.__class__.__name__, NOOP)
+                    logger.debug(
+                        "Detected NoOp op for %s %s",
+                        entity.__class__.__name__,
+                        entity.identity,
+                    )
+
+            except ProgrammingError as e:
+                if "UndefinedTable" in str(type(e.orig).__name__) or "does not exist" in str(e.orig):
+                    logger.info(
+                        "Table for %s %s does not exist yet - assuming new table, creating entity",
+                        entity.__class__.__name__,
+                        entity.identity,
+                    )
+                    upgrade_ops.ops.append(CreateOp(entity))
+                    has_create_or_update_op.append(entity)
+                    changed_indexes.add(index)
+                    summary.record(entity.__class__.__name__, CREATE)
+                else:
+                    raise
+            finally:
+                sess.rollback()
+
+    if definition_cache is not None:
+        definition_cache.save()
+
+    if manifest is not None:
+        manifest.replace({identity: (keys[identity], live) for identity, live in noop_live_entities.items()})
+        manifest.save()
 
     # Required migration OPs, Drop
-    # Start a parent transaction
-    # Bind the session within the parent transaction
-    transaction = connection.begin_nested()
-    sess = Session(bind=connection)
-    try:
-        # All database entities currently live
-        # Check if anything needs to drop
-        subclasses = collect_subclasses(alembic_utils_extended, ReplaceableEntity)
-        for entity_class in subclasses:
+    # All database entities currently live, within the observed schemas
+    with profiler.phase("drop_scan"):
+        for db_entity in catalog.entities():
+
+            if not include_entity(db_entity, autogen_context, reflected=True):
+                logger.debug(
+                    "Ignoring remote entity %s %s due to AutogenContext filters",
+                    db_entity.__class__.__name__,
+                    db_entity.identity,
+                )
+                continue
 
-            if entity_class not in registry.allowed_entity_types:
+            # Check for entities that were deleted locally
+            if db_entity.identity in local_identities:
                 continue
 
-            # Entities within the schemas that are live
-            for schema in observed_schemas:
-
-                db_entities: list[ReplaceableEntity] = entity_class.from_database(sess, schema=schema)
-
-                # Check for functions that were deleted locally
-                for db_entity in db_entities:
-
-                    if not include_entity(db_entity, autogen_context, reflected=True):
-                        logger.debug(
-                            "Ignoring remote entity %s %s due to AutogenContext filters",
-                            db_entity.__class__.__name__,
-                            db_entity.identity,
-                        )
-                        continue
-
-                    for local_entity in local_entities:
-                        if db_entity.identity == local_entity.identity:
-                            break
-                    else:
-                        # No match was found locally
-                        # If the entity passes the filters,
-                        # we should create a DropOp
-                        upgrade_ops.ops.append(DropOp(db_entity))
-                        logger.info(
-                            "Detected DropOp op for %s %s",
-                            db_entity.__class__.__name__,
-                            db_entity.identity,
-                        )
+            # No match was found locally
+            # If the entity passes the filters,
+            # we should create a DropOp
+            upgrade_ops.ops.append(DropOp(db_entity))
+            summary.record(db_entity.__class__.__name__, DROP)
+            logger.info(
+                "Detected DropOp op for %s %s",
+                db_entity.__class__.__name__,
+                db_entity.identity,
+            )
 
-    finally:
-        sess.rollback()
+    registry.last_summary = summary
+    logger.info("Entity comparison summary: %s", summary)
 
 
 def include_entity(entity: ReplaceableEntity, autogen_context: AutogenContext, reflected: bool) -> bool:
@@ -1,9 +1,14 @@
 # pylint: disable=unused-argument,invalid-name,line-too-long
 import copy
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import ExitStack, contextmanager
 from typing import TYPE_CHECKING
 
+from sqlalchemy import exc as sqla_exc
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
 
 if TYPE_CHECKING:
@@ -23,12 +28,7 @@ def simulate_entity(
     can be retrieved
     """
 
-    # When simulating materialized view, don't populate them with data
-    from alembic_utils_extended.pg_materialized_view import PGMaterializedView
-
-    if isinstance(entity, PGMaterializedView) and entity.with_data:
-        entity = copy.deepcopy(entity)
-        entity.with_data = False
+    entity = _without_data(entity)
 
     deps: list["ReplaceableEntity"] = dependencies or []
 
@@ -72,3 +72,164 @@ def simulate_entity(
                 inner_transaction.rollback()
     finally:
         outer_transaction.rollback()
+
+
+def simulate_entities(sess: Session, entities: list["ReplaceableEntity"]) -> dict[str, "ReplaceableEntity"]:
+    """Creates all *entities* in a single transaction and collects their postgres
+    rendered definitions with one catalog read per entity type
+
+    *entities* are expected in resolution order. Returns a mapping of each local
+    entity's identity to its rendered definition. Entities that fail to create, or
+    whose rendered definition can not be attributed to them unambiguously, are
+    omitted so the caller can fall back to `ReplaceableEntity.get_database_definition`
+    which reports errors the same way it always has.
+    """
+    from alembic_utils_extended.catalog import CatalogSnapshot
+
+    rendered: dict[str, "ReplaceableEntity"] = {}
+
+    outer_transaction = sess.begin_nested()
+    try:
+        # Drop everything up front, dependents first, so that cascades can not remove
+        # an entity that was already recreated
+        for entity in reversed(entities):
+            _execute_in_savepoint(sess, entity.to_sql_statement_drop(cascade=True))
+
+        created = [entity for entity in entities if _execute_in_savepoint(sess, _without_data(entity).to_sql_statement_create())]
+
+        if not created:
+            return rendered
+
+        catalog = CatalogSnapshot.from_database(
+            sess,
+            entity_types={x.__class__ for x in created},
+            schemas={x.schema for x in created},
+        )
+
+        unmatched = []
+        for entity in created:
+            db_def = catalog.get(entity.identity)
+            if db_def is None:
+                unmatched.append(entity)
+            else:
+                rendered[entity.identity] = db_def
+
+        # Postgres may render an entity's signature differently than it was declared e.g. function
+        # argument defaults. Attribute those by name when exactly one candidate remains
+        claimed = {x.identity for x in rendered.values()}
+
+        unmatched_by_name = defaultdict(list)
+        for entity in unmatched:
+            unmatched_by_name[_name_key(entity)].append(entity)
+
+        candidates_by_name = defaultdict(list)
+        for db_def in catalog.entities():
+            if db_def.identity not in claimed:
+                candidates_by_name[_name_key(db_def)].append(db_def)
+
+        for key, local_entities in unmatched_by_name.items():
+            candidates = candidates_by_name.get(key, [])
+            if len(local_entities) == 1 and len(candidates) == 1:
+                rendered[local_entities[0].identity] = candidates[0]
+            else:
+                logger.debug("Could not attribute a rendered definition to %s", [x.identity for x in local_entities])
+
+    finally:
+        outer_transaction.rollback()
+
+    return rendered
+
+
+def simulate_entities_in_parallel(
+    connection: Connection,
+    entities: list["ReplaceableEntity"],
+    workers: int,
+    dependencies: list["ReplaceableEntity"] | None = None,
+) -> dict[str, "ReplaceableEntity | sqla_exc.SQLAlchemyError"]:
+    """Collects the postgres rendered definition of each of *entities* across *workers*
+    database connections
+
+    Each worker opens its own connection from the engine of *connection* and adopts its
+    `search_path` and role, which the rendered definitions depend on. It creates all
+    *dependencies* (defaults to *entities*, in resolution order) so that any of them is
+    available, then simulates its share of *entities* individually. All work is rolled back.
+    Workers only see committed database state, see `has_uncommitted_changes`.
+
+    Returns a mapping of each entity's identity to its rendered definition, or to the
+    database error simulating it raised so the caller can handle it in resolution order.
+    """
+    deps: list["ReplaceableEntity"] = entities if dependencies is None else dependencies
+    workers = max(1, min(workers, len(entities)))
+    shares = [entities[x::workers] for x in range(workers)]
+    settings = connection.execute(_SESSION_SETTINGS_QUERY).one()
+
+    def simulate_share(share: list["ReplaceableEntity"]) -> dict[str, "ReplaceableEntity | sqla_exc.SQLAlchemyError"]:
+        results: dict[str, "ReplaceableEntity | sqla_exc.SQLAlchemyError"] = {}
+        with connection.engine.connect() as worker_connection:
+            transaction = worker_connection.begin()
+            sess = Session(bind=worker_connection)
+            try:
+                sess.execute(_APPLY_SESSION_SETTINGS, {"search_path": settings.search_path, "role": settings.role})
+                for entity in reversed(deps):
+                    _execute_in_savepoint(sess, entity.to_sql_statement_drop(cascade=True))
+                for entity in deps:
+                    _execute_in_savepoint(sess, _without_data(entity).to_sql_statement_create())
+
+                for entity in share:
+                    try:
+                        results[entity.identity] = entity.get_database_definition(sess)
+                    except sqla_exc.SQLAlchemyError as exc:
+                        results[entity.identity] = exc
+            finally:
+                sess.close()
+                transaction.rollback()
+        return results
+
+    rendered: dict[str, "ReplaceableEntity | sqla_exc.SQLAlchemyError"] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(simulate_share, shares):
+            rendered.update(results)
+    return rendered
+
+
+def has_uncommitted_changes(connection: Connection) -> bool:
+    """Has the transaction of *connection* written anything, which other connections can not see"""
+    return bool(connection.execute(_HAS_TRANSACTION_ID_QUERY).scalar())
+
+
+_SESSION_SETTINGS_QUERY = text("select current_setting('search_path') as search_path, current_setting('role') as role")
+
+# Local to the worker's transaction, which is rolled back
+_APPLY_SESSION_SETTINGS = text("select set_config('search_path', :search_path, true), set_config('role', :role, true)")
+
+# A transaction holds a lock on its own id once it has written anything, even in a savepoint
+_HAS_TRANSACTION_ID_QUERY = text(
+    "select exists (select 1 from pg_locks where pid = pg_backend_pid() and locktype = 'transactionid' and granted)"
+)
+
+
+def _without_data(entity: "ReplaceableEntity") -> "ReplaceableEntity":
+    """When simulating materialized view, don't populate them with data"""
+    from alembic_utils_extended.pg_materialized_view import PGMaterializedView
+
+    if isinstance(entity, PGMaterializedView) and entity.with_data:
+        entity = copy.deepcopy(entity)
+        entity.with_data = False
+    return entity
+
+
+def _execute_in_savepoint(sess: Session, statements) -> bool:
+    """Execute *statements* in a savepoint, rolling back and returning False on error"""
+    transaction = sess.begin_nested()
+    try:
+        for stmt in statements:
+            sess.execute(stmt)
+    except sqla_exc.DBAPIError:
+        transaction.rollback()
+        return False
+    transaction.commit()
+    return True
+
+
+def _name_key(entity: "ReplaceableEntity") -> tuple[type, str, str]:
+    return entity.__class__, entity.schema, entity.signature.split("(")[0].strip()
@@ -0,0 +1,76 @@
+# pylint: disable=unused-argument,invalid-name,line-too-long
+from collections import Counter, defaultdict
+
+CREATE = "create"
+REPLACE = "replace"
+DROP = "drop"
+NOOP = "noop"
+
+CLASSIFICATIONS = (CREATE, REPLACE, DROP, NOOP)
+
+# How the rendered definition of a local entity was obtained
+FAST_PATH = "fast_path"
+MANIFEST = "manifest"
+CACHE = "cache"
+SIMULATION = "simulation"
+
+RENDERINGS = (FAST_PATH, MANIFEST, CACHE, SIMULATION)
+
+
+class ComparisonSummary:
+    """Counts of the migration op detected for each entity during `alembic revision --autogenerate`
+
+    The most recent summary is available as `registry.last_summary` once autogenerate completes
+
+        from alembic_utils_extended.replaceable_entity import registry
+
+        summary = registry.last_summary
+        summary.count("create")            # every entity receiving a CreateOp
+        summary.count("drop", "PGGrantTable")
+        summary.as_dict()                  # {"PGView": {"create": 1, "replace": 0, "drop": 0, "noop": 3}, ...}
+        summary.renderings                 # Counter({"fast_path": 3, "simulation": 1})
+    """
+
+    def __init__(self):
+        self._counts: dict[str, Counter[str]] = defaultdict(Counter)
+        self.renderings: Counter[str] = Counter()
+
+    def record(self, entity_type: str, classification: str) -> None:
+        """Count one *entity_type* entity classified as *classification*"""
+        if classification not in CLASSIFICATIONS:
+            raise ValueError(f"Unknown classification {classification!r}, expected one of {CLASSIFICATIONS}")
+        self._counts[entity_type][classification] += 1
+
+    def record_rendering(self, rendering: str) -> None:
+        """Count one local entity whose rendered definition was obtained by *rendering*"""
+        if rendering not in RENDERINGS:
+            raise ValueError(f"Unknown rendering {rendering!r}, expected one of {RENDERINGS}")
+        self.renderings[rendering] += 1
+
+    def count(self, classification: str, entity_type: str | None = None) -> int:
+        """Number of entities classified as *classification*, optionally restricted to *entity_type*"""
+        if entity_type is not None:
+            return self._counts.get(entity_type, Counter())[classification]
+        return sum(counts[classification] for counts in self._counts.values())
+
+    @property
+    def entity_types(self) -> list[str]:
+        return sorted(self._counts)
+
+    def as_dict(self) -> dict[str, dict[str, int]]:
+        """Counts per entity type and classification, including zeros"""
+        return {entity_type: {x: self._counts[entity_type][x] for x in CLASSIFICATIONS} for entity_type in self.entity_types}
+
+    def __str__(self) -> str:
+        if not self._counts:
+            return "no entities compared"
+        counts = "; ".join(
+            f"{entity_type}: " + ", ".join(f"{self._counts[entity_type][x]} {x}" for x in CLASSIFICATIONS)
+            for entity_type in self.entity_types
+        )
+        if not self.renderings:
+            return counts
+        return f"{counts} (rendered by " + ", ".join(f"{x} {self.renderings[x]}" for x in RENDERINGS) + ")"
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.as_dict()!r})"
@@ -44,6 +44,7 @@ def run_alembic_command(
     compare_check_constraints: bool = False,
     compare_indexes: bool = False,
     compare_tables: bool = False,
+    context_opts: dict[str, Any] | None = None,
 ) -> str:
     command_func = ALEMBIC_COMMAND_MAP[command]
 
@@ -60,6 +61,8 @@ def run_alembic_command(
             alembic_cfg.attributes["compare_indexes"] = compare_indexes
         if compare_tables:
             alembic_cfg.attributes["compare_tables"] = compare_tables
+        if context_opts:
+            alembic_cfg.attributes["context_opts"] = context_opts
         with contextlib.redirect_stdout(stdout):
             command_func(alembic_cfg, **command_kwargs)
     return stdout.getvalue()
@@ -20,6 +20,8 @@ compare_indexes = config.attributes.get("compare_indexes", False)
 # where an entity depends on a net-new column). Off by default so the rest of the
 # suite stays isolated from stock table diffing of raw-SQL scaffolding tables.
 compare_tables = config.attributes.get("compare_tables", False)
+# Additional options passed through to context.configure, e.g. entity_batch_simulation
+context_opts = config.attributes.get("context_opts", {})
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -73,6 +75,7 @@ def run_migrations_online():
             include_name=include_name,
             compare_check_constraints=compare_check_constraints,
             compare_indexes=compare_indexes,
+            **context_opts,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,44 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from alembic_utils_extended.capabilities import (
+    _INFO_KEY,
+    CAPABILITIES_QUERY,
+    get_server_capabilities,
+)
+from alembic_utils_extended.pg_function import PGFunction
+
+TO_UPPER = PGFunction(
+    schema="public",
+    signature="to_upper(some_text text)",
+    definition="returns text as $$ select upper(some_text) $$ language sql",
+)
+
+
+def test_capabilities_probed_once_per_connection(engine) -> None:
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with engine.begin() as connection:
+            connection.execute(next(TO_UPPER.to_sql_statement_create()))
+            # Pooled connections keep their info between tests
+            connection.info.pop(_INFO_KEY, None)
+            sess = Session(bind=connection)
+
+            capabilities = get_server_capabilities(sess)
+            for _ in range(3):
+                assert [x.identity for x in PGFunction.from_database(sess, "public")] == [TO_UPPER.identity]
+                assert [x.identity for x in PGFunction.from_database(connection, "%")] == [TO_UPPER.identity]
+            assert get_server_capabilities(connection) is capabilities
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert statements.count(CAPABILITIES_QUERY.text) == 1
+    assert not any("server_version_num" in x and x != CAPABILITIES_QUERY.text for x in statements)
+    assert capabilities.server_version_num >= 110000
+    assert capabilities.has_prokind
+    assert {"prokind", "proname"} <= capabilities.pg_proc_columns
@@ -0,0 +1,214 @@
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from alembic_utils_extended.capabilities import get_server_capabilities
+from alembic_utils_extended.catalog import CatalogSnapshot
+from alembic_utils_extended.pg_extension import PGExtension
+from alembic_utils_extended.pg_function import PGFunction
+from alembic_utils_extended.pg_grant_table import PGGrantTable
+from alembic_utils_extended.pg_materialized_view import PGMaterializedView
+from alembic_utils_extended.pg_policy import PGPolicy
+from alembic_utils_extended.pg_trigger import PGTrigger
+from alembic_utils_extended.pg_view import PGView
+from alembic_utils_extended.replaceable_entity import (
+    ReplaceableEntity,
+    register_entities,
+    registry,
+)
+from alembic_utils_extended.summary import FAST_PATH
+from alembic_utils_extended.testbase import (
+    TEST_VERSIONS_ROOT,
+    run_alembic_command,
+)
+
+PUBLIC_VIEW = PGView(schema="public", signature="public_view", definition="select 1 as one")
+
+DEV_VIEW = PGView(schema="DEV", signature="dev_view", definition="select 1 as one")
+
+TO_LOWER = PGFunction(
+    schema="DEV",
+    signature="to_lower(some_text text)",
+    definition="returns text as $$ select lower(some_text) $$ language sql",
+)
+
+
+def test_snapshot_indexes_by_identity(sess: Session, execute_all) -> None:
+    for entity in [PUBLIC_VIEW, DEV_VIEW, TO_LOWER]:
+        execute_all(sess, entity.to_sql_statement_create())
+
+    catalog = CatalogSnapshot.from_database(sess, entity_types=[PGView, PGFunction], schemas=["public", "DEV"])
+
+    assert len(catalog) == 3
+    assert PUBLIC_VIEW.identity in catalog
+    assert DEV_VIEW.identity in catalog
+    dev_view = catalog.get(DEV_VIEW.identity)
+    assert dev_view is not None
+    assert dev_view.schema == "DEV"
+    assert {x.identity for x in catalog.entities(PGView)} == {PUBLIC_VIEW.identity, DEV_VIEW.identity}
+    assert [x.schema for x in catalog.entities(PGFunction)] == ["DEV"]
+
+
+def test_snapshot_restricted_to_schemas(sess: Session, execute_all) -> None:
+    for entity in [PUBLIC_VIEW, DEV_VIEW]:
+        execute_all(sess, entity.to_sql_statement_create())
+
+    catalog = CatalogSnapshot.from_database(sess, entity_types=[PGView], schemas=["DEV"])
+
+    assert [x.identity for x in catalog.entities()] == [DEV_VIEW.identity]
+    assert catalog.covers(PGView, "DEV")
+    assert not catalog.covers(PGView, "public")
+    assert not catalog.covers(PGFunction, "DEV")
+
+
+def test_revision_reads_catalog_once_per_type(engine, execute_all, monkeypatch) -> None:
+    with engine.begin() as connection:
+        execute_all(connection, DEV_VIEW.to_sql_statement_create())
+
+    calls: list[str | list[str]] = []
+    original = PGView.from_database.__func__  # type: ignore
+
+    def counting_from_database(cls, sess, schema="%"):
+        calls.append(schema)
+        return original(cls, sess, schema)
+
+    monkeypatch.setattr(PGView, "from_database", classmethod(counting_from_database))
+
+    register_entities([PUBLIC_VIEW], entity_types=[PGView])
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "create"},
+    )
+
+    with (TEST_VERSIONS_ROOT / "1_create.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    assert migration_contents.count("op.create_entity") == 2
+    assert migration_contents.count("op.drop_entity") == 2
+
+    # One snapshot read, the rest are from simulating PUBLIC_VIEW
+    assert calls.count(["DEV", "public"]) == 1
+    assert "%" not in calls
+    assert "DEV" not in calls
+
+
+def test_fast_path_skips_simulation(engine, execute_all, monkeypatch) -> None:
+    with engine.begin() as connection:
+        execute_all(connection, PUBLIC_VIEW.to_sql_statement_create())
+        execute_all(connection, TO_LOWER.to_sql_statement_create())
+        # Entities generated from the database are declared exactly as they are live
+        reflected = PGView.from_database(connection, "public") + PGFunction.from_database(connection, "DEV")
+
+    def fail_simulation(*args, **kwargs):
+        raise AssertionError("Entities matching their live definition should not be simulated")
+
+    monkeypatch.setattr(PGView, "get_database_definition", fail_simulation)
+    monkeypatch.setattr(PGFunction, "get_database_definition", fail_simulation)
+
+    register_entities(reflected, entity_types=[PGView, PGFunction])
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "fast"},
+        context_opts={"entity_fast_path_comparison": True},
+    )
+
+    with (TEST_VERSIONS_ROOT / "1_fast.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    assert "op.create_entity" not in migration_contents
+    assert "op.replace_entity" not in migration_contents
+    assert "op.drop_entity" not in migration_contents
+
+    summary = registry.last_summary
+    assert summary is not None
+    assert summary.count("noop") == 2
+    assert summary.renderings == {"fast_path": 2}
+
+
+def test_fast_path_inconclusive_falls_back_to_simulation(engine, execute_all) -> None:
+    with engine.begin() as connection:
+        execute_all(connection, PUBLIC_VIEW.to_sql_statement_create())
+
+    # Not declared as postgres renders it, but equivalent
+    register_entities([PUBLIC_VIEW], entity_types=[PGView])
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "slow"},
+        context_opts={"entity_fast_path_comparison": True},
+    )
+
+    summary = registry.last_summary
+    assert summary is not None
+    assert summary.count("noop") == 1
+    assert summary.renderings == {"simulation": 1}
+
+
+def test_fast_path_rechecks_entities_referencing_changed_entities(engine, execute_all) -> None:
+    base_view = PGView(schema="public", signature="base_view", definition="select 1 as one")
+    with engine.begin() as connection:
+        execute_all(connection, base_view.to_sql_statement_create())
+        execute_all(
+            connection,
+            PGView(schema="public", signature="dependent_view", definition="select one from base_view").to_sql_statement_create(),
+        )
+        dependent_view = next(x for x in PGView.from_database(connection, "public") if x.signature == "dependent_view")
+
+    # The column dependent_view selects is renamed
+    renamed_base_view = PGView(schema="public", signature="base_view", definition="select 1 as uno")
+    register_entities([renamed_base_view, dependent_view], entity_types=[PGView])
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "recheck"},
+        context_opts={"entity_fast_path_comparison": True},
+    )
+
+    with (TEST_VERSIONS_ROOT / "1_recheck.py").open() as migration_file:
+        upgrade = migration_file.read().split("def downgrade")[0]
+
+    # Simulated again, dependent_view fails to create on the renamed column
+    assert "public_dependent_view = PGView" in upgrade
+    summary = registry.last_summary
+    assert summary is not None
+    assert summary.count("noop") == 0
+    assert FAST_PATH not in summary.renderings
+
+
+def test_catalog_queries_bind_their_schemas(engine) -> None:
+    entity_types: list[type[ReplaceableEntity]] = [PGExtension, PGFunction, PGGrantTable, PGMaterializedView, PGPolicy, PGTrigger, PGView]
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with engine.begin() as connection:
+        connection.execute(text("""create schema "it's"; create view "it's".quoted as select 1 as one"""))
+    try:
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            with engine.connect() as connection:
+                get_server_capabilities(connection)
+                calls = []
+                for schema in ["it's", "public", ["DEV", "it's", "public"]]:
+                    statements.clear()
+                    reflected: dict[str, list[ReplaceableEntity]] = {x.__name__: x.from_database(connection, schema) for x in entity_types}
+                    calls.append((list(statements), reflected))
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text("""drop schema "it's" cascade"""))
+
+    # The same statements, whatever the schemas
+    assert calls[0][0] == calls[1][0] == calls[2][0]
+    assert not any("it's" in x for x in calls[0][0])
+
+    assert [x.identity for x in calls[0][1]["PGView"]] == ["PGView: it's.quoted"]
+    assert calls[1][1]["PGView"] == []
+    assert [x.identity for x in calls[2][1]["PGView"]] == ["PGView: it's.quoted"]
@@ -0,0 +1,145 @@
+import json
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+
+from alembic_utils_extended.definition_cache import (
+    DefinitionCache,
+    database_fingerprint,
+    main,
+)
+from alembic_utils_extended.pg_function import PGFunction
+from alembic_utils_extended.pg_view import PGView
+from alembic_utils_extended.replaceable_entity import (
+    ReplaceableEntity,
+    register_entities,
+)
+from alembic_utils_extended.testbase import (
+    TEST_VERSIONS_ROOT,
+    run_alembic_command,
+)
+
+TEST_VIEW = PGView(schema="public", signature="some_view", definition="select 1 as one")
+
+TEST_DEPENDENT_VIEW = PGView(schema="public", signature="dependent_view", definition="select * from public.some_view")
+
+TO_UPPER = PGFunction(
+    schema="public",
+    signature="toUpper(some_text text default 'my text!')",
+    definition="returns text as $$ select upper(some_text) $$ language sql",
+)
+
+
+def run_revision(engine, cache_path, rev_id: str) -> str:
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": rev_id, "message": "cached"},
+        context_opts={"entity_definition_cache": str(cache_path)},
+    )
+    with (TEST_VERSIONS_ROOT / f"{rev_id}_cached.py").open() as migration_file:
+        return migration_file.read()
+
+
+def test_cache_hit_skips_simulation(engine, tmp_path, execute_all, monkeypatch) -> None:
+    cache_path = tmp_path / "cache.json"
+    with engine.begin() as connection:
+        execute_all(connection, TEST_VIEW.to_sql_statement_create())
+
+    register_entities([TEST_VIEW, TEST_DEPENDENT_VIEW, TO_UPPER])
+
+    first = run_revision(engine, cache_path, "1")
+    assert first.count("op.create_entity") == 2
+    assert len(DefinitionCache(cache_path)) == 3
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
+
+    def fail_simulation(*args, **kwargs):
+        raise AssertionError("Cached entities should not be simulated")
+
+    monkeypatch.setattr(ReplaceableEntity, "get_database_definition", fail_simulation)
+
+    second = run_revision(engine, cache_path, "2")
+
+    assert "op.create_entity" not in second
+    assert "op.replace_entity" not in second
+    assert "op.drop_entity" not in second
+
+
+def test_cache_miss_on_changed_dependency(engine, tmp_path) -> None:
+    cache_path = tmp_path / "cache.json"
+    register_entities([TEST_VIEW, TEST_DEPENDENT_VIEW])
+    run_revision(engine, cache_path, "1")
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
+
+    # The dependent view's rendering changes with the view it selects from
+    updated_view = PGView(schema="public", signature="some_view", definition="select 1 as one, 2 as two")
+    register_entities([updated_view])
+    migration_contents = run_revision(engine, cache_path, "2")
+    assert migration_contents.count("op.replace_entity") == 4
+
+    # Both views were rendered again under new keys
+    cache = DefinitionCache(cache_path)
+    assert len(cache) == 4
+    # Nothing has been used since opening
+    assert cache.prune() == 4
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        "create view public.other_view as select 1 as one",
+        "create type public.mood as enum ('sad', 'ok')",
+        "create schema unobserved; create function unobserved.helper() returns int as $$ select 1 $$ language sql",
+    ],
+)
+def test_fingerprint_covers_views_types_and_other_schemas(sess, change: str) -> None:
+    before = database_fingerprint(sess)
+    sess.execute(text(change))
+    assert database_fingerprint(sess) != before
+
+
+def test_prune_by_age(tmp_path) -> None:
+    cache = DefinitionCache(tmp_path / "cache.json")
+    cache.put("fresh", TEST_VIEW)
+    cache.put("stale", TEST_VIEW)
+    cache._entries["stale"]["last_used"] = "2000-01-01T00:00:00+00:00"
+    cache.save()
+
+    reloaded = DefinitionCache(tmp_path / "cache.json")
+    assert reloaded.prune(max_age=timedelta(days=1)) == 1
+    fresh = reloaded.get("fresh", TEST_VIEW)
+    assert fresh is not None
+    assert fresh.identity == TEST_VIEW.identity
+    assert reloaded.get("stale", TEST_VIEW) is None
+    assert (reloaded.hits, reloaded.misses) == (1, 1)
+
+
+def test_unreadable_cache_is_ignored(tmp_path) -> None:
+    cache_path = tmp_path / "cache.json"
+    cache_path.write_text("{not json")
+
+    cache = DefinitionCache(cache_path)
+    assert len(cache) == 0
+
+    cache.put("key", TEST_VIEW)
+    cache.save()
+    assert json.loads(cache_path.read_text())["version"] == DefinitionCache.format_version
+
+
+def test_cli(tmp_path, capsys) -> None:
+    cache_path = tmp_path / "cache.json"
+    cache = DefinitionCache(cache_path)
+    cache.put("key", TEST_VIEW)
+    cache.save()
+
+    main(["prune", str(cache_path), "--max-age-days", "1"])
+    assert "Removed 0 entries, 1 remaining" in capsys.readouterr().out
+
+    main(["clear", str(cache_path)])
+    assert "Removed 1 entries" in capsys.readouterr().out
+    assert len(DefinitionCache(cache_path)) == 0
+
+    with pytest.raises(SystemExit):
+        main(["unknown"])
@@ -1,6 +1,11 @@
 import pytest
 
-from alembic_utils_extended.depends import solve_resolution_order
+from alembic_utils_extended.depends import (
+    _topological_sort,
+    solve_resolution_order,
+)
+from alembic_utils_extended.pg_function import PGFunction
+from alembic_utils_extended.pg_trigger import PGTrigger
 from alembic_utils_extended.pg_view import PGView
 from alembic_utils_extended.replaceable_entity import register_entities
 from alembic_utils_extended.testbase import (
@@ -83,3 +88,59 @@ def test_create_revision(engine) -> None:
     run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
     # Execute Downgrade
     run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"})
+
+
+VIEW_COUNT = PGFunction(
+    schema="public",
+    signature="a_view_count()",
+    definition='returns bigint as $$ select count(*) from public."A_view" $$ language sql',
+)
+
+TRIG_FUNC = PGFunction(
+    schema="public",
+    signature="noop_trigger()",
+    definition="returns trigger as $$ begin return new; end; $$ language plpgsql",
+)
+
+INSTEAD_OF_TRIG = PGTrigger(
+    schema="public",
+    signature="insert_a_view",
+    on_entity='public."A_view"',
+    definition='INSTEAD OF INSERT ON public."A_view" FOR EACH ROW EXECUTE PROCEDURE public.noop_trigger()',
+)
+
+
+def test_solve_resolution_order_mixed_types(sess) -> None:
+    solution = solve_resolution_order(sess, [INSTEAD_OF_TRIG, VIEW_COUNT, TRIG_FUNC, A])
+
+    assert solution.index(A) < solution.index(VIEW_COUNT)
+    assert solution.index(A) < solution.index(INSTEAD_OF_TRIG)
+    assert solution.index(TRIG_FUNC) < solution.index(INSTEAD_OF_TRIG)
+
+
+def test_solve_resolution_order_without_simulation(sess, monkeypatch) -> None:
+    def fail_simulation(*args, **kwargs):
+        raise AssertionError("Graph resolvable entities should not be simulated")
+
+    monkeypatch.setattr("alembic_utils_extended.depends.simulate_entity", fail_simulation)
+
+    solution = solve_resolution_order(sess, [E_AD, D_B, C_A, B_A, A])
+
+    # Ties are broken by input order
+    assert solution == [A, C_A, B_A, D_B, E_AD]
+
+
+def test_solve_resolution_order_falls_back_for_unplaced(sess) -> None:
+    # Depends on a view that is never created, so the graph can not place it
+    missing_dependency = PGView(schema="public", signature="missing_dep", definition='select * from public."Z_view"')
+
+    solution = solve_resolution_order(sess, [missing_dependency, B_A, A])
+
+    assert solution == [A, B_A, missing_dependency]
+
+
+def test_topological_sort_reports_cycles() -> None:
+    ordered, cyclic = _topological_sort(["a", "b", "c", "d"], {0: {1}, 1: {0}, 2: {3}})
+
+    assert ordered == ["d", "c"]
+    assert cyclic == ["a", "b"]
@@ -0,0 +1,99 @@
+import json
+
+from alembic_utils_extended.manifest import EntityManifest
+from alembic_utils_extended.pg_function import PGFunction
+from alembic_utils_extended.pg_view import PGView
+from alembic_utils_extended.replaceable_entity import (
+    ReplaceableEntity,
+    register_entities,
+    registry,
+)
+from alembic_utils_extended.testbase import (
+    TEST_VERSIONS_ROOT,
+    run_alembic_command,
+)
+
+TEST_VIEW = PGView(schema="public", signature="some_view", definition="select 1 as one")
+
+TEST_DEPENDENT_VIEW = PGView(schema="public", signature="dependent_view", definition="select * from public.some_view")
+
+TO_UPPER = PGFunction(
+    schema="public",
+    signature="toUpper(some_text text default 'my text!')",
+    definition="returns text as $$ select upper(some_text) $$ language sql",
+)
+
+
+def run_revision(engine, manifest_path, rev_id: str) -> str:
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": rev_id, "message": "incremental"},
+        context_opts={"entity_incremental_manifest": str(manifest_path)},
+    )
+    with (TEST_VERSIONS_ROOT / f"{rev_id}_incremental.py").open() as migration_file:
+        return migration_file.read()
+
+
+def setup_up_to_date(engine, manifest_path) -> None:
+    """Create the registered entities and record them in the manifest"""
+    register_entities([TEST_VIEW, TEST_DEPENDENT_VIEW, TO_UPPER])
+    run_revision(engine, manifest_path, "1")
+    # Entities receiving ops are not recorded
+    assert len(EntityManifest(manifest_path)) == 0
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
+    migration_contents = run_revision(engine, manifest_path, "2")
+    assert "op.create_entity" not in migration_contents
+    assert len(EntityManifest(manifest_path)) == 3
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
+
+
+def test_unchanged_entities_are_not_simulated(engine, tmp_path, monkeypatch) -> None:
+    manifest_path = tmp_path / "manifest.json"
+    setup_up_to_date(engine, manifest_path)
+
+    def fail_simulation(*args, **kwargs):
+        raise AssertionError("Unchanged entities should not be simulated")
+
+    monkeypatch.setattr(ReplaceableEntity, "get_database_definition", fail_simulation)
+
+    migration_contents = run_revision(engine, manifest_path, "3")
+
+    assert "op.create_entity" not in migration_contents
+    assert "op.replace_entity" not in migration_contents
+    assert "op.drop_entity" not in migration_contents
+    summary = registry.last_summary
+    assert summary is not None
+    assert summary.renderings == {"manifest": 3}
+
+
+def test_changed_entity_and_dependents_are_simulated(engine, tmp_path) -> None:
+    manifest_path = tmp_path / "manifest.json"
+    setup_up_to_date(engine, manifest_path)
+
+    updated_view = PGView(schema="public", signature="some_view", definition="select 1 as one, 2 as two")
+    register_entities([updated_view])
+
+    migration_contents = run_revision(engine, manifest_path, "3")
+
+    assert migration_contents.count("op.replace_entity") == 4
+    summary = registry.last_summary
+    assert summary is not None
+    assert summary.renderings == {"manifest": 1, "simulation": 2}
+    assert set(json.loads(manifest_path.read_text())["entries"]) == {TO_UPPER.identity}
+
+
+def test_drift_in_database_is_simulated(engine, tmp_path) -> None:
+    manifest_path = tmp_path / "manifest.json"
+    setup_up_to_date(engine, manifest_path)
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("create or replace view public.dependent_view as select one, 2 as two from public.some_view")
+
+    migration_contents = run_revision(engine, manifest_path, "3")
+
+    assert migration_contents.count("op.replace_entity") == 2
+    summary = registry.last_summary
+    assert summary is not None
+    assert summary.renderings == {"manifest": 2, "simulation": 1}
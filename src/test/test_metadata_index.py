@@ -0,0 +1,69 @@
+from alembic.autogenerate.api import AutogenContext
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    Enum,
+    Integer,
+    MetaData,
+    Table,
+    text,
+)
+
+from alembic_utils_extended.metadata_index import (
+    MetadataIndex,
+    get_metadata_index,
+)
+
+
+def _metadata() -> MetaData:
+    metadata = MetaData()
+    Table(
+        "account",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("status", Enum("active", "inactive", name="status_enum", native_enum=False)),
+        CheckConstraint("id > 0", name="ck_account_id"),
+    )
+    Table("account", metadata, Column("id", Integer, primary_key=True), Column("balance", Integer), schema="public")
+    Table("ledger", metadata, Column("id", Integer, primary_key=True), schema="DEV")
+    return metadata
+
+
+def test_metadata_index_contents() -> None:
+    index = MetadataIndex(_metadata())
+
+    assert index.schemas == [None, "DEV", "public"]
+    assert [table.key for table in index.tables_by_resolved_name[("public", "account")]] == ["account", "public.account"]
+    assert index.column_names["public.account"] == {"id", "balance"}
+    assert index.all_column_names == {"id", "status", "balance"}
+    assert index.enum_constraint_names["account"] == {"account_status_check"}
+    assert index.manual_constraint_names["account"] == {"ck_account_id"}
+    assert index.manual_constraint_names["DEV.ledger"] == frozenset()
+
+
+def test_metadata_index_is_built_once_per_run(engine) -> None:
+    metadata = _metadata()
+
+    with engine.connect() as connection:
+        migration_context = MigrationContext.configure(connection, opts={"target_metadata": metadata})
+        autogen_context = AutogenContext(migration_context, metadata=metadata)
+        other_context = AutogenContext(migration_context, metadata=metadata)
+
+        index = get_metadata_index(metadata, autogen_context)
+        assert get_metadata_index(metadata, autogen_context) is index
+        assert get_metadata_index(metadata, other_context) is not index
+        assert get_metadata_index(metadata) is not index
+
+
+def test_tables_without_schema_resolve_to_current_schema(engine) -> None:
+    metadata = _metadata()
+
+    with engine.connect() as connection:
+        connection.execute(text('SET search_path TO "DEV"'))
+        migration_context = MigrationContext.configure(connection, opts={"target_metadata": metadata})
+        index = get_metadata_index(metadata, AutogenContext(migration_context, metadata=metadata))
+
+    assert index.default_schema == "DEV"
+    assert [table.key for table in index.tables_by_resolved_name[("DEV", "account")]] == ["account"]
+    assert [table.key for table in index.tables_by_resolved_name[("public", "account")]] == ["public.account"]
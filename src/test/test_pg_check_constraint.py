@@ -1,5 +1,7 @@
 import pytest
+from alembic.autogenerate.api import AutogenContext
 from alembic.operations import ops
+from alembic.runtime.migration import MigrationContext
 from sqlalchemy import (
     CheckConstraint,
     Column,
@@ -7,14 +9,16 @@ from sqlalchemy import (
     Integer,
     MetaData,
     Table,
+    event,
+    inspect,
     text,
 )
 
+from alembic_utils_extended.metadata_index import _get_enum_constraint_names
 from alembic_utils_extended.pg_check_constraint import (
-    _constraint_columns_exist_in_metadata,
-    _constraint_columns_exist_on_table,
-    _get_enum_constraint_names,
+    _get_database_check_constraints_by_schema,
     _render_create_check_constraint,
+    compare_check_constraints,
 )
 from alembic_utils_extended.testbase import (
     TEST_VERSIONS_ROOT,
@@ -237,60 +241,32 @@ def test_renderer_includes_schema_and_kwargs() -> None:
 
 
 def test_constraint_with_missing_columns_skipped() -> None:
-    metadata = MetaData()
-    parent_table = Table(
-        "parent_table",
-        metadata,
-        Column("id", Integer, primary_key=True),
-        Column("parent_column", Integer),
-    )
-    child_table = Table(
-        "child_table",
-        metadata,
-        Column("id", Integer, primary_key=True),
-        Column("child_column", Integer),
-    )
-
-    constraint_on_parent = CheckConstraint(
-        parent_table.c.parent_column > 0,
-        name="ck_parent_column_positive",
+    from alembic_utils_extended.pg_check_constraint import (
+        _get_model_check_constraints,
     )
 
-    assert _constraint_columns_exist_on_table(constraint_on_parent, parent_table) is True
-    assert _constraint_columns_exist_on_table(constraint_on_parent, child_table) is False
-
-
-def test_constraint_columns_exist_in_metadata() -> None:
     metadata = MetaData()
     parent_table = Table(
         "parent_table",
         metadata,
         Column("id", Integer, primary_key=True),
         Column("parent_column", Integer),
+        CheckConstraint("parent_column > 0", name="ck_parent_column_positive"),
     )
-    Table(
+    child_table = Table(
         "child_table",
         metadata,
         Column("id", Integer, primary_key=True),
         Column("child_column", Integer),
     )
 
-    constraint_on_parent = CheckConstraint(
-        parent_table.c.parent_column > 0,
-        name="ck_parent_column_positive",
-    )
+    # Declared on the child, but its column only exists on another table of the metadata
+    other_table = Table("other_table", MetaData(), Column("parent_column", Integer))
+    child_table.append_constraint(CheckConstraint(other_table.c.parent_column > 0, name="ck_misplaced"))
 
-    assert _constraint_columns_exist_in_metadata(constraint_on_parent, metadata) is True
-
-    orphan_metadata = MetaData()
-    Table(
-        "orphan_table",
-        orphan_metadata,
-        Column("id", Integer, primary_key=True),
-        Column("other_column", Integer),
-    )
+    constraints = _get_model_check_constraints(metadata, None)
 
-    assert _constraint_columns_exist_in_metadata(constraint_on_parent, orphan_metadata) is False
+    assert [(c["table_name"], c["name"]) for c in constraints] == [(parent_table.name, "ck_parent_column_positive")]
 
 
 def test_constraint_referencing_nonexistent_column_raises_error() -> None:
@@ -421,3 +397,286 @@ def test_table_not_in_database_does_not_error(engine) -> None:
         target_metadata=metadata,
         compare_check_constraints=True,
     )
+
+
+def test_database_check_constraints_reflected_in_one_query(engine) -> None:
+    metadata = MetaData()
+    Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("amount", Integer),
+        Column("status", Enum("active", "inactive", name="status_enum", native_enum=False)),
+        CheckConstraint("amount >= 0 AND amount < 100", name="ck_amount_range"),
+    )
+    Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("amount", Integer),
+        CheckConstraint("amount <> 7", name="ck_dev_amount"),
+        schema="DEV",
+    )
+
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+
+    # Not created yet
+    Table("missing_table", metadata, Column("id", Integer, primary_key=True), CheckConstraint("id > 0", name="ck_missing"))
+
+    statements: list[str] = []
+
+    def count_statements(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        event.listen(connection, "before_cursor_execute", count_statements)
+        db_constraints = _get_database_check_constraints_by_schema(inspector, metadata)
+        event.remove(connection, "before_cursor_execute", count_statements)
+
+        assert len(statements) == 1
+        # The enum's generated constraint is skipped
+        assert {schema: [x["name"] for x in constraints] for schema, constraints in db_constraints.items()} == {
+            None: ["ck_amount_range"],
+            "DEV": ["ck_dev_amount"],
+        }
+
+        # Conditions are reflected exactly as the inspector does
+        for schema, constraints in db_constraints.items():
+            reflected = {x["name"]: x["sqltext"] for x in inspector.get_check_constraints("test_table", schema=schema)}
+            for constraint in constraints:
+                assert constraint["sqltext"] == reflected[constraint["name"]]
+
+
+def test_content_diff_detects_changed_check_constraint(engine) -> None:
+    metadata = MetaData()
+    Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("amount", Integer),
+        # Unchanged, but written differently than postgres renders it
+        CheckConstraint("amount >= 0 and amount < 100", name="ck_unchanged"),
+        CheckConstraint("amount <> 7", name="ck_changed"),
+    )
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, amount integer)"))
+        connection.execute(text("ALTER TABLE test_table ADD CONSTRAINT ck_unchanged CHECK ((amount >= 0) AND (amount < 100))"))
+        connection.execute(text("ALTER TABLE test_table ADD CONSTRAINT ck_changed CHECK (amount <> 8)"))
+
+    # Identity-only by default
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "identity"},
+        target_metadata=metadata,
+        compare_check_constraints=True,
+    )
+    with (TEST_VERSIONS_ROOT / "1_identity.py").open() as migration_file:
+        assert "op.create_check_constraint" not in migration_file.read()
+    (TEST_VERSIONS_ROOT / "1_identity.py").unlink()
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "content"},
+        target_metadata=metadata,
+        compare_check_constraints=True,
+        context_opts={"compare_check_constraint_content": True},
+    )
+    with (TEST_VERSIONS_ROOT / "1_content.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    upgrade, downgrade = migration_contents.split("def downgrade")
+    assert "ck_unchanged" not in migration_contents
+    assert upgrade.index("op.drop_constraint('ck_changed'") < upgrade.index("op.create_check_constraint('ck_changed'")
+    assert "amount <> 7" in upgrade
+    assert downgrade.index("op.drop_constraint('ck_changed'") < downgrade.index("op.create_check_constraint('ck_changed'")
+    assert "amount <> 8" in downgrade
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"}, target_metadata=metadata)
+
+    # The content now matches
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "2", "message": "noop"},
+        target_metadata=metadata,
+        compare_check_constraints=True,
+        context_opts={"compare_check_constraint_content": True},
+    )
+    with (TEST_VERSIONS_ROOT / "2_noop.py").open() as migration_file:
+        migration_contents = migration_file.read()
+    assert "op.create_check_constraint" not in migration_contents
+    assert "op.drop_constraint" not in migration_contents
+
+    run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"}, target_metadata=metadata)
+
+
+def test_content_diff_drops_changed_check_constraint_before_adding_it(engine) -> None:
+    metadata = MetaData()
+    Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("amount", Integer),
+        CheckConstraint("amount <> 7", name="ck_changed"),
+    )
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, amount integer)"))
+        connection.execute(text("ALTER TABLE test_table ADD CONSTRAINT ck_changed CHECK (amount <> 8)"))
+
+    with engine.connect() as connection:
+        migration_context = MigrationContext.configure(
+            connection,
+            opts={"target_metadata": metadata, "compare_check_constraints": True, "compare_check_constraint_content": True},
+        )
+        upgrade_ops = ops.UpgradeOps(ops=[])
+        compare_check_constraints(AutogenContext(migration_context, metadata=metadata), upgrade_ops, [None])
+
+    # Alembic < 1.18 keeps the order the comparator emits the ops in
+    assert [(type(op).__name__, op.constraint_name) for op in upgrade_ops.ops] == [
+        ("DropConstraintOp", "ck_changed"),
+        ("CreateCheckConstraintOp", "ck_changed"),
+    ]
+
+
+def test_tables_without_schema_compared_in_current_schema(engine) -> None:
+    metadata = MetaData()
+    Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("amount", Integer),
+        CheckConstraint("amount <> 7", name="ck_amount"),
+    )
+
+    with engine.begin() as connection:
+        connection.execute(
+            text('CREATE TABLE "DEV".test_table (id serial PRIMARY KEY, amount integer CONSTRAINT ck_amount CHECK (amount <> 7))')
+        )
+
+    with engine.connect() as connection:
+        connection.execute(text('SET search_path TO "DEV"'))
+        migration_context = MigrationContext.configure(
+            connection,
+            opts={"target_metadata": metadata, "compare_check_constraints": True, "compare_check_constraint_content": True},
+        )
+        upgrade_ops = ops.UpgradeOps(ops=[])
+        compare_check_constraints(AutogenContext(migration_context, metadata=metadata), upgrade_ops, [None])
+
+    assert upgrade_ops.ops == []
+
+
+def _migration(name: str) -> tuple[str, str]:
+    with (TEST_VERSIONS_ROOT / name).open() as migration_file:
+        upgrade, downgrade = migration_file.read().split("def downgrade")
+    return upgrade, downgrade
+
+
+def _is_validated(engine, constraint_name: str) -> bool:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT convalidated FROM pg_constraint WHERE conname = :name"), {"name": constraint_name}).scalar()
+
+
+def test_not_valid_mode_validates_in_same_migration(engine) -> None:
+    metadata = MetaData()
+    Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("amount", Integer),
+        CheckConstraint("amount >= 0", name="ck_amount_positive"),
+    )
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, amount integer)"))
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "not_valid"},
+        target_metadata=metadata,
+        compare_check_constraints=True,
+        context_opts={"compare_check_constraints_not_valid": True},
+    )
+    upgrade, downgrade = _migration("1_not_valid.py")
+    assert "postgresql_not_valid=True" in upgrade
+    assert upgrade.index("op.create_check_constraint('ck_amount_positive'") < upgrade.index(
+        "op.validate_check_constraint('ck_amount_positive', 'test_table')"
+    )
+    assert "op.drop_constraint('ck_amount_positive'" in downgrade
+    assert "validate" not in downgrade
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"}, target_metadata=metadata)
+    assert _is_validated(engine, "ck_amount_positive")
+
+    run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"}, target_metadata=metadata)
+
+
+# SQLAlchemy's own table reflection warns on any NOT VALID check constraint
+@pytest.mark.filterwarnings("ignore:Can't validate argument 'dialect_options'")
+def test_not_valid_mode_defers_validation(engine) -> None:
+    metadata = MetaData()
+    Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("amount", Integer),
+        CheckConstraint("amount >= 0", name="ck_amount_positive"),
+    )
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, amount integer)"))
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "add"},
+        target_metadata=metadata,
+        compare_check_constraints=True,
+        context_opts={"compare_check_constraints_not_valid": "deferred"},
+    )
+    upgrade, _ = _migration("1_add.py")
+    assert "postgresql_not_valid=True" in upgrade
+    assert "op.validate_check_constraint" not in upgrade
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"}, target_metadata=metadata)
+    assert not _is_validated(engine, "ck_amount_positive")
+
+    # The follow-up migration validates it
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "2", "message": "validate"},
+        target_metadata=metadata,
+        compare_check_constraints=True,
+        context_opts={"compare_check_constraints_not_valid": "deferred"},
+    )
+    upgrade, downgrade = _migration("2_validate.py")
+    assert "op.validate_check_constraint('ck_amount_positive', 'test_table')" in upgrade
+    assert "op.create_check_constraint" not in upgrade
+    assert "pass" in downgrade
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"}, target_metadata=metadata)
+    assert _is_validated(engine, "ck_amount_positive")
+
+    run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"}, target_metadata=metadata)
+
+
+def test_not_valid_mode_rejects_unknown_value(engine) -> None:
+    metadata = MetaData()
+    Table("test_table", metadata, Column("id", Integer, primary_key=True), CheckConstraint("id > 0", name="ck_id"))
+
+    with pytest.raises(ValueError, match="compare_check_constraints_not_valid"):
+        run_alembic_command(
+            engine=engine,
+            command="revision",
+            command_kwargs={"autogenerate": True, "rev_id": "1", "message": "invalid"},
+            target_metadata=metadata,
+            compare_check_constraints=True,
+            context_opts={"compare_check_constraints_not_valid": "later"},
+        )
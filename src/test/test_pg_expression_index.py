@@ -1,4 +1,8 @@
 import pytest
+from alembic.autogenerate.api import AutogenContext
+from alembic.ddl.postgresql import PostgresqlImpl
+from alembic.operations import Operations, ops
+from alembic.runtime.migration import MigrationContext
 from sqlalchemy import (
     Column,
     Index,
@@ -7,15 +11,27 @@ from sqlalchemy import (
     String,
     Table,
     desc,
+    event,
     func,
+    inspect,
     literal_column,
     text,
 )
+from sqlalchemy.exc import (
+    DBAPIError,
+    IntegrityError,
+    OperationalError,
+    ProgrammingError,
+)
 
 from alembic_utils_extended.pg_expression_index import (
+    _get_database_indexes_by_schema,
     _get_model_indexes,
+    _get_model_indexes_by_schema,
+    _is_transient_error,
     _parse_indexdef,
     _truncate_identifier,
+    compare_indexes,
 )
 from alembic_utils_extended.testbase import (
     TEST_VERSIONS_ROOT,
@@ -927,6 +943,32 @@ def test_parse_indexdef_detects_nulls_not_distinct() -> None:
     assert "postgresql_nulls_not_distinct" not in kw_plain
 
 
+def test_parse_indexdef_every_clause() -> None:
+    indexdef = (
+        'CREATE UNIQUE INDEX "Idx" ON public."T" USING btree '
+        "(name COLLATE \"C\" DESC NULLS LAST, COALESCE(a, ')'::text), tag text_pattern_ops) "
+        "INCLUDE (email, \"Foo\") NULLS NOT DISTINCT WITH (fillfactor='70', deduplicate_items=off) "
+        "TABLESPACE \"Space\" WHERE (name <> '(,'::text)"
+    )
+    columns, kw = _parse_indexdef(indexdef)
+
+    assert [str(column) for column in columns] == ['name COLLATE "C" DESC NULLS LAST', "COALESCE(a, ')'::text)", "tag text_pattern_ops"]
+    assert kw == {
+        "postgresql_using": "btree",
+        "postgresql_include": ["email", '"Foo"'],
+        "postgresql_nulls_not_distinct": True,
+        "postgresql_with": {"fillfactor": "'70'", "deduplicate_items": "off"},
+        "postgresql_tablespace": "Space",
+        "postgresql_where": "(name <> '(,'::text)",
+    }
+
+    # Memoized, but every call gets its own copies
+    kw["postgresql_include"].append("other")
+    assert _parse_indexdef(indexdef)[1]["postgresql_include"] == ["email", '"Foo"']
+
+    assert [str(column) for column in _parse_indexdef("not an index definition")[0]] == ["not an index definition"]
+
+
 def test_detect_create_unique_index_nulls_not_distinct(engine) -> None:
     """Model declares a NULLS NOT DISTINCT unique index the DB lacks → the fork
     emits a create op carrying the flag, and the applied index actually carries
@@ -1072,3 +1114,413 @@ def test_nulls_not_distinct_autogen_is_idempotent(engine) -> None:
     contents = (TEST_VERSIONS_ROOT / "1_idem_nnd.py").read_text()
     assert "op.create_index" not in contents, f"Autogen re-emitted a create:\n{contents}"
     assert "op.drop_index" not in contents, f"Autogen re-emitted a drop:\n{contents}"
+
+
+def test_database_indexes_reflected_in_one_query(engine) -> None:
+    metadata = MetaData()
+    public_table = Table("test_table", metadata, Column("id", Integer, primary_key=True), Column("name", String(100)))
+    dev_table = Table("test_table", metadata, Column("id", Integer, primary_key=True), Column("name", String(100)), schema="DEV")
+    Index("idx_public_name_lower", func.lower(public_table.c.name))
+    Index("idx_dev_name_lower", func.lower(dev_table.c.name))
+
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+
+    model_indexes = _get_model_indexes_by_schema(metadata)
+    assert {schema: [x["name"] for x in indexes] for schema, indexes in model_indexes.items()} == {
+        None: ["idx_public_name_lower"],
+        "DEV": ["idx_dev_name_lower"],
+    }
+
+    statements: list[str] = []
+
+    def count_statements(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    with engine.connect() as connection:
+        event.listen(connection, "before_cursor_execute", count_statements)
+        db_indexes = _get_database_indexes_by_schema(inspect(connection), metadata)
+
+    assert len(statements) == 1
+    assert {schema: [x["name"] for x in indexes] for schema, indexes in db_indexes.items()} == {
+        None: ["idx_public_name_lower"],
+        "DEV": ["idx_dev_name_lower"],
+    }
+
+
+def test_content_diff_detects_changed_index(engine) -> None:
+    metadata = MetaData()
+    table = Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+        Column("email", String(100)),
+    )
+    # Unchanged, but written differently than postgres renders it
+    Index("idx_unchanged", func.lower(table.c.name), postgresql_include=["email"])
+    # WHERE predicate changed
+    Index("idx_changed_where", table.c.name, postgresql_where=table.c.id > 2)
+    # INCLUDE list changed
+    Index("idx_changed_include", table.c.name, postgresql_include=["email"])
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100), email varchar(100))"))
+        connection.execute(text("CREATE INDEX idx_unchanged ON test_table USING btree (LOWER(name)) INCLUDE (email)"))
+        connection.execute(text("CREATE INDEX idx_changed_where ON test_table (name) WHERE id > 1"))
+        connection.execute(text("CREATE INDEX idx_changed_include ON test_table (name)"))
+
+    # Identity-only by default
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "identity"},
+        target_metadata=metadata,
+        compare_indexes=True,
+    )
+    with (TEST_VERSIONS_ROOT / "1_identity.py").open() as migration_file:
+        assert "op.create_index" not in migration_file.read()
+    (TEST_VERSIONS_ROOT / "1_identity.py").unlink()
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "content"},
+        target_metadata=metadata,
+        compare_indexes=True,
+        context_opts={"compare_index_content": True},
+    )
+    with (TEST_VERSIONS_ROOT / "1_content.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    upgrade, downgrade = migration_contents.split("def downgrade")
+    assert "idx_unchanged" not in migration_contents
+    for index_name in ["idx_changed_where", "idx_changed_include"]:
+        assert upgrade.index(f"op.drop_index('{index_name}'") < upgrade.index(f"op.create_index('{index_name}'")
+        assert downgrade.index(f"op.drop_index('{index_name}'") < downgrade.index(f"op.create_index('{index_name}'")
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"}, target_metadata=metadata)
+
+    # The content now matches
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "2", "message": "noop"},
+        target_metadata=metadata,
+        compare_indexes=True,
+        context_opts={"compare_index_content": True},
+    )
+    with (TEST_VERSIONS_ROOT / "2_noop.py").open() as migration_file:
+        migration_contents = migration_file.read()
+    assert "op.create_index" not in migration_contents
+    assert "op.drop_index" not in migration_contents
+
+    run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"}, target_metadata=metadata)
+
+
+def compared_index_ops(engine, metadata: MetaData, **opts) -> list[tuple[str, str]]:
+    """The ops emitted by `compare_indexes` itself, before any other comparator reorders them"""
+    with engine.connect() as connection:
+        migration_context = MigrationContext.configure(connection, opts={"target_metadata": metadata, "compare_indexes": True, **opts})
+        upgrade_ops = ops.UpgradeOps(ops=[])
+        compare_indexes(AutogenContext(migration_context, metadata=metadata), upgrade_ops, [None])
+    return [(type(op).__name__, op.index_name) for op in upgrade_ops.ops]
+
+
+def test_content_diff_drops_changed_index_before_creating_it(engine) -> None:
+    metadata = MetaData()
+    table = Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+    )
+    Index("idx_changed", table.c.name, postgresql_where=table.c.id > 2)
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100))"))
+        connection.execute(text("CREATE INDEX idx_changed ON test_table (name) WHERE id > 1"))
+
+    # Alembic < 1.18 keeps the order the comparator emits the ops in
+    assert compared_index_ops(engine, metadata, compare_index_content=True) == [
+        ("DropIndexOp", "idx_changed"),
+        ("CreateIndexOp", "idx_changed"),
+    ]
+
+
+def test_content_diff_keeps_unchanged_storage_parameters(engine) -> None:
+    metadata = MetaData()
+    table = Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+    )
+    Index("idx_fillfactor", table.c.name, postgresql_with={"fillfactor": 70})
+    Index("idx_fillfactor_changed", table.c.id, postgresql_with={"fillfactor": 80})
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100))"))
+        connection.execute(text("CREATE INDEX idx_fillfactor ON test_table (name) WITH (fillfactor = 70)"))
+        connection.execute(text("CREATE INDEX idx_fillfactor_changed ON test_table (id) WITH (fillfactor = 70)"))
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "content"},
+        target_metadata=metadata,
+        compare_indexes=True,
+        context_opts={"compare_index_content": True},
+    )
+    with (TEST_VERSIONS_ROOT / "1_content.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    assert "idx_fillfactor'" not in migration_contents
+    upgrade, _ = migration_contents.split("def downgrade")
+    assert "postgresql_with={'fillfactor': '80'}" in upgrade
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"}, target_metadata=metadata)
+    with engine.begin() as connection:
+        indexdef = connection.execute(text("SELECT pg_get_indexdef('idx_fillfactor_changed'::regclass)")).scalar()
+    assert "fillfactor='80'" in indexdef
+
+    run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"}, target_metadata=metadata)
+
+
+def test_concurrent_mode_rebuilds_invalid_index(engine) -> None:
+    metadata = MetaData()
+    table = Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+    )
+    Index("idx_concurrent_name", table.c.name, unique=True)
+    Index("idx_concurrent_lower", func.lower(table.c.name))
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100))"))
+        connection.execute(text("INSERT INTO test_table (name) VALUES ('a'), ('a')"))
+
+    # A failed concurrent build leaves an invalid index behind
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        with pytest.raises(Exception):
+            connection.execute(text("CREATE UNIQUE INDEX CONCURRENTLY idx_concurrent_name ON test_table (name)"))
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM test_table WHERE id = 2"))
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "concurrent"},
+        target_metadata=metadata,
+        compare_indexes=True,
+        context_opts={"compare_indexes_concurrently": True},
+    )
+    with (TEST_VERSIONS_ROOT / "1_concurrent.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    upgrade, downgrade = migration_contents.split("def downgrade")
+    assert "op.create_index_concurrently('idx_concurrent_lower'" in upgrade
+    assert upgrade.index("op.drop_index_concurrently('idx_concurrent_name'") < upgrade.index(
+        "op.create_index_concurrently('idx_concurrent_name'"
+    )
+    assert "op.drop_index_concurrently('idx_concurrent_lower'" in downgrade
+    assert "op.create_index_concurrently('idx_concurrent_name'" in downgrade
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"}, target_metadata=metadata)
+
+    with engine.connect() as connection:
+        assert connection.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = CAST('idx_concurrent_name' AS regclass)")
+        ).scalar()
+
+    run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"}, target_metadata=metadata)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT to_regclass('idx_concurrent_lower')")).scalar() is None
+
+
+def test_invalid_index_dropped_before_rebuilt(engine) -> None:
+    metadata = MetaData()
+    table = Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+    )
+    Index("idx_concurrent_name", table.c.name, unique=True)
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100))"))
+        connection.execute(text("INSERT INTO test_table (name) VALUES ('a'), ('a')"))
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        with pytest.raises(Exception):
+            connection.execute(text("CREATE UNIQUE INDEX CONCURRENTLY idx_concurrent_name ON test_table (name)"))
+
+    # Dropping after the rebuild would remove the rebuilt index
+    assert compared_index_ops(engine, metadata, compare_indexes_concurrently=True) == [
+        ("DropIndexConcurrentlyOp", "idx_concurrent_name"),
+        ("CreateIndexConcurrentlyOp", "idx_concurrent_name"),
+    ]
+
+
+def test_create_index_concurrently_drops_leftover_invalid_index(engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100))"))
+        connection.execute(text("INSERT INTO test_table (name) VALUES ('a'), ('a')"))
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        with pytest.raises(Exception):
+            connection.execute(text("CREATE UNIQUE INDEX CONCURRENTLY idx_concurrent_name ON test_table (name)"))
+
+    with engine.connect() as connection:
+        operations = Operations(MigrationContext.configure(connection))
+
+        builds = []
+        event.listen(
+            connection,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: builds.append(statement) if statement.startswith("CREATE UNIQUE INDEX") else None,
+        )
+
+        # The duplicates fail the build the same way every time: no retry, and the invalid index is cleaned up
+        with pytest.raises(IntegrityError):
+            operations.create_index_concurrently("idx_concurrent_name", "test_table", ["name"], unique=True, retries=3)
+        assert len(builds) == 1
+        assert connection.execute(text("SELECT to_regclass('idx_concurrent_name')")).scalar() is None
+
+        connection.execute(text("DELETE FROM test_table WHERE id = 2"))
+        connection.commit()
+        operations.create_index_concurrently("idx_concurrent_name", "test_table", ["name"], unique=True)
+        assert connection.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = CAST('idx_concurrent_name' AS regclass)")
+        ).scalar()
+        connection.commit()
+
+        operations.drop_index_concurrently("idx_concurrent_name", "test_table")
+        assert connection.execute(text("SELECT to_regclass('idx_concurrent_name')")).scalar() is None
+
+
+def test_create_index_concurrently_retries_lock_timeouts(engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100))"))
+
+    with engine.connect() as blocker, engine.connect() as connection:
+        blocker.execute(text("LOCK TABLE test_table IN ACCESS EXCLUSIVE MODE"))
+        connection.execute(text("SET lock_timeout = '50ms'"))
+        connection.commit()
+        operations = Operations(MigrationContext.configure(connection))
+
+        builds = []
+        event.listen(
+            connection,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: builds.append(statement) if statement.startswith("CREATE INDEX") else None,
+        )
+
+        with pytest.raises(OperationalError):
+            operations.create_index_concurrently("idx_concurrent_name", "test_table", ["name"], retries=2)
+        assert len(builds) == 3
+
+        blocker.rollback()
+        operations.create_index_concurrently("idx_concurrent_name", "test_table", ["name"])
+        assert connection.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = CAST('idx_concurrent_name' AS regclass)")
+        ).scalar()
+        connection.commit()
+
+
+def test_only_transient_errors_are_retried() -> None:
+    class _DriverError(Exception):
+        def __init__(self, pgcode: str) -> None:
+            super().__init__(pgcode)
+            self.pgcode = pgcode
+
+    assert _is_transient_error(OperationalError("CREATE INDEX", {}, _DriverError("55P03")))
+    assert _is_transient_error(DBAPIError("CREATE INDEX", {}, _DriverError("40P01")))
+    assert _is_transient_error(DBAPIError("CREATE INDEX", {}, _DriverError("40001")))
+    assert not _is_transient_error(IntegrityError("CREATE INDEX", {}, _DriverError("23505")))
+    assert not _is_transient_error(ProgrammingError("CREATE INDEX", {}, _DriverError("42703")))
+
+
+def test_emitted_index_ops_are_sorted(engine) -> None:
+    metadata = MetaData()
+    table = Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+    )
+    for index_name in ["idx_c", "idx_a", "idx_b"]:
+        Index(index_name, func.lower(table.c.name))
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE test_table (id serial PRIMARY KEY, name varchar(100))"))
+        for index_name in ["idx_z", "idx_x", "idx_y"]:
+            connection.execute(text(f"CREATE INDEX {index_name} ON test_table (name)"))
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "sorted"},
+        target_metadata=metadata,
+        compare_indexes=True,
+    )
+    with (TEST_VERSIONS_ROOT / "1_sorted.py").open() as migration_file:
+        upgrade = migration_file.read().split("def downgrade")[0]
+
+    # Drops are ordered before creates, each in name order
+    for index_names in [["idx_a", "idx_b", "idx_c"], ["idx_x", "idx_y", "idx_z"]]:
+        positions = [upgrade.index(f"'{index_name}'") for index_name in index_names]
+        assert positions == sorted(positions)
+
+
+def test_index_expressions_rendered_once(engine, monkeypatch) -> None:
+    metadata = MetaData()
+    table = Table(
+        "test_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+    )
+    Index("idx_name_lower", func.lower(table.c.name), postgresql_where=table.c.id > 2)
+    Index("idx_name_coalesce", func.coalesce(table.c.name, "unnamed"))
+
+    rendered: list[str] = []
+    render_ddl_sql_expr = PostgresqlImpl.render_ddl_sql_expr
+
+    def counting_render_ddl_sql_expr(self, expr, **kw):
+        rendered.append(str(expr))
+        return render_ddl_sql_expr(self, expr, **kw)
+
+    monkeypatch.setattr(PostgresqlImpl, "render_ddl_sql_expr", counting_render_ddl_sql_expr)
+
+    with engine.connect() as connection:
+        migration_context = MigrationContext.configure(connection, opts={"target_metadata": metadata})
+        first = _get_model_indexes_by_schema(metadata, AutogenContext(migration_context, metadata=metadata))
+        assert len(rendered) == 3
+
+        second = _get_model_indexes_by_schema(metadata, AutogenContext(migration_context, metadata=metadata))
+        assert len(rendered) == 3
+
+    assert [x["expressions"] for x in first[None]] == [x["expressions"] for x in second[None]]
+    assert {x["name"]: x["kw"].get("postgresql_where") for x in second[None]} == {"idx_name_lower": "(id > 2)", "idx_name_coalesce": None}
+    assert sorted(x["expressions"][0] for x in second[None]) == ["coalesce(name, 'unnamed')", "lower(name)"]
+
+    # A different bound value is a different expression
+    Index("idx_name_coalesce_other", func.coalesce(table.c.name, "other"))
+    with engine.connect() as connection:
+        migration_context = MigrationContext.configure(connection, opts={"target_metadata": metadata})
+        third = _get_model_indexes_by_schema(metadata, AutogenContext(migration_context, metadata=metadata))
+    assert len(rendered) == 4
+    assert {x["name"]: x["expressions"][0] for x in third[None]}["idx_name_coalesce_other"] == "coalesce(name, 'other')"
+
+    # Expressions found clean are still checked against other columns
+    Index("idx_name_literal", table.c.id, func.lower("name"))
+    with pytest.raises(ValueError, match="anti-pattern"):
+        _get_model_indexes_by_schema(metadata)
+    with pytest.raises(ValueError, match="anti-pattern"):
+        _get_model_indexes_by_schema(metadata)
@@ -1,4 +1,4 @@
-from sqlalchemy import text
+from sqlalchemy import event, text
 
 from alembic_utils_extended.pg_function import PGFunction
 from alembic_utils_extended.replaceable_entity import register_entities
@@ -259,3 +259,63 @@ def test_plpgsql_colon_esacpe(engine) -> None:
     run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
     # Execute Downgrade
     run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"})
+
+
+def test_reflection_matches_functiondef_parsing(engine, execute_all) -> None:
+    """Functions built from the catalog columns are identical to parsing their
+    ``pg_get_functiondef`` with :meth:`PGFunction.from_sql`"""
+    functions = [
+        TO_UPPER,
+        PGFunction(schema="DEV", signature="no_args()", definition="returns int as $$ select 1 $$ language sql"),
+        PGFunction(
+            schema="public",
+            signature="rows_of(a int, b text default 'x, y')",
+            definition="returns table(n int, label text) as $$ select a, b $$ language sql stable",
+        ),
+        PGFunction(
+            schema="public",
+            signature="returns_of(returns int)",
+            definition="returns setof int as $$ select generate_series(1, returns) $$ language sql",
+        ),
+        PGFunction(
+            schema="public",
+            signature="assign(x int)",
+            definition="returns int as $$ declare y int; begin y := x * 2; return y; end; $$ language plpgsql",
+        ),
+    ]
+    with engine.begin() as connection:
+        for function in functions:
+            execute_all(connection, function.to_sql_statement_create())
+
+        reflected = PGFunction.from_database(connection, "%")
+        identities = PGFunction.identities_from_database(connection, "%")
+        functiondefs = connection.execute(
+            text(
+                "select pg_get_functiondef(p.oid) from pg_proc p join pg_namespace n on p.pronamespace = n.oid where n.nspname in ('public', 'DEV')"
+            )
+        ).scalars()
+        parsed = [PGFunction.from_sql(x) for x in functiondefs]
+
+    def as_tuple(function: PGFunction) -> tuple[str, str, str]:
+        return (function.schema, function.signature, function.definition)
+
+    assert sorted(as_tuple(x) for x in reflected) == sorted(as_tuple(x) for x in parsed)
+    assert len(reflected) == len(functions)
+    assert sorted(identities) == sorted(x.identity for x in reflected)
+
+
+def test_simulation_reads_definitions_once(engine, sess) -> None:
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        db_def = TO_UPPER.get_database_definition(sess)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert db_def.signature == "toUpper(some_text text DEFAULT 'my text!'::text)"
+    # Without TO_UPPER, only the identities of the remaining functions are compared
+    assert len([x for x in statements if "pg_get_functiondef" in x]) == 1
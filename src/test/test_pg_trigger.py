@@ -200,3 +200,55 @@ def test_fail_create_sql_statement_create():
 
     with pytest.raises(SQLParseFailure):
         list(trig.to_sql_statement_create())
+
+
+def test_reflection_matches_triggerdef_parsing(sql_setup, engine, execute_all, monkeypatch) -> None:
+    """Triggers built from the catalog columns are identical to parsing their
+    ``pg_get_triggerdef`` with :meth:`PGTrigger.from_sql`"""
+    with engine.begin() as connection:
+        execute_all(connection, FUNC.to_sql_statement_create())
+        connection.execute(
+            text(
+                """
+        create table "DEV"."Ledger" (id serial primary key, "Amount" int, note text);
+        create view public.account_view as select * from public.account;
+
+        create trigger "Quoted Trigger" before insert or update of "Amount", note on "DEV"."Ledger"
+            for each row when (new."Amount" > 0) execute procedure public.downcase_email();
+        create trigger truncate_account after truncate or delete on public.account
+            for each statement execute procedure public.downcase_email();
+        create trigger view_insert instead of insert on public.account_view
+            for each row execute procedure public.downcase_email('a', 'b:c');
+        create constraint trigger account_deferred after update on public.account
+            deferrable initially deferred for each row execute procedure public.downcase_email();
+        """
+            )
+        )
+        execute_all(connection, TRIG.to_sql_statement_create())
+
+        with monkeypatch.context() as patch:
+            patch.setattr(PGTrigger, "from_sql", None)
+            reflected = PGTrigger.from_database(connection, "%")
+        triggerdefs = connection.execute(text("select pg_get_triggerdef(oid) from pg_trigger where not tgisinternal")).scalars()
+        parsed = [PGTrigger.from_sql(x) for x in triggerdefs if " ON public." in x]
+
+    def as_tuple(trigger: PGTrigger) -> tuple[str, str, str, bool, str]:
+        return (trigger.schema, trigger.signature, trigger.on_entity, trigger.is_constraint, trigger.definition)
+
+    by_name = {x.signature: x for x in reflected}
+    assert sorted(by_name) == ["Quoted Trigger", "account_deferred", "lower_account_EMAIL", "truncate_account", "view_insert"]
+    assert sorted(as_tuple(by_name[x.signature]) for x in parsed) == sorted(as_tuple(x) for x in parsed)
+
+    quoted = by_name["Quoted Trigger"]
+    assert (quoted.schema, quoted.on_entity) == ("DEV", "DEV.Ledger")
+    assert quoted.definition.startswith('BEFORE INSERT OR UPDATE OF "Amount", note ON "DEV"."Ledger" FOR EACH ROW WHEN')
+    assert by_name["account_deferred"].is_constraint
+
+    # Statements generated from reflected triggers recreate them as they were
+    public_triggers = [x for x in reflected if x.schema == "public"]
+    with engine.begin() as connection:
+        for trigger in public_triggers:
+            execute_all(connection, trigger.to_sql_statement_drop())
+            execute_all(connection, trigger.to_sql_statement_create())
+        recreated = PGTrigger.from_database(connection, "public")
+    assert sorted(as_tuple(x) for x in recreated) == sorted(as_tuple(x) for x in public_triggers)
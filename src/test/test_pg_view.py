@@ -276,3 +276,14 @@ def test_view_contains_colon(engine) -> None:
     run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
     # Execute Downgrade
     run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"})
+
+
+def test_identities_match_reflected_views(engine, execute_all) -> None:
+    with engine.begin() as connection:
+        execute_all(connection, TEST_VIEW.to_sql_statement_create())
+
+        identities = PGView.identities_from_database(connection, ["DEV", "public"])
+        reflected = PGView.from_database(connection, ["DEV", "public"])
+
+    assert identities == [TEST_VIEW.identity]
+    assert identities == [x.identity for x in reflected]
@@ -0,0 +1,116 @@
+import json
+import subprocess
+import sys
+import textwrap
+
+from alembic_utils_extended.pg_view import PGView
+from alembic_utils_extended.profiling import (
+    ENTITY_PHASE,
+    Profiler,
+    ProfileRecord,
+    register_profiling_callback,
+    unregister_profiling_callback,
+)
+from alembic_utils_extended.replaceable_entity import register_entities
+from alembic_utils_extended.testbase import run_alembic_command
+
+TEST_VIEW = PGView(schema="public", signature="some_view", definition="select 1 as one")
+
+TEST_DEPENDENT_VIEW = PGView(schema="public", signature="dependent_view", definition="select * from public.some_view")
+
+
+def test_profiler_counts_statements_and_savepoints(engine) -> None:
+    with engine.connect() as connection:
+        profiler = Profiler(connection)
+
+        with profiler.phase("outer"):
+            with profiler.phase("inner", entity="some entity"):
+                connection.exec_driver_sql("select generate_series(1, 3)").fetchall()
+            savepoint = connection.begin_nested()
+            savepoint.rollback()
+
+        profiler.close()
+        connection.exec_driver_sql("select 1")
+
+    inner, outer = profiler.records
+    assert (inner.phase, inner.entity, inner.statements, inner.savepoints, inner.rows) == ("inner", "some entity", 1, 0, 3)
+    # SAVEPOINT and ROLLBACK TO SAVEPOINT are statements too
+    assert (outer.phase, outer.entity, outer.statements, outer.savepoints, outer.rows) == ("outer", None, 3, 1, 3)
+    assert outer.wall_time >= inner.wall_time
+
+
+def test_disabled_profiler_records_nothing(engine) -> None:
+    with engine.connect() as connection:
+        profiler = Profiler(connection, enabled=False)
+        with profiler.phase("outer"):
+            connection.exec_driver_sql("select 1")
+
+    assert profiler.records == []
+
+
+def test_revision_profile(engine, tmp_path) -> None:
+    profile_path = tmp_path / "profile.json"
+    records: list[ProfileRecord] = []
+    register_profiling_callback(records.append)
+
+    register_entities([TEST_VIEW, TEST_DEPENDENT_VIEW], entity_types=[PGView])
+
+    try:
+        run_alembic_command(
+            engine=engine,
+            command="revision",
+            command_kwargs={"autogenerate": True, "rev_id": "1", "message": "profiled"},
+            context_opts={"entity_profiling": str(profile_path)},
+        )
+    finally:
+        unregister_profiling_callback(records.append)
+
+    phases = {x.phase for x in records}
+    assert {"solve_resolution_order", "catalog_snapshot", ENTITY_PHASE, "get_database_definition", "drop_scan"} <= phases
+
+    entity_records = [x for x in records if x.phase == ENTITY_PHASE]
+    assert {x.entity for x in entity_records} == {TEST_VIEW.identity, TEST_DEPENDENT_VIEW.identity}
+    assert all(x.statements > 0 and x.savepoints > 0 for x in entity_records)
+
+    assert json.loads(profile_path.read_text()) == [
+        {
+            "phase": x.phase,
+            "entity": x.entity,
+            "wall_time": x.wall_time,
+            "statements": x.statements,
+            "savepoints": x.savepoints,
+            "rows": x.rows,
+        }
+        for x in records
+    ]
+
+
+def test_revision_profile_without_dispatch_priority(engine, tmp_path) -> None:
+    """Alembic < 1.18 has no ``DispatchPriority`` and runs the comparators in registration order"""
+    profile_path = tmp_path / "profile.json"
+    script = textwrap.dedent(
+        f"""
+        import alembic.util.langhelpers as langhelpers
+        from sqlalchemy import create_engine
+
+        dispatch_priority = langhelpers.DispatchPriority
+        del langhelpers.DispatchPriority
+        from alembic_utils_extended.pg_view import PGView
+        from alembic_utils_extended.replaceable_entity import register_entities
+        from alembic_utils_extended.testbase import run_alembic_command
+        langhelpers.DispatchPriority = dispatch_priority
+
+        register_entities([PGView(schema="public", signature="some_view", definition="select 1 as one")], entity_types=[PGView])
+        run_alembic_command(
+            engine=create_engine({engine.url.render_as_string(hide_password=False)!r}),
+            command="revision",
+            command_kwargs={{"autogenerate": True, "rev_id": "1", "message": "profiled"}},
+            context_opts={{"entity_profiling": {str(profile_path)!r}}},
+        )
+        """
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+    # Reported once the entities were compared, not before
+    records = json.loads(profile_path.read_text())
+    assert {x["entity"] for x in records if x["phase"] == ENTITY_PHASE} == {TEST_VIEW.identity}
@@ -1,10 +1,26 @@
 import pytest
 from sqlalchemy import text
-from sqlalchemy.exc import DataError
+from sqlalchemy.exc import DataError, ProgrammingError
 from sqlalchemy.orm import Session
 
+from alembic_utils_extended.pg_function import PGFunction
 from alembic_utils_extended.pg_view import PGView
-from alembic_utils_extended.simulate import simulate_entity
+from alembic_utils_extended.profiling import (
+    ProfileRecord,
+    register_profiling_callback,
+    unregister_profiling_callback,
+)
+from alembic_utils_extended.replaceable_entity import register_entities
+from alembic_utils_extended.simulate import (
+    has_uncommitted_changes,
+    simulate_entities,
+    simulate_entities_in_parallel,
+    simulate_entity,
+)
+from alembic_utils_extended.testbase import (
+    TEST_VERSIONS_ROOT,
+    run_alembic_command,
+)
 
 TEST_VIEW = PGView(
     schema="public",
@@ -23,3 +39,138 @@ def test_simulate_entity_shows_user_code_error(sess: Session, execute_all) -> No
 
     # Confirm context manager exited gracefully
     assert True
+
+
+BASE_VIEW = PGView(schema="public", signature="base_view", definition="select 1 as one")
+
+DEPENDENT_VIEW = PGView(schema="public", signature="dependent_view", definition="select one from public.base_view")
+
+TO_UPPER = PGFunction(
+    schema="public",
+    signature="toUpper(some_text text default 'my text!')",
+    definition="returns text as $$ select upper(some_text) $$ language sql",
+)
+
+BROKEN_VIEW = PGView(schema="public", signature="broken_view", definition="select * from public.does_not_exist")
+
+
+def test_simulate_entities_renders_all(sess: Session) -> None:
+    rendered = simulate_entities(sess, [BASE_VIEW, DEPENDENT_VIEW, TO_UPPER])
+
+    assert set(rendered) == {BASE_VIEW.identity, DEPENDENT_VIEW.identity, TO_UPPER.identity}
+    assert rendered[BASE_VIEW.identity].identity == BASE_VIEW.identity
+    assert "base_view" in rendered[DEPENDENT_VIEW.identity].definition
+    # Postgres renders the default differently, attributed by name
+    assert rendered[TO_UPPER.identity].signature == "toUpper(some_text text DEFAULT 'my text!'::text)"
+
+    # Everything was rolled back
+    assert PGView.from_database(sess, "public") == []
+
+
+def test_simulate_entities_omits_failures(sess: Session) -> None:
+    rendered = simulate_entities(sess, [BROKEN_VIEW, BASE_VIEW])
+
+    assert set(rendered) == {BASE_VIEW.identity}
+
+
+def test_create_revision_with_batch_simulation(engine, execute_all) -> None:
+    with engine.begin() as connection:
+        execute_all(connection, BASE_VIEW.to_sql_statement_create())
+
+    updated_base_view = PGView(schema="public", signature="base_view", definition="select 2 as one")
+    register_entities([DEPENDENT_VIEW, updated_base_view, TO_UPPER])
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "batch"},
+        context_opts={"entity_batch_simulation": True},
+    )
+
+    with (TEST_VERSIONS_ROOT / "1_batch.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    assert migration_contents.count("op.create_entity") == 2
+    assert migration_contents.count("op.replace_entity") == 2
+    assert migration_contents.count("op.drop_entity") == 2
+
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
+    run_alembic_command(engine=engine, command="downgrade", command_kwargs={"revision": "base"})
+
+
+def test_simulate_entities_in_parallel(engine) -> None:
+    with engine.connect() as connection:
+        rendered = simulate_entities_in_parallel(connection, [BASE_VIEW, DEPENDENT_VIEW, TO_UPPER, BROKEN_VIEW], workers=3)
+
+    base_view, dependent_view, to_upper = (rendered[x.identity] for x in [BASE_VIEW, DEPENDENT_VIEW, TO_UPPER])
+    assert isinstance(base_view, PGView) and base_view.identity == BASE_VIEW.identity
+    assert isinstance(dependent_view, PGView) and "base_view" in dependent_view.definition
+    assert isinstance(to_upper, PGFunction) and to_upper.signature == "toUpper(some_text text DEFAULT 'my text!'::text)"
+    assert isinstance(rendered[BROKEN_VIEW.identity], ProgrammingError)
+
+    # Everything was rolled back
+    with engine.connect() as connection:
+        assert PGView.from_database(connection, "public") == []
+
+
+def test_simulate_entities_in_parallel_adopts_search_path(engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(text('create table "DEV".dev_table (one int)'))
+
+    unqualified_view = PGView(schema="DEV", signature="dev_view", definition="select one from dev_table")
+
+    with engine.connect() as connection:
+        connection.execute(text('set search_path to "DEV", public'))
+        rendered = simulate_entities_in_parallel(connection, [unqualified_view], workers=2)
+        connection.execute(text("reset search_path"))
+
+    dev_view = rendered[unqualified_view.identity]
+    assert isinstance(dev_view, PGView) and "dev_table" in dev_view.definition
+
+
+def test_has_uncommitted_changes(engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("select 1"))
+        assert not has_uncommitted_changes(connection)
+
+        savepoint = connection.begin_nested()
+        connection.execute(text("create table some_table (one int)"))
+        savepoint.rollback()
+        assert has_uncommitted_changes(connection)
+
+        connection.rollback()
+        assert not has_uncommitted_changes(connection)
+
+
+def test_create_revision_with_parallel_simulation(engine, execute_all) -> None:
+    with engine.begin() as connection:
+        execute_all(connection, BASE_VIEW.to_sql_statement_create())
+
+    # Otherwise autogenerate creates the version table, uncommitted, and simulates sequentially
+    run_alembic_command(engine=engine, command="upgrade", command_kwargs={"revision": "head"})
+
+    updated_base_view = PGView(schema="public", signature="base_view", definition="select 2 as one")
+    register_entities([DEPENDENT_VIEW, updated_base_view, TO_UPPER, BROKEN_VIEW])
+
+    records: list[ProfileRecord] = []
+    register_profiling_callback(records.append)
+    try:
+        run_alembic_command(
+            engine=engine,
+            command="revision",
+            command_kwargs={"autogenerate": True, "rev_id": "1", "message": "parallel"},
+            context_opts={"entity_simulation_workers": 2, "entity_profiling": True},
+        )
+    finally:
+        unregister_profiling_callback(records.append)
+
+    assert "parallel_simulation" in {x.phase for x in records}
+
+    with (TEST_VERSIONS_ROOT / "1_parallel.py").open() as migration_file:
+        migration_contents = migration_file.read()
+
+    # BROKEN_VIEW's table does not exist yet, so it is created
+    assert migration_contents.count("op.create_entity") == 3
+    assert migration_contents.count("op.replace_entity") == 2
+    assert migration_contents.count("op.drop_entity") == 3
+    assert migration_contents.index("base_view") < migration_contents.index("dependent_view")
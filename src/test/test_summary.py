@@ -0,0 +1,63 @@
+import pytest
+
+from alembic_utils_extended.pg_function import PGFunction
+from alembic_utils_extended.pg_view import PGView
+from alembic_utils_extended.replaceable_entity import (
+    register_entities,
+    registry,
+)
+from alembic_utils_extended.summary import ComparisonSummary
+from alembic_utils_extended.testbase import run_alembic_command
+
+UNCHANGED_VIEW = PGView(schema="public", signature="unchanged_view", definition="select 1 as one")
+
+UPDATED_VIEW = PGView(schema="public", signature="updated_view", definition="select 1 as one")
+
+DROPPED_VIEW = PGView(schema="public", signature="dropped_view", definition="select 1 as one")
+
+TO_UPPER = PGFunction(
+    schema="public",
+    signature="toUpper(some_text text default 'my text!')",
+    definition="returns text as $$ select upper(some_text) $$ language sql",
+)
+
+
+def test_summary_counts() -> None:
+    summary = ComparisonSummary()
+    summary.record("PGView", "create")
+    summary.record("PGView", "noop")
+    summary.record("PGFunction", "create")
+
+    assert summary.count("create") == 2
+    assert summary.count("create", "PGView") == 1
+    assert summary.count("drop", "PGTrigger") == 0
+    assert summary.as_dict() == {
+        "PGFunction": {"create": 1, "replace": 0, "drop": 0, "noop": 0},
+        "PGView": {"create": 1, "replace": 0, "drop": 0, "noop": 1},
+    }
+    assert str(summary) == "PGFunction: 1 create, 0 replace, 0 drop, 0 noop; PGView: 1 create, 0 replace, 0 drop, 1 noop"
+
+    with pytest.raises(ValueError):
+        summary.record("PGView", "alter")
+
+
+def test_revision_records_summary(engine, execute_all) -> None:
+    with engine.begin() as connection:
+        for entity in [UNCHANGED_VIEW, UPDATED_VIEW, DROPPED_VIEW]:
+            execute_all(connection, entity.to_sql_statement_create())
+
+    updated_view = PGView(schema="public", signature="updated_view", definition="select 2 as two")
+    register_entities([UNCHANGED_VIEW, updated_view, TO_UPPER])
+
+    run_alembic_command(
+        engine=engine,
+        command="revision",
+        command_kwargs={"autogenerate": True, "rev_id": "1", "message": "summary"},
+    )
+
+    summary = registry.last_summary
+    assert summary is not None
+    assert summary.as_dict() == {
+        "PGFunction": {"create": 1, "replace": 0, "drop": 0, "noop": 0},
+        "PGView": {"create": 0, "replace": 1, "drop": 1, "noop": 1},
+    }